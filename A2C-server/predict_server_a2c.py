@@ -4,8 +4,8 @@ A2C Inference Socket Server
 Purpose:
     Runs a lightweight TCP socket server that loads a pretrained A2C model
     (Stable-Baselines3) and returns a discrete action (cloud index) for a
-    given input state. Designed for simple, synchronous inference from an
-    external simulator (e.g., iFogSim/Java).
+    given input state. Designed for inference from an external simulator
+    (e.g., iFogSim/Java).
 
 Protocol:
     Client -> Server:
@@ -19,62 +19,97 @@ Protocol:
         Example:
             {"cloud": 2}
 
+Modes:
+    - async (default): many simultaneous connections, newline-delimited requests,
+      states from concurrent requests micro-batched into one predict() call.
+      See serving/runner.py for the batching flags.
+    - blocking (--blocking): the original one-connection-at-a-time loop.
+
+    The async mode also accepts length-prefixed binary DECIDE frames on the
+    same port (see serving/protocol.py); the format is detected per request.
+
 Key Notes:
     - Input shape must match the training environment’s observation dimension.
-      This server reshapes to (1, -1) for SB3’s predict() API.
+      The blocking loop reshapes to (1, -1) for SB3’s predict() API.
     - Inference is deterministic (no exploration) for reproducible results.
-    - Single-threaded: one connection at a time. For concurrency, wrap
-      connection handling in threads or async I/O.
     - The lr_schedule override avoids SB3 load-time compatibility issues.
     - Stop gracefully with Ctrl+C (KeyboardInterrupt).
 
 Version/Compatibility:
-    - Requires stable-baselines3 and its dependencies (PyTorch).
+    - Requires stable-baselines3 and its dependencies (PyTorch), unless run
+      with --backend numpy on weights exported by serving/export_weights.py.
     - Model file name is "a2c_from_ppo_model_v2" (adjust if different).
 """
 
-import socket
+import argparse
 import json
+import os
+import socket
+import sys
+
 import numpy as np
-from stable_baselines3 import A2C
 
-# Load trained A2C model (override lr_schedule for compatibility)
-model = A2C.load("a2c_from_ppo_model_v2", custom_objects={"lr_schedule": lambda _: 0.0003})
-print("✅ A2C model loaded successfully")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from serving import protocol  # noqa: E402
+from serving.policies import as_policy, load_model  # noqa: E402
+from serving.runner import add_server_arguments, serve_async  # noqa: E402
 
 HOST = 'localhost'
 PORT = 9999  # Change if another server (e.g., DQN) also uses 9999
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "a2c_from_ppo_model_v2")
+
+
+def serve_blocking(model, host, port):
+    """Original synchronous loop: one connection at a time."""
+    # Run server loop (auto-closes on exit)
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server_socket:
+        server_socket.bind((host, port))
+        server_socket.listen()
+        print(f"✅ A2C Socket Server listening on {host}:{port}...")
+
+        try:
+            while True:
+                conn, addr = server_socket.accept()
+                with conn:
+                    print(f"🔌 Connected by {addr}")
+                    data = protocol.read_line(conn)
+                    if not data:
+                        continue
+
+                    try:
+                        request = json.loads(data)                               # Parse JSON
+                        state = np.array(request['state']).reshape(1, -1)       # 2D for SB3
+                        print(f"📥 Received state: {state}")
+
+                        action, _ = model.predict(state, deterministic=True)     # Inference only
+                        print(f"📤 Predicted action: {action[0]}")
+
+                        response = {'cloud': int(action[0])}                     # Match your protocol
+                        conn.sendall(json.dumps(response).encode())
+
+                    except Exception as e:
+                        error_msg = f"⚠️ Error processing request: {str(e)}"
+                        print(error_msg)
+                        conn.sendall(json.dumps({'error': error_msg}).encode())
+
+        except KeyboardInterrupt:
+            print("❌ Server manually stopped.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="A2C inference socket server")
+    add_server_arguments(parser, HOST, PORT)
+    parser.add_argument("--model", default=MODEL_PATH, help="Path to the A2C .zip")
+    args = parser.parse_args()
+
+    # Load trained A2C model (SB3 zip, or exported NumPy weights with --backend numpy)
+    model = load_model("a2c", args.model, args.backend, args.weights)
+
+    if args.blocking:
+        serve_blocking(model, args.host, args.port)
+    else:
+        serve_async(as_policy(model, deterministic=True), protocol.A2C, args, "A2C")
+
 
-# Run server loop (auto-closes on exit)
-with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server_socket:
-    server_socket.bind((HOST, PORT))
-    server_socket.listen()
-    print(f"✅ A2C Socket Server listening on {HOST}:{PORT}...")
-
-    try:
-        while True:
-            conn, addr = server_socket.accept()
-            with conn:
-                print(f"🔌 Connected by {addr}")
-                data = conn.recv(1024).decode()
-                if not data:
-                    continue
-
-                try:
-                    request = json.loads(data)                               # Parse JSON
-                    state = np.array(request['state']).reshape(1, -1)       # 2D for SB3
-                    print(f"📥 Received state: {state}")
-
-                    action, _ = model.predict(state, deterministic=True)     # Inference only
-                    print(f"📤 Predicted action: {action[0]}")
-
-                    response = {'cloud': int(action[0])}                     # Match your protocol
-                    conn.sendall(json.dumps(response).encode())
-
-                except Exception as e:
-                    error_msg = f"⚠️ Error processing request: {str(e)}"
-                    print(error_msg)
-                    conn.sendall(json.dumps({'error': error_msg}).encode())
-
-    except KeyboardInterrupt:
-        print("❌ Server manually stopped.")
+if __name__ == "__main__":
+    main()
@@ -2,76 +2,112 @@
 DQN Inference Socket Server
 ---------------------------
 Purpose:
-    Hosts a simple TCP socket server that loads a pretrained DQN model 
-    (Stable-Baselines3) and provides inference for a single state request at a time.
+    Hosts a TCP socket server that loads a pretrained DQN model
+    (Stable-Baselines3) and provides inference for state requests.
 
 Protocol:
     Client -> Server:
-        JSON string containing key "state", where "state" is a direct JSON list of 
-        floats (no double-encoding like in PPO). 
+        JSON string containing key "state", where "state" is a direct JSON list of
+        floats (no double-encoding like in PPO).
         Example:
             {"state": [0.75, 0.45, 0.20, 1.0, 0.35]}
 
     Server -> Client:
-        JSON string containing key "action", where "action" is the integer index 
+        JSON string containing key "action", where "action" is the integer index
         of the chosen cloud.
         Example:
             {"action": 1}
 
+Modes:
+    - async (default): many simultaneous connections, newline-delimited requests,
+      states from concurrent requests micro-batched into one predict() call.
+      See serving/runner.py for the batching flags.
+    - blocking (--blocking): the original one-connection-at-a-time loop.
+
+    The async mode also accepts length-prefixed binary DECIDE frames on the
+    same port (see serving/protocol.py); the format is detected per request.
+
 Key Notes:
     - The input state must be a list with the same dimensionality used during DQN training.
-      Here, it is reshaped to (1, -1) for compatibility with SB3 predict().
-    - This server is synchronous and handles one connection at a time.
-      For concurrent handling, wrap the client connection in threads or async I/O.
-    - The learning rate schedule is overridden on load with a fixed lambda to 
+      The blocking loop reshapes it to (1, -1) for compatibility with SB3 predict().
+    - The learning rate schedule is overridden on load with a fixed lambda to
       avoid SB3 incompatibility warnings.
+    - --backend numpy serves dqn_v1.npz (see serving/export_weights.py) without
+      importing torch; actions match the SB3 model.
     - Server stops gracefully with a KeyboardInterrupt (Ctrl+C).
 """
 
-import socket
+import argparse
 import json
+import os
+import socket
+import sys
+
 import numpy as np
-from stable_baselines3 import DQN
 
-# ✅ Load trained DQN model (keeps saved lr_schedule compatible)
-model = DQN.load("dqn_v1", custom_objects={"lr_schedule": lambda _: 0.0003})
-print("✅ DQN model loaded successfully")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from serving import protocol  # noqa: E402
+from serving.policies import as_policy, load_model  # noqa: E402
+from serving.runner import add_server_arguments, serve_async  # noqa: E402
 
 HOST = 'localhost'
 PORT = 9999
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dqn_v1")
+
+
+def serve_blocking(model, host, port):
+    """Original synchronous loop: one connection at a time."""
+    # ✅ Run socket server (auto-closes on exit)
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server_socket:
+        server_socket.bind((host, port))          # Bind to host:port
+        server_socket.listen()                    # Start listening for clients
+        print(f"✅ DQN Socket Server listening on {host}:{port}...")
+
+        try:
+            while True:
+                conn, addr = server_socket.accept()   # Block until a client connects
+                with conn:
+                    print(f"🔌 Connected by {addr}")
+                    data = protocol.read_line(conn)   # Receive one request line → str
+                    if not data:
+                        continue
+
+                    try:
+                        request = json.loads(data)                    # Parse JSON
+                        state = np.array(request['state']).reshape(1, -1)  # 2D for SB3
+                        print(f"📥 Received state: {state}")
+
+                        action, _ = model.predict(state, deterministic=True)  # Inference (no exploration)
+                        print(f"📤 Predicted action: {action[0]}")
+
+                        # ✅ Send back JSON response with the selected action
+                        response = {'action': int(action[0])}
+                        conn.sendall(json.dumps(response).encode())
+
+                    except Exception as e:
+                        # Return error as JSON (useful for debugging client-side)
+                        error_msg = f"⚠️ Error processing request: {str(e)}"
+                        print(error_msg)
+                        conn.sendall(json.dumps({'error': error_msg}).encode())
+
+        except KeyboardInterrupt:
+            print("❌ Server manually stopped.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DQN inference socket server")
+    add_server_arguments(parser, HOST, PORT)
+    parser.add_argument("--model", default=MODEL_PATH, help="Path to the DQN .zip")
+    args = parser.parse_args()
+
+    # Load trained DQN model (SB3 zip, or exported NumPy weights with --backend numpy)
+    model = load_model("dqn", args.model, args.backend, args.weights)
+
+    if args.blocking:
+        serve_blocking(model, args.host, args.port)
+    else:
+        serve_async(as_policy(model, deterministic=True), protocol.DQN, args, "DQN")
+
 
-# ✅ Run socket server (auto-closes on exit)
-with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server_socket:
-    server_socket.bind((HOST, PORT))          # Bind to host:port
-    server_socket.listen()                    # Start listening for clients
-    print(f"✅ DQN Socket Server listening on {HOST}:{PORT}...")
-
-    try:
-        while True:
-            conn, addr = server_socket.accept()   # Block until a client connects
-            with conn:
-                print(f"🔌 Connected by {addr}")
-                data = conn.recv(1024).decode()   # Receive request bytes → str
-                if not data:
-                    continue
-
-                try:
-                    request = json.loads(data)                    # Parse JSON
-                    state = np.array(request['state']).reshape(1, -1)  # 2D for SB3
-                    print(f"📥 Received state: {state}")
-
-                    action, _ = model.predict(state, deterministic=True)  # Inference (no exploration)
-                    print(f"📤 Predicted action: {action[0]}")
-
-                    # ✅ Send back JSON response with the selected action
-                    response = {'action': int(action[0])}
-                    conn.sendall(json.dumps(response).encode())
-
-                except Exception as e:
-                    # Return error as JSON (useful for debugging client-side)
-                    error_msg = f"⚠️ Error processing request: {str(e)}"
-                    print(error_msg)
-                    conn.sendall(json.dumps({'error': error_msg}).encode())
-
-    except KeyboardInterrupt:
-        print("❌ Server manually stopped.")
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,9 @@
 #          and save a cleaned CSV ready for PPO training/inference demos.
 # Usage (Colab): Upload `ppo_training_dataset_final.csv`, run this cell to get
 #                `ppo_training_dataset_cleaned_5f.csv` and auto-download it.
+#                With columnar_dataset.py uploaded too, the same rows are also
+#                saved as typed columns (`ppo_training_dataset_cleaned_5f.npz`)
+#                that the training scripts load without parsing.
 # ============================================================
 
 import pandas as pd
@@ -42,5 +45,18 @@ if 'Done' not in df.columns:
 df.to_csv("ppo_training_dataset_cleaned_5f.csv", index=False)
 print("✅ Saved as ppo_training_dataset_cleaned_5f.csv")
 
-# Step 8: Download (Colab)
+# Step 8: Save typed columns (float32 matrices + action/reward/done) from the parsed lists
+try:
+    from columnar_dataset import frame_to_columns, save_columnar
+except ImportError:
+    frame_to_columns = None
+    print("⚠️ columnar_dataset.py not found; skipping .npz export")
+
+if frame_to_columns is not None:
+    save_columnar(frame_to_columns(df), "ppo_training_dataset_cleaned_5f.npz")
+    print("✅ Saved as ppo_training_dataset_cleaned_5f.npz")
+
+# Step 9: Download (Colab)
 files.download("ppo_training_dataset_cleaned_5f.csv")
+if frame_to_columns is not None:
+    files.download("ppo_training_dataset_cleaned_5f.npz")
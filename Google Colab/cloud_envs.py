@@ -0,0 +1,215 @@
+# ============================================================
+# Title: Array-Backed Offline Environments (shared by ppo.py / dqn.py / a2c.py)
+# Purpose:
+#   - Keep states, next states, rewards, done flags and labels in contiguous
+#     float32 / int arrays instead of indexing a DataFrame on every step
+#   - Provide one single-copy Gymnasium env (for check_env / SubprocVecEnv)
+#     and one native vectorized env that steps N copies with NumPy indexing
+# Reward modes:
+#   - "dataset": reward, done and next observation come from the dataset rows
+#                (PPOCloudEnv in ppo.py)
+#   - "label":   +1 if action == label, else -0.25 * |action - label|; the next
+#                observation is the next row, zeros at the end (dqn.py / a2c.py)
+# Parallel copies:
+#   - Copy i walks the whole dataset starting at row i * len / N (wrapping),
+#     so copies see different rows; an episode is still one full pass.
+#   - make_vec_env(..., backend="native")  one process, all copies stepped at once
+#     make_vec_env(..., backend="subproc") one process per copy (SubprocVecEnv)
+# Usage (Colab: upload this file next to the training script):
+#   from cloud_envs import CloudDataset, make_vec_env
+# ============================================================
+
+import functools
+import os
+
+import numpy as np
+import gymnasium as gym
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv, VecEnv
+
+STATE_DIM = 5
+N_ACTIONS = 3  # 3 clouds
+REWARD_MODES = ("dataset", "label")
+
+
+class CloudDataset:
+    """Contiguous arrays for one offline dataset (row t = one task)."""
+
+    def __init__(self, states, next_states=None, rewards=None, dones=None, labels=None):
+        self.states = np.ascontiguousarray(states, dtype=np.float32)
+        n = len(self.states)
+        self.next_states = self.states if next_states is None else np.ascontiguousarray(next_states, dtype=np.float32)
+        self.rewards = np.zeros(n, np.float32) if rewards is None else np.ascontiguousarray(rewards, dtype=np.float32)
+        self.dones = np.zeros(n, bool) if dones is None else np.ascontiguousarray(dones, dtype=bool)
+        self.labels = np.zeros(n, np.int64) if labels is None else np.ascontiguousarray(labels, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.states)
+
+
+def _spaces():
+    observation_space = spaces.Box(low=0.0, high=1.0, shape=(STATE_DIM,), dtype=np.float32)  # 5D normalized
+    return observation_space, spaces.Discrete(N_ACTIONS)
+
+
+def label_reward(actions, labels):
+    """+1 if correct; graded penalty otherwise (works on scalars and arrays)."""
+    return np.where(actions == labels, 1.0, -0.25 * np.abs(actions - labels)).astype(np.float32)
+
+
+class ArrayCloudEnv(gym.Env):
+    """Single copy over a CloudDataset; `offset` picks the starting row."""
+
+    def __init__(self, data, reward_mode="dataset", offset=0):
+        super().__init__()
+        assert reward_mode in REWARD_MODES
+        self.data = data
+        self.reward_mode = reward_mode
+        self.offset = offset % len(data)
+        self.observation_space, self.action_space = _spaces()
+        self.current_step = 0
+
+    def _row(self, step):
+        return (self.offset + step) % len(self.data)
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        self.current_step = 0
+        return self.data.states[self._row(0)], {}  # Gymnasium API: (obs, info)
+
+    def step(self, action):
+        row = self._row(self.current_step)
+        self.current_step += 1
+        end = self.current_step >= len(self.data)  # end episode at end of dataset
+
+        if self.reward_mode == "dataset":
+            reward = float(self.data.rewards[row])
+            done = bool(self.data.dones[row]) or end
+            obs = self.data.next_states[row]
+        else:
+            reward = float(label_reward(int(action), self.data.labels[row]))
+            done = end
+            obs = np.zeros(STATE_DIM, dtype=np.float32) if end else self.data.states[self._row(self.current_step)]
+        return obs, reward, done, False, {}  # (obs, reward, terminated, truncated, info)
+
+
+class ArrayCloudVecEnv(VecEnv):
+    """N copies of ArrayCloudEnv stepped together with array indexing.
+
+    step() works on the offsets / steps arrays only; reset, get_attr, set_attr
+    and env_method go through one ArrayCloudEnv per copy (kept in `envs`, so
+    its RNG and attributes persist) whose position is synced with the arrays.
+    """
+
+    SHARED = ("data", "reward_mode")  # One value for every copy
+
+    def __init__(self, data, n_envs, reward_mode="dataset"):
+        assert reward_mode in REWARD_MODES
+        self.data = data
+        self.reward_mode = reward_mode
+        self.offsets = (np.arange(n_envs) * len(data)) // n_envs
+        self.steps = np.zeros(n_envs, dtype=np.int64)
+        self._actions = np.zeros(n_envs, dtype=np.int64)
+        self.envs = [ArrayCloudEnv(data, reward_mode, int(o)) for o in self.offsets]
+        observation_space, action_space = _spaces()
+        super().__init__(n_envs, observation_space, action_space)
+
+    def _rows(self, steps):
+        return (self.offsets + steps) % len(self.data)
+
+    def _copies(self, indices):
+        """Per-copy envs for `indices`, positioned where the arrays say."""
+        indices = list(self._get_indices(indices))
+        for i in indices:
+            self.envs[i].offset = int(self.offsets[i])
+            self.envs[i].current_step = int(self.steps[i])
+        return indices
+
+    def _store(self, indices):
+        """Copy the per-copy envs' positions back into the arrays."""
+        for i in indices:
+            self.offsets[i] = self.envs[i].offset % len(self.data)
+            self.steps[i] = self.envs[i].current_step
+
+    def reset(self):
+        indices = self._copies(None)
+        obs = np.empty((self.num_envs, STATE_DIM), dtype=np.float32)
+        for i in indices:
+            options = {"options": self._options[i]} if self._options[i] else {}
+            obs[i], self.reset_infos[i] = self.envs[i].reset(seed=self._seeds[i], **options)
+        self._store(indices)
+        self._reset_seeds()  # Seeds and options are only used once
+        self._reset_options()
+        return obs
+
+    def step_async(self, actions):
+        self._actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs)
+
+    def step_wait(self):
+        rows = self._rows(self.steps)
+        self.steps += 1
+        end = self.steps >= len(self.data)
+
+        if self.reward_mode == "dataset":
+            rewards = self.data.rewards[rows].copy()
+            dones = self.data.dones[rows] | end
+            obs = self.data.next_states[rows].copy()
+        else:
+            rewards = label_reward(self._actions, self.data.labels[rows])
+            dones = end
+            obs = self.data.states[self._rows(self.steps)].copy()
+            obs[end] = 0.0
+
+        infos = [{} for _ in range(self.num_envs)]
+        for i in np.flatnonzero(dones):
+            infos[i]["terminal_observation"] = obs[i].copy()
+            infos[i]["TimeLimit.truncated"] = False
+            self.steps[i] = 0
+            obs[i] = self.data.states[self.offsets[i]]
+        return obs, rewards, dones.copy(), infos
+
+    def close(self):
+        pass
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self.envs[i], attr_name) for i in self._copies(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        indices = self._copies(indices)
+        if attr_name in self.SHARED:
+            if len(set(indices)) != self.num_envs:
+                raise ValueError(f"ERROR: '{attr_name}' is shared by all copies; set it without indices")
+            if attr_name == "reward_mode":
+                assert value in REWARD_MODES
+            setattr(self, attr_name, value)
+        for i in indices:
+            setattr(self.envs[i], attr_name, value)
+        self._store(indices)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        indices = self._copies(indices)
+        results = [getattr(self.envs[i], method_name)(*method_args, **method_kwargs) for i in indices]
+        self._store(indices)
+        return results
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
+
+
+def _make_env(data, reward_mode, offset):
+    return ArrayCloudEnv(data, reward_mode, offset)
+
+
+def make_vec_env(data, n_envs=None, reward_mode="dataset", backend="native"):
+    """Vectorized env with `n_envs` copies (default: one per CPU core)."""
+    n_envs = n_envs or os.cpu_count() or 1
+    if backend == "native":
+        return ArrayCloudVecEnv(data, n_envs, reward_mode)
+
+    offsets = (np.arange(n_envs) * len(data)) // n_envs
+    env_fns = [functools.partial(_make_env, data, reward_mode, int(o)) for o in offsets]
+    if backend == "subproc":
+        return SubprocVecEnv(env_fns)
+    if backend == "dummy":
+        return DummyVecEnv(env_fns)
+    raise ValueError(f"ERROR: Unknown backend '{backend}' (native, subproc, dummy)")
@@ -0,0 +1,117 @@
+# ============================================================
+# Title: Columnar Binary Dataset Format (StateVec/NextState without strings)
+# Purpose:
+#   - Convert a training CSV with stringified "[176.62, 1.10, 0.0, 0.0, 0.0]"
+#     StateVec / NextState columns into typed columns, once
+#   - Load those columns with zero parsing: memory-mapped .npy files, no
+#     Python object per row
+# Layout (directory "<name>.cols/"):
+#   state.npy       float32 (N, 5)   StateVec, padded/trimmed to 5 like fivefeatures.py
+#   next_state.npy  float32 (N, 5)   NextState (= StateVec when the CSV has none)
+#   action.npy      int64   (N,)     Action label (-1 if missing)
+#   reward.npy      float32 (N,)
+#   done.npy        bool    (N,)
+#   sla_met.npy     bool    (N,)     SLAMet == "YES"       (if present)
+#   cpu_cost.npy    float32 (N,)     CPUCost               (if present)
+#   meta.json       row count, source CSV, column list
+#   A single ".npz" file is also supported (not memory-mappable).
+# Usage:
+#   from columnar_dataset import load_dataset
+#   cols = load_dataset("ppo_training_dataset_cleaned_5f.csv")  # converts on first use
+#   cols["state"]   # (N, 5) float32, memory-mapped
+#   python columnar_dataset.py Datasets/ppo_training_dataset_cleaned_5f.csv
+# ============================================================
+
+import json
+import os
+import sys
+
+import numpy as np
+
+STATE_DIM = 5
+COLUMN_SUFFIX = ".cols"
+
+
+def parse_vectors(series, dim=STATE_DIM):
+    """Stringified lists -> (N, dim) float32, padded with 0.0 / trimmed to dim."""
+    if len(series) and not isinstance(series.iloc[0], str):  # already parsed fixed-length lists
+        return np.asarray(series.tolist(), dtype=np.float32)[:, :dim]
+    parts = series.astype(str).str.strip().str.strip("[]").str.split(",", expand=True)
+    parts = parts.reindex(columns=range(dim)).replace("", np.nan)
+    return parts.astype(np.float32).fillna(0.0).to_numpy()
+
+
+def frame_to_columns(df):
+    """Typed column arrays from a training DataFrame with string vectors."""
+    import pandas as pd
+    n = len(df)
+    state = parse_vectors(df["StateVec"])
+    cols = {
+        "state": state,
+        "next_state": parse_vectors(df["NextState"]) if "NextState" in df.columns else state.copy(),
+        "action": pd.to_numeric(df["Action"], errors="coerce").fillna(-1).to_numpy(np.int64)
+        if "Action" in df.columns else np.full(n, -1, np.int64),
+        "reward": pd.to_numeric(df["Reward"], errors="coerce").fillna(0).to_numpy(np.float32)
+        if "Reward" in df.columns else np.zeros(n, np.float32),
+        "done": df["Done"].astype(str).str.strip().str.lower().eq("true").to_numpy()
+        if "Done" in df.columns else np.zeros(n, bool),
+    }
+    if "SLAMet" in df.columns:
+        cols["sla_met"] = df["SLAMet"].astype(str).str.upper().eq("YES").to_numpy()
+    if "CPUCost" in df.columns:
+        cols["cpu_cost"] = pd.to_numeric(df["CPUCost"], errors="coerce").fillna(0).to_numpy(np.float32)
+    return cols
+
+
+def save_columnar(cols, path, source=None):
+    """Write columns to a "<name>.cols" directory (or a single .npz file)."""
+    if path.endswith(".npz"):
+        np.savez(path, **cols)
+        return path
+    os.makedirs(path, exist_ok=True)
+    for name, values in cols.items():
+        np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(values))
+    meta = {"rows": int(len(cols["state"])), "columns": sorted(cols), "source": source}
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    return path
+
+
+def load_columnar(path, mmap=True):
+    """Load a "<name>.cols" directory (memory-mapped) or .npz file into a dict of arrays."""
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    mode = "r" if mmap else None
+    return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in meta["columns"]}
+
+
+def columnar_path(csv_path):
+    return os.path.splitext(csv_path)[0] + COLUMN_SUFFIX
+
+
+def convert_csv(csv_path, out_path=None):
+    import pandas as pd
+    out_path = out_path or columnar_path(csv_path)
+    df = pd.read_csv(csv_path)
+    df.columns = df.columns.str.strip()
+    return save_columnar(frame_to_columns(df), out_path, source=os.path.basename(csv_path))
+
+
+def load_dataset(path, mmap=True):
+    """Load columns for a CSV (converted once and cached next to it), a .cols dir or a .npz."""
+    if path.endswith(".csv"):
+        cached = columnar_path(path)
+        if not os.path.exists(cached) or os.path.getmtime(cached) < os.path.getmtime(path):
+            convert_csv(path, cached)
+            print(f"✅ Converted {path} -> {cached}")
+        path = cached
+    return load_columnar(path, mmap=mmap)
+
+
+if __name__ == "__main__":
+    for csv in sys.argv[1:]:
+        out = convert_csv(csv)
+        print(f"✅ {csv} -> {out} ({len(load_columnar(out)['state'])} rows)")
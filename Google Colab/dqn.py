@@ -2,79 +2,52 @@
 # Title: DQN Training on PPO-Style Dataset 
 # Purpose:
 #   - Load a 5D StateVec dataset with labeled actions
-#   - Define a simple offline Gymnasium env with reward shaping
+#   - Use the shared array-backed offline env (cloud_envs.py) with reward shaping
 #   - Train a Stable-Baselines3 DQN model and save it
 # Inputs:
 #   - CSV: 'ppo_training_dataset_cleaned_5f.csv'
 #   - Columns: 'StateVec' (list of 5 floats), 'Action' (int in {0,1,2})
 # Output:
 #   - Model: 'dqn_v1.zip'
+# Notes:
+#   - Upload cloud_envs.py next to this script; N_ENVS copies are stepped together.
+#   - N_ENVS = 1 reproduces the original run. train_freq counts vector steps, so
+#     N_ENVS > 1 adds N_ENVS transitions per gradient step: pass
+#     gradient_steps=N_ENVS to keep the update ratio (SB3 already divides
+#     target_update_interval by N_ENVS).
+#   - Upload columnar_dataset.py too: the CSV is converted once to typed columns
+#     and later runs memory-map them without parsing.
 # ============================================================
 
 # ✅ Step 1: Install dependencies
 # pip install stable-baselines3[extra] gymnasium==0.29.1
 
 # ✅ Step 2: Imports
-import pandas as pd
 import numpy as np
-import gymnasium as gym
-from gymnasium import spaces
 from sklearn.preprocessing import MinMaxScaler
 from stable_baselines3 import DQN
 from stable_baselines3.common.env_checker import check_env
+from cloud_envs import ArrayCloudEnv, CloudDataset, make_vec_env
+from columnar_dataset import load_dataset
 
-# ✅ Step 3: Load dataset
-df = pd.read_csv("ppo_training_dataset_cleaned_5f.csv")
+N_ENVS = 1                     # env copies; >1 changes the rollout (see Notes)
+ENV_BACKEND = "native"         # "native" (one process) or "subproc" (one process per copy)
 
-# Evaluate and convert state/next state
-df['StateVec'] = df['StateVec'].apply(eval)     # parse list strings → Python lists
-df['Action'] = df['Action'].astype(int)         # ensure integer labels
+# ✅ Step 3: Load dataset
+cols = load_dataset("ppo_training_dataset_cleaned_5f.csv")  # typed columns, no eval per row
 
 # Normalize StateVec
 scaler = MinMaxScaler()
-state_vecs = scaler.fit_transform(np.vstack(df["StateVec"])).astype(np.float32)
-labels = df["Action"].tolist()
-
-# ✅ Step 4: Custom offline environment with reward shaping
-class CloudSchedulerOfflineDQNEnv(gym.Env):
-    def __init__(self):
-        super().__init__()
-        self.states = state_vecs
-        self.labels = labels
-        self.current_step = 0
-        self.n_tasks = len(self.states)
-
-        # Observation: 5D normalized features; Action: 3 discrete clouds
-        self.observation_space = spaces.Box(low=0.0, high=1.0, shape=(5,), dtype=np.float32)
-        self.action_space = spaces.Discrete(3)
-
-    def reset(self, seed=None, options=None):
-        super().reset(seed=seed)
-        self.current_step = 0
-        return self.states[self.current_step], {}
-
-    def step(self, action):
-        correct_action = self.labels[self.current_step]
-
-        # ✅ Reward shaping: +1 if correct; graded penalty otherwise
-        if action == correct_action:
-            reward = 1.0
-        else:
-            reward = -0.25 * abs(action - correct_action)
-
-        # Advance pointer and determine termination
-        self.current_step += 1
-        done = self.current_step >= self.n_tasks
-        obs = self.states[self.current_step] if not done else np.zeros(5, dtype=np.float32)
+state_vecs = scaler.fit_transform(cols["state"]).astype(np.float32)
+labels = cols["action"]                         # integer labels
 
-        terminated = bool(done)
-        truncated = False
-        info = {}
-        return obs, float(reward), terminated, truncated, info
+# ✅ Step 4: Offline environment with reward shaping
+# +1 if the action matches the label; -0.25 * |action - label| otherwise
+data = CloudDataset(states=state_vecs, labels=labels)
 
 # ✅ Step 5: Setup environment
-env = CloudSchedulerOfflineDQNEnv()
-check_env(env)  # sanity-check spaces & API
+check_env(ArrayCloudEnv(data, reward_mode="label"))  # sanity-check spaces & API
+env = make_vec_env(data, n_envs=N_ENVS, reward_mode="label", backend=ENV_BACKEND)
 
 # ✅ Step 6: Train DQN model
 model = DQN(
@@ -5,53 +5,147 @@
 #   - Apply simple, human-readable reasoning rules
 #   - Export an explainability table (per task, per model)
 # Input:  ppo_log.csv, A2C_log.csv, dqn_log.csv
+#         (or, with --store, the newest ppo / a2c / dqn run in the run store)
 # Output: explainability_table.csv
+# Notes:
+#   - The rules are evaluated as whole-column conditions (np.select), first
+#     matching rule wins, exactly like the original if/elif chain.
+#   - --chunk-size N streams each log N rows at a time and appends to the
+#     output, so memory stays bounded for arbitrarily large logs.
+#   - Both modes write the same bytes: TaskID / SelectedCloud are written as
+#     floats ("2.0") when any log has missing or fractional values there,
+#     as pandas did when building the table from one list of dicts.
+#   - --store reads only the six columns the rules need from the newest run
+#     of each model in analytics/run_store.py (one part at a time when
+#     streaming) instead of the flat CSVs.
+# Usage:
+#   python explainability.py
+#   python explainability.py --logs-dir ../results --chunk-size 1000000
+#   python explainability.py --store ../results/runs --chunk-size 1000000
 # ============================================================
 
+import argparse
+import os
+import sys
+
+import numpy as np
 import pandas as pd
 
-# Load PPO, A2C, DQN logs
-models = {
-    "PPO": pd.read_csv("ppo_log.csv"),
-    "A2C": pd.read_csv("A2C_log.csv"),
-    "DQN": pd.read_csv("dqn_log.csv")
-}
-
-rows = []
-
-# Iterate each model’s rows and derive a text reason
-for model_name, df in models.items():
-    for idx, row in df.iterrows():
-        sla = row['SLAMet']
-        cost = row['CPUCost']
-        sla_dur = row['SLADuration']
-        exec_time = row['ExecutionTime']
-        cloud = row['SelectedCloud']
-        task_id = row['TaskID']
-
-        # Rule-based reasoning (ordered by priority)
-        if sla_dur < 0.1 and cost > 150:
-            reason = "Tight deadline forced a fast cloud despite cost"
-        elif sla_dur < 0.1:
-            reason = "Low SLA Deadline led to faster cloud selection"
-        elif cost > 150:
-            reason = "High cost led to choosing cheaper cloud"
-        elif cost < 100 and sla_dur > 0.1:
-            reason = "Long SLA allowed cost-optimized scheduling"
-        elif exec_time > sla_dur:
-            reason = "Execution time exceeded SLA deadline"
-        else:
-            reason = "Balanced decision between SLA and cost"
-
-        rows.append({
-            "Model": model_name,
-            "TaskID": task_id,
-            "SelectedCloud": cloud,
-            "SLA": sla,
-            "Reason": reason
-        })
-
-# Save updated explainability table
-explain_df = pd.DataFrame(rows)
-explain_df.to_csv("explainability_table.csv", index=False)
-print("✅ New explainability table saved as 'explainability_table.csv'")
\ No newline at end of file
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))  # analytics/
+
+LOGS = {"PPO": "ppo_log.csv", "A2C": "A2C_log.csv", "DQN": "dqn_log.csv"}
+COLUMNS = ["TaskID", "SelectedCloud", "SLAMet", "CPUCost", "SLADuration", "ExecutionTime"]
+ID_COLUMNS = ["TaskID", "SelectedCloud"]
+
+# Rule-based reasoning (ordered by priority; first match wins)
+REASONS = [
+    "Tight deadline forced a fast cloud despite cost",
+    "Low SLA Deadline led to faster cloud selection",
+    "High cost led to choosing cheaper cloud",
+    "Long SLA allowed cost-optimized scheduling",
+    "Execution time exceeded SLA deadline",
+]
+DEFAULT_REASON = "Balanced decision between SLA and cost"
+
+
+def reasons(df):
+    """Reason text per row, from the same conditions as the original rules."""
+    cost = df['CPUCost'].to_numpy(dtype=np.float64)
+    sla_dur = df['SLADuration'].to_numpy(dtype=np.float64)
+    exec_time = df['ExecutionTime'].to_numpy(dtype=np.float64)
+    conditions = [
+        (sla_dur < 0.1) & (cost > 150),
+        sla_dur < 0.1,
+        cost > 150,
+        (cost < 100) & (sla_dur > 0.1),
+        exec_time > sla_dur,
+    ]
+    return np.select(conditions, REASONS, default=DEFAULT_REASON)
+
+
+def explain(model_name, df, float_ids=()):
+    """Explainability rows for one model's log frame (or chunk)."""
+    out = pd.DataFrame({
+        "Model": model_name,
+        "TaskID": df['TaskID'].to_numpy(),
+        "SelectedCloud": df['SelectedCloud'].to_numpy(),
+        "SLA": df['SLAMet'].to_numpy(),
+        "Reason": reasons(df),
+    })
+    for col in float_ids:
+        out[col] = out[col].astype(np.float64)
+    return out
+
+
+def read_chunks(path, chunk_size, usecols=COLUMNS):
+    """CSV log chunks, or the parts of a run store run directory (already chunked when written)."""
+    if os.path.isdir(path):
+        from analytics.run_store import scan_run
+        return scan_run(path, usecols)
+    return pd.read_csv(path, usecols=usecols, chunksize=chunk_size)
+
+
+def read_log(path):
+    if os.path.isdir(path):
+        from analytics.run_store import scan_run
+        return pd.concat(scan_run(path, COLUMNS), ignore_index=True)
+    return pd.read_csv(path, usecols=COLUMNS)
+
+
+def log_sources(logs_dir=".", store=None):
+    """Model name -> CSV log, or -> newest run directory of that model in the run store."""
+    if store is None:
+        return {name: os.path.join(logs_dir, path) for name, path in LOGS.items()}
+    from analytics.run_store import STORE_MODELS, RunStore
+    runs = {name: RunStore(store).latest(model=STORE_MODELS[name]) for name in LOGS}
+    missing = [name for name, run in runs.items() if run is None]
+    if missing:
+        raise FileNotFoundError(f"❌ No {', '.join(missing)} runs in the run store at {store}")
+    return {name: run["path"] for name, run in runs.items()}
+
+
+def float_id_columns(paths, chunk_size):
+    """ID columns that pandas reads as float in any log (NaN or fractional values)."""
+    floats = set()
+    for path in paths:
+        for chunk in read_chunks(path, chunk_size, usecols=ID_COLUMNS):
+            floats.update(col for col in ID_COLUMNS if pd.api.types.is_float_dtype(chunk[col]))
+    return [col for col in ID_COLUMNS if col in floats]
+
+
+def build_table(logs_dir=".", store=None):
+    """Whole table in memory (small logs)."""
+    frames = [explain(name, read_log(path)) for name, path in log_sources(logs_dir, store).items()]
+    return pd.concat(frames, ignore_index=True)
+
+
+def write_table_streaming(out_path, logs_dir=".", chunk_size=1_000_000, store=None):
+    """Append the table chunk by chunk; returns the number of rows written."""
+    paths = log_sources(logs_dir, store)
+    float_ids = float_id_columns(paths.values(), chunk_size)
+    written = 0
+    for name, path in paths.items():
+        for chunk in read_chunks(path, chunk_size):
+            explain(name, chunk, float_ids).to_csv(out_path, mode="w" if written == 0 else "a",
+                                                   header=written == 0, index=False)
+            written += len(chunk)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rule-based explainability table")
+    parser.add_argument("--logs-dir", default=".", help="Folder with ppo_log.csv, A2C_log.csv, dqn_log.csv")
+    parser.add_argument("--out", default="explainability_table.csv")
+    parser.add_argument("--chunk-size", type=int, default=0, help="Stream logs in chunks of N rows (0 = load whole logs)")
+    parser.add_argument("--store", help="Run store root (e.g. ../results/runs) to read the newest runs from")
+    args, _ = parser.parse_known_args()  # tolerate notebook kernel arguments
+
+    if args.chunk_size > 0:
+        write_table_streaming(args.out, args.logs_dir, args.chunk_size, args.store)
+    else:
+        build_table(args.logs_dir, args.store).to_csv(args.out, index=False)
+    print(f"✅ New explainability table saved as '{args.out}'")
+
+
+if __name__ == "__main__":
+    main()
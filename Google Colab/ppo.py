@@ -3,12 +3,20 @@
 # Purpose:
 #   - Load a cleaned dataset with 5D StateVec/NextState
 #   - Normalize features
-#   - Train a Stable-Baselines3 PPO agent in a simple Gymnasium env
+#   - Train a Stable-Baselines3 PPO agent on N parallel array-backed env copies
 #   - Save the pretrained model for later inference
 # Notes:
 #   - Expects 'ppo_training_dataset_cleaned_5f.csv' with columns:
 #     StateVec (list[5]), NextState (list[5]), Reward, Done, Action(optional), SLAMet(optional)
+#   - The CSV is converted once to typed columns (columnar_dataset.py, upload it too)
+#     and later runs memory-map 'ppo_training_dataset_cleaned_5f.cols/' directly.
 #   - Uses shimmy to bridge Gymnasium with Stable-Baselines3.
+#   - The environment lives in cloud_envs.py (upload it next to this script);
+#     N_ENVS copies are stepped together, or one per core with ENV_BACKEND="subproc".
+#   - N_ENVS = 1 reproduces the original run. PPO collects n_steps (2048) per copy,
+#     so N_ENVS > 1 makes each rollout N_ENVS x larger and, at the same
+#     total_timesteps, leaves N_ENVS x fewer updates: pass n_steps=2048 // N_ENVS
+#     to keep the rollout size.
 #   - Action space is Discrete(3): e.g., clouds {0,1,2}.
 # ============================================================
 
@@ -17,58 +25,33 @@
 #!pip install "shimmy>=2.0"
 
 # ✅ Step 2: Import Required Modules
-import pandas as pd
 import numpy as np
-import gymnasium as gym
-from gymnasium import spaces
 from sklearn.preprocessing import MinMaxScaler
 from stable_baselines3 import PPO
-from stable_baselines3.common.vec_env import DummyVecEnv
 import torch
-import ast
+from cloud_envs import CloudDataset, make_vec_env
+from columnar_dataset import load_dataset
 
-# ✅ Step 3: Load and Parse the Cleaned Dataset
-df = pd.read_csv("/content/ppo_training_dataset_cleaned_5f.csv")
-df['StateVec'] = df['StateVec'].apply(ast.literal_eval)
-df['NextState'] = df['NextState'].apply(ast.literal_eval)
+N_ENVS = 1                     # env copies; >1 changes the rollout (see Notes)
+ENV_BACKEND = "native"         # "native" (one process) or "subproc" (one process per copy)
 
-# ✅ Step 4: Normalize StateVec and NextState
-scaler = MinMaxScaler()
-all_states = np.vstack(df['StateVec'].tolist() + df['NextState'].tolist())  # fit on combined
-scaler.fit(all_states)
-
-df['StateVec'] = df['StateVec'].apply(lambda x: scaler.transform([x])[0])
-df['NextState'] = df['NextState'].apply(lambda x: scaler.transform([x])[0])
-
-# ✅ Step 5: Define the PPO-Compatible Gym Environment
-class PPOCloudEnv(gym.Env):
-    def __init__(self, dataframe):
-        super(PPOCloudEnv, self).__init__()
-        self.df = dataframe.reset_index(drop=True)
-        self.current_step = 0
-        self.observation_space = spaces.Box(low=0, high=1, shape=(5,), dtype=np.float32)  # 5D normalized
-        self.action_space = spaces.Discrete(3)  # 3 clouds
+# ✅ Step 3: Load the Cleaned Dataset as typed columns (no per-row parsing)
+cols = load_dataset("/content/ppo_training_dataset_cleaned_5f.csv")
 
-    def reset(self, seed=None, options=None):
-        self.current_step = 0
-        state = np.array(self.df.loc[self.current_step, 'StateVec'], dtype=np.float32)
-        return state, {}  # Gymnasium API: (obs, info)
-
-    def step(self, action):
-        row = self.df.loc[self.current_step]
-        reward = row['Reward']           # scalar reward from dataset
-        done = row['Done']               # per-row termination flag (may be False)
-        next_state = np.array(row['NextState'], dtype=np.float32)
-
-        self.current_step += 1
-        if self.current_step >= len(self.df):
-            done = True                  # end episode at end of dataset
+# ✅ Step 4: Normalize StateVec and NextState (whole matrices at once)
+scaler = MinMaxScaler()
+scaler.fit(np.vstack([cols['state'], cols['next_state']]))  # fit on combined
 
-        return next_state, reward, done, False, {}  # (obs, reward, terminated, truncated, info)
+# ✅ Step 5: Pack the dataset into contiguous arrays (see cloud_envs.py)
+data = CloudDataset(
+    states=scaler.transform(cols['state']),
+    next_states=scaler.transform(cols['next_state']),
+    rewards=cols['reward'],              # scalar reward per row
+    dones=cols['done'],                  # per-row termination flag (may be False)
+)
 
 # ✅ Step 6: Initialize PPO and Train
-env = PPOCloudEnv(df)
-vec_env = DummyVecEnv([lambda: env])                     # wrap for SB3
+vec_env = make_vec_env(data, n_envs=N_ENVS, reward_mode="dataset", backend=ENV_BACKEND)
 model = PPO("MlpPolicy", vec_env, verbose=1, tensorboard_log="./ppo_log")
 model.learn(total_timesteps=20000)                       # training steps
 
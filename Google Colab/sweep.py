@@ -0,0 +1,357 @@
+# ============================================================
+# Title: Parallel Hyperparameter Sweep for ppo.py / dqn.py / a2c.py
+# Purpose:
+#   - Sample trials from a search space (random search, seeded)
+#   - Train one Stable-Baselines3 model per trial, one process per trial,
+#     several trials at once on the local CPU cores
+#   - Evaluate every trial periodically and stop clearly losing trials early
+#     (median stopping rule)
+#   - Keep every trial's parameters, learning curve and result, plus the best
+#     model, in a local results store
+# Data preparation per algorithm (same as the training scripts):
+#   ppo  MinMax over StateVec+NextState, dataset rewards   (ppo.py)
+#   dqn  MinMax over StateVec, label-shaped rewards          (dqn.py)
+#   a2c  StateVec / per-feature max, label-shaped rewards    (a2c.py)
+#   The last --holdout fraction of rows is never trained on.
+# Objective (higher is better):
+#   Mean label-shaped reward (+1 match, -0.25 * |action - label|) of the
+#   deterministic policy on the held-out rows. The dataset's StateVec is not
+#   in the simulator's state units, so simulator rewards cannot score these
+#   models; rank the exported winners with simulation/evaluate.py instead.
+# Early stopping:
+#   At every evaluation after --warmup-evals, a trial stops if its best score
+#   so far is below the median of the other trials' scores at the same step
+#   (needs --min-peers trials that reached it). Trials coordinate only
+#   through their progress files in the store.
+# Results store (--store, e.g. sweeps/dqn/):
+#   space.json, base.json                        search space and fixed settings
+#   trials/0007/params.json                      sampled hyperparameters
+#   trials/0007/progress.jsonl                   {"step": ..., "score": ...} per evaluation
+#   trials/0007/result.json                      status (completed / pruned / failed), scores, time
+#   results.csv                                  leaderboard, best first
+#   best_model.zip, best.json                    best completed trial
+#   Re-running with the same --store skips finished trials (resume).
+# Usage:
+#   python sweep.py --algo dqn --trials 24 --workers 4 --store sweeps/dqn
+#   python sweep.py --algo ppo --space my_space.json --timesteps 100000 --eval-every 10000
+#   space.json: {"learning_rate": {"loguniform": [1e-5, 1e-3]},
+#                "gamma": {"uniform": [0.9, 0.999]}, "batch_size": [32, 64, 128]}
+# ============================================================
+
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+from stable_baselines3 import A2C, DQN, PPO
+from stable_baselines3.common.callbacks import BaseCallback
+from cloud_envs import CloudDataset, label_reward, make_vec_env
+from columnar_dataset import load_dataset
+
+# algo -> (SB3 class, reward mode, fixed settings from the training script, default search space)
+ALGOS = {
+    "ppo": (PPO, "dataset", {"total_timesteps": 20000}, {
+        "learning_rate": {"loguniform": [1e-5, 1e-3]},
+        "ent_coef": [0.0, 0.01, 0.05],
+        "gamma": {"uniform": [0.9, 0.999]},
+        "n_steps": [128, 256, 512, 2048],
+        "batch_size": [32, 64, 128],
+    }),
+    "dqn": (DQN, "label", {"total_timesteps": 50000, "learning_rate": 0.0005, "exploration_fraction": 0.3,
+                           "buffer_size": 10000, "batch_size": 64, "gamma": 0.99, "train_freq": 1,
+                           "target_update_interval": 100}, {
+        "learning_rate": {"loguniform": [1e-5, 1e-3]},
+        "exploration_fraction": {"uniform": [0.1, 0.5]},
+        "batch_size": [32, 64, 128],
+        "gamma": {"uniform": [0.9, 0.999]},
+        "target_update_interval": [100, 500, 1000],
+    }),
+    "a2c": (A2C, "label", {"total_timesteps": 50000, "ent_coef": 0.05, "learning_rate": 0.0007,
+                           "n_steps": 5, "gamma": 0.99}, {
+        "learning_rate": {"loguniform": [1e-4, 3e-3]},
+        "ent_coef": [0.0, 0.01, 0.05, 0.1],
+        "n_steps": [5, 16, 32],
+        "gamma": {"uniform": [0.9, 0.999]},
+    }),
+}
+
+
+# ---------------- Search space ----------------
+
+def sample_params(space, rng):
+    """One trial: lists are choices, {"uniform"|"loguniform"|"int": [lo, hi]} are ranges."""
+    params = {}
+    for name, spec in space.items():
+        if isinstance(spec, list):
+            value = spec[rng.integers(len(spec))]
+        elif "uniform" in spec:
+            value = rng.uniform(*spec["uniform"])
+        elif "loguniform" in spec:
+            low, high = spec["loguniform"]
+            value = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+        elif "int" in spec:
+            value = int(rng.integers(spec["int"][0], spec["int"][1] + 1))
+        else:
+            raise ValueError(f"ERROR: Unknown search space entry for '{name}': {spec}")
+        params[name] = value.item() if isinstance(value, np.generic) else value
+    return params
+
+
+# ---------------- Data & objective ----------------
+
+def prepare(algo, dataset_path, holdout):
+    """(training CloudDataset, held-out states, held-out labels), preprocessed like the scripts."""
+    cols = load_dataset(dataset_path)
+    states, next_states, labels = cols["state"], cols["next_state"], cols["action"]
+    if algo == "a2c":
+        keep = labels >= 0
+        states, next_states, labels = states[keep], next_states[keep], labels[keep]
+    n_train = int(len(states) * (1 - holdout))
+
+    if algo == "ppo":
+        scaler = MinMaxScaler().fit(np.vstack([states[:n_train], next_states[:n_train]]))
+        transform = lambda x: scaler.transform(x).astype(np.float32)  # noqa: E731
+        data = CloudDataset(states=transform(states[:n_train]), next_states=transform(next_states[:n_train]),
+                            rewards=cols["reward"][:n_train], dones=cols["done"][:n_train])
+    elif algo == "dqn":
+        scaler = MinMaxScaler().fit(states[:n_train])
+        transform = lambda x: scaler.transform(x).astype(np.float32)  # noqa: E731
+        data = CloudDataset(states=transform(states[:n_train]), labels=labels[:n_train])
+    else:
+        max_vals = np.max(states[:n_train], axis=0)
+        transform = lambda x: (np.asarray(x) / max_vals).astype(np.float32)  # noqa: E731
+        data = CloudDataset(states=transform(states[:n_train]), labels=labels[:n_train])
+    return data, transform(states[n_train:]), labels[n_train:]
+
+
+class Objective:
+    """Mean label-shaped reward of the deterministic policy on the held-out rows."""
+
+    def __init__(self, states, labels):
+        valid = labels >= 0
+        if not valid.any():
+            raise ValueError("ERROR: No labelled held-out rows; increase --holdout")
+        self.states, self.labels = states[valid], labels[valid]
+
+    def __call__(self, model):
+        actions, _ = model.predict(self.states, deterministic=True)
+        return float(label_reward(np.asarray(actions).reshape(-1), self.labels).mean())
+
+
+# ---------------- Store ----------------
+
+def trial_dir(store, trial_id):
+    return os.path.join(store, "trials", f"{trial_id:04d}")
+
+
+def read_progress(path):
+    """[(step, score)] from a progress file (a half-written last line is ignored)."""
+    points = []
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    point = json.loads(line)
+                    points.append((point["step"], point["score"]))
+                except (ValueError, KeyError):
+                    pass
+    except FileNotFoundError:
+        pass
+    return points
+
+
+def peer_scores(store, trial_id, step):
+    """Scores other trials reported at `step`."""
+    scores = []
+    trials = os.path.join(store, "trials")
+    for name in os.listdir(trials):
+        if name != f"{trial_id:04d}":
+            scores += [score for s, score in read_progress(os.path.join(trials, name, "progress.jsonl")) if s == step]
+    return scores
+
+
+class EvalCallback(BaseCallback):
+    """Evaluate every `eval_every` steps, log progress, apply the median stopping rule."""
+
+    def __init__(self, objective, progress_path, store, trial_id, eval_every, warmup_evals, min_peers):
+        super().__init__()
+        self.objective = objective
+        self.progress_path = progress_path
+        self.store = store
+        self.trial_id = trial_id
+        self.eval_every = eval_every
+        self.warmup_evals = warmup_evals
+        self.min_peers = min_peers
+        self.evals = 0
+        self.best = -np.inf
+        self.pruned = False
+        self.next_eval = eval_every
+
+    def _on_step(self):
+        if self.num_timesteps < self.next_eval:
+            return True
+        step = self.next_eval
+        self.next_eval += self.eval_every
+        score = self.objective(self.model)
+        self.evals += 1
+        self.best = max(self.best, score)
+        with open(self.progress_path, "a") as f:
+            f.write(json.dumps({"step": step, "score": score}) + "\n")
+
+        if self.evals > self.warmup_evals:
+            peers = peer_scores(self.store, self.trial_id, step)
+            if len(peers) >= self.min_peers and self.best < np.median(peers):
+                self.pruned = True
+                return False  # Stop training this trial
+        return True
+
+
+# ---------------- Trials ----------------
+
+def run_trial(trial_id, params, args):
+    """Train one trial in its own process; returns its result row."""
+    import torch
+    torch.set_num_threads(args.threads_per_trial)
+
+    algo_cls, reward_mode, base, _ = ALGOS[args.algo]
+    folder = trial_dir(args.store, trial_id)
+    progress_path = os.path.join(folder, "progress.jsonl")
+    open(progress_path, "w").close()    # Restarted trials start a fresh curve
+
+    settings = {**base, **params}
+    total_timesteps = int(args.timesteps or settings.pop("total_timesteps"))
+    settings.pop("total_timesteps", None)
+    started = time.time()
+    result = {"trial": trial_id, "status": "failed", "best_score": None, "final_score": None,
+              "timesteps": 0, "seconds": 0.0, **{f"param_{k}": v for k, v in params.items()}}
+    try:
+        data, holdout_states, holdout_labels = prepare(args.algo, args.dataset, args.holdout)
+        objective = Objective(holdout_states, holdout_labels)
+        env = make_vec_env(data, n_envs=args.n_envs, reward_mode=reward_mode, backend="native")
+        model = algo_cls("MlpPolicy", env, verbose=0, seed=args.seed + trial_id, **settings)
+        callback = EvalCallback(objective, progress_path, args.store, trial_id,
+                                args.eval_every or max(total_timesteps // 10, 1), args.warmup_evals, args.min_peers)
+        model.learn(total_timesteps=total_timesteps, callback=callback)
+
+        final = objective(model)
+        result.update(status="pruned" if callback.pruned else "completed", final_score=final,
+                      best_score=max(callback.best, final), timesteps=int(model.num_timesteps))
+        if not callback.pruned:
+            model.save(os.path.join(folder, "model.zip"))
+    except Exception as e:
+        result["error"] = str(e)
+    result["seconds"] = round(time.time() - started, 2)
+    with open(os.path.join(folder, "result.json"), "w") as f:
+        json.dump(result, f, indent=2)
+    return result
+
+
+def load_results(store):
+    rows = []
+    trials = os.path.join(store, "trials")
+    for name in sorted(os.listdir(trials)) if os.path.isdir(trials) else []:
+        path = os.path.join(trials, name, "result.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                rows.append(json.load(f))
+    return rows
+
+
+def finalize(store, keep_models=False):
+    """Write the leaderboard and copy the best completed model to best_model.zip."""
+    rows = load_results(store)
+    if not rows:
+        return None
+    board = pd.DataFrame(rows)
+    board["rank_score"] = board["final_score"].where(board["status"] == "completed")
+    board = board.sort_values("rank_score", ascending=False, na_position="last").drop(columns="rank_score")
+    board.to_csv(os.path.join(store, "results.csv"), index=False)
+
+    completed = board[board["status"] == "completed"]
+    if completed.empty:
+        return None
+    best = completed.iloc[0].to_dict()
+    best_folder = trial_dir(store, int(best["trial"]))
+    shutil.copyfile(os.path.join(best_folder, "model.zip"), os.path.join(store, "best_model.zip"))
+    with open(os.path.join(best_folder, "params.json")) as f:
+        best["params"] = json.load(f)
+    with open(os.path.join(store, "best.json"), "w") as f:
+        json.dump({k: v for k, v in best.items() if not k.startswith("param_")}, f, indent=2, default=str)
+    if not keep_models:
+        for trial in completed["trial"].iloc[1:]:
+            path = os.path.join(trial_dir(store, int(trial)), "model.zip")
+            if os.path.exists(path):
+                os.remove(path)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter sweep for the SB3 training scripts")
+    parser.add_argument("--algo", choices=sorted(ALGOS), required=True)
+    parser.add_argument("--dataset", default="ppo_training_dataset_cleaned_5f.csv")
+    parser.add_argument("--space", default=None, help="Search space JSON (default: built-in space for --algo)")
+    parser.add_argument("--trials", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Trials trained at once")
+    parser.add_argument("--timesteps", type=int, default=0, help="Per trial (default: the script's value)")
+    parser.add_argument("--eval-every", type=int, default=0, help="Timesteps between evaluations (default: 1/10)")
+    parser.add_argument("--warmup-evals", type=int, default=2, help="Evaluations before a trial can be stopped")
+    parser.add_argument("--min-peers", type=int, default=3, help="Other trials needed at a step to stop one")
+    parser.add_argument("--holdout", type=float, default=0.1, help="Fraction of rows kept out of training")
+    parser.add_argument("--n-envs", type=int, default=4, help="Env copies per trial")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--store", default=None, help="Results directory (default: sweeps/<algo>)")
+    parser.add_argument("--keep-models", action="store_true", help="Keep every completed trial's model")
+    args, _ = parser.parse_known_args()  # tolerate notebook kernel arguments
+    args.store = args.store or os.path.join("sweeps", args.algo)
+    args.threads_per_trial = max(1, (os.cpu_count() or 1) // max(1, args.workers))
+
+    space = ALGOS[args.algo][3]
+    if args.space:
+        with open(args.space) as f:
+            space = json.load(f)
+    os.makedirs(os.path.join(args.store, "trials"), exist_ok=True)
+    with open(os.path.join(args.store, "space.json"), "w") as f:
+        json.dump(space, f, indent=2)
+    with open(os.path.join(args.store, "base.json"), "w") as f:
+        json.dump({"algo": args.algo, "base": ALGOS[args.algo][2],
+                   "dataset": os.path.abspath(args.dataset), "holdout": args.holdout, "seed": args.seed}, f, indent=2)
+    load_dataset(args.dataset)  # Convert the CSV once here, not in every trial
+
+    # Same seed -> same trials, so a re-run resumes the unfinished ones
+    rng = np.random.default_rng(args.seed)
+    pending = []
+    for trial_id in range(args.trials):
+        params = sample_params(space, rng)
+        folder = trial_dir(args.store, trial_id)
+        if os.path.exists(os.path.join(folder, "result.json")):
+            continue
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, "params.json"), "w") as f:
+            json.dump(params, f, indent=2)
+        pending.append((trial_id, params))
+
+    print(f"🔎 {args.algo.upper()} sweep: {len(pending)} trial(s) to run ({args.trials - len(pending)} done), "
+          f"{args.workers} at a time")
+    started = time.time()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(run_trial, trial_id, params, args) for trial_id, params in pending]
+        for future in futures:
+            r = future.result()
+            score = "-" if r["final_score"] is None else f"{r['final_score']:.4f}"
+            print(f"{'✅' if r['status'] == 'completed' else '✂️' if r['status'] == 'pruned' else '❌'} "
+                  f"trial {r['trial']}: {r['status']}, score {score}, {r['timesteps']} steps, {r['seconds']}s")
+
+    best = finalize(args.store, args.keep_models)
+    print(f"⏱️ Sweep finished in {time.time() - started:.0f}s; leaderboard in {args.store}/results.csv")
+    if best:
+        print(f"🏆 Best trial {best['trial']}: score {best['final_score']:.4f}, params {best['params']}")
+        print(f"✅ Best model saved as '{os.path.join(args.store, 'best_model.zip')}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""
+Precomputed views of the experiment logs under results/.
+
+app.py renders its pages from these aggregates instead of rescanning the raw
+scheduler logs on every Streamlit rerun. See analytics/aggregates.py (exact,
+in memory) and analytics/rollups.py (streaming, multi-resolution).
+"""
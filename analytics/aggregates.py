@@ -0,0 +1,122 @@
+"""
+Per-Model Log Aggregates
+------------------------
+Purpose:
+    Reduces one scheduler log (TaskID,SelectedCloud,StartTime,EndTime,
+    ExecutionTime,CPUCost,SLADuration,SLAMet) to everything the dashboard
+    pages draw: SLA %, mean cost / execution time, reward proxy, per-batch SLA
+    trend, cloud usage, the SLA-violation heatmap and box-plot statistics.
+
+Usage:
+    from analytics.aggregates import MODEL_LOGS, summarize_log
+    summary = summarize_log("results/ppo_log.csv")
+    summary["sla_pct"], summary["sla_trend"], summary["box"]["CPUCost"]
+
+Notes:
+    - Each aggregate is computed with one vectorized pass over a column, so a
+      summary is small (O(batches + groups)) whatever the log size.
+    - Box statistics use the same linear quartiles and 1.5 x IQR whiskers as
+      Plotly's px.box, so go.Box can draw them without the raw rows.
+    - These are the exact aggregates; analytics/rollups.py summarizes logs
+      with more than EXACT_ROWS rows in one streaming pass instead, and
+      dashboard_summary() there picks between the two.
+    - `path` may also be a run store run directory (analytics/run_store.py).
+    - Caching is left to the caller (app.py keys st.cache_data on file mtime).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+MODEL_LOGS = {
+    "PPO": "ppo_log.csv",
+    "A2C": "A2C_log.csv",
+    "DQN": "dqn_log.csv",
+    "FCFS": "fcfs_log.csv",
+    "Round Robin": "round_robin_log.csv",
+}
+CLOUD_LABELS = {0: "AWS", 1: "Azure", 2: "GCP"}
+LOG_DTYPES = {"TaskID": np.int64, "SelectedCloud": np.int64, "ExecutionTime": np.float64,
+              "CPUCost": np.float64, "SLAMet": str}
+BATCH_SIZE = 10        # tasks per point on the SLA trend line
+HEATMAP_GROUPS = 10    # TaskID bins on the violation heatmap
+
+
+def sla_flags(sla_met):
+    """SLAMet text -> 1.0 / 0.0 (NaN if missing)."""
+    return sla_met.str.strip().str.upper().map({"YES": 1.0, "NO": 0.0})
+
+
+def read_chunks(path, chunk_rows=None):
+    """The dashboard columns of a log CSV (in chunks of chunk_rows) or of a run directory (one per part)."""
+    if os.path.isdir(path):
+        from analytics.run_store import scan_run
+        numeric = {column: dtype for column, dtype in LOG_DTYPES.items() if dtype is not str}
+        return (chunk.astype(numeric) for chunk in scan_run(path, list(LOG_DTYPES)))
+    if chunk_rows is None:
+        return iter([pd.read_csv(path, usecols=list(LOG_DTYPES), dtype=LOG_DTYPES)])
+    return pd.read_csv(path, usecols=list(LOG_DTYPES), dtype=LOG_DTYPES, chunksize=chunk_rows)
+
+
+def read_log(path):
+    """Only the columns the dashboard uses; SLAMet becomes 1.0 / 0.0 (NaN if missing)."""
+    df = pd.concat(read_chunks(path), ignore_index=True)
+    df["SLAMet"] = sla_flags(df["SLAMet"])
+    return df
+
+
+def box_stats(values):
+    """Quartiles, 1.5 x IQR whisker ends and mean for one column."""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return {"q1": np.nan, "median": np.nan, "q3": np.nan, "lowerfence": np.nan,
+                "upperfence": np.nan, "mean": np.nan, "count": 0}
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    return {"q1": q1, "median": median, "q3": q3, "lowerfence": inside.min(),
+            "upperfence": inside.max(), "mean": values.mean(), "count": int(values.size)}
+
+
+def sla_trend(sla_met, batch_size=BATCH_SIZE):
+    """SLA % per consecutive batch of `batch_size` tasks (row order)."""
+    sla_met = np.asarray(sla_met, dtype=np.float64)
+    batch = np.arange(len(sla_met)) // batch_size
+    counts = np.bincount(batch)
+    pct = np.bincount(batch, weights=sla_met) / np.maximum(counts, 1) * 100
+    return pd.DataFrame({"Batch": np.arange(len(counts)), "SLAMet": pct})
+
+
+def violation_heatmap(df, groups=HEATMAP_GROUPS):
+    """% SLA violations per cloud (rows) and TaskID group (columns); rows without SLAMet are skipped."""
+    task_group = pd.cut(df["TaskID"], bins=groups, labels=[f"G{i}" for i in range(1, groups + 1)])
+    cloud = df["SelectedCloud"].map(CLOUD_LABELS).rename("Cloud")
+    met = df["SLAMet"].groupby([cloud, task_group.rename("TaskGroup")], observed=True).mean()
+    return (100 - met * 100).unstack("TaskGroup")
+
+
+def summarize(df):
+    """All dashboard aggregates for one log already loaded with read_log()."""
+    sla = df["SLAMet"].eq(1.0).astype(np.float64)  # a missing SLAMet counts as a miss
+    clouds = df["SelectedCloud"].map(CLOUD_LABELS).value_counts()
+    return {
+        "rows": len(df),
+        "sla_pct": sla.mean() * 100,
+        "mean_cost": df["CPUCost"].mean(),
+        "mean_exec_time": df["ExecutionTime"].mean(),
+        "reward_score": (sla - 0.1 * df["CPUCost"]).mean(),  # SLA hit minus cost penalty
+        "sla_trend": sla_trend(sla.to_numpy()),
+        "cloud_usage": pd.DataFrame({"Cloud": clouds.index, "Count": clouds.to_numpy()}),
+        "violation_heatmap": violation_heatmap(df),
+        "box": {col: box_stats(df[col].to_numpy()) for col in ("ExecutionTime", "CPUCost")},
+    }
+
+
+def summarize_log(path):
+    return summarize(read_log(path))
+
+
+def log_paths(base_path="results"):
+    return {model: os.path.join(base_path, name) for model, name in MODEL_LOGS.items()}
@@ -0,0 +1,473 @@
+"""
+Multi-Resolution Log Rollups
+----------------------------
+Purpose:
+    Streams a scheduler log (TaskID,SelectedCloud,...,SLAMet) once, in chunks,
+    into fixed-size aggregates the dashboard can draw at any zoom level: the
+    SLA trend at several resolutions, per-cloud / TaskID-group violation
+    counts, quantile sketches for the box plots and the scalar summary. Memory
+    and chart payloads stay bounded however many rows the log has.
+
+Structures:
+    BinCounts        counts per fixed-width position bin (row index for the
+                     trend, TaskID for the heatmap). When a log outgrows
+                     `max_bins` bins, neighbouring bins are merged and the width
+                     doubles, so the finest level is always <= max_bins bins
+                     and every coarser level (width * 2^k) is a cheap sum.
+    QuantileSketch   log-spaced buckets with relative accuracy `alpha`
+                     (DDSketch style): any quantile within alpha of the true
+                     value, mergeable, a few hundred buckets for costs / times.
+
+    batch_met        SLA hits per BATCH_SIZE-task batch, one byte each (the
+                     finest trend level, kept for zooming in).
+
+Zoom:
+    sla_trend(start, end, max_points) picks the finest level that shows the
+    task range [start, end) in at most max_points points: the coarse bins
+    for wide ranges, sums of batch_met for windows narrower than
+    max_points coarse bins, down to single BATCH_SIZE-task batches. Either
+    way a view reads O(max_points) coarse bins or O(max_points x coarse
+    width / BATCH_SIZE) bytes, never the whole log.
+
+Usage:
+    from analytics.rollups import load_rollup
+    rollup = load_rollup("results/ppo_log.csv")          # cached next to the log when fresh
+    rollup.summary()                                     # same keys as aggregates.summarize
+    dashboard_summary("results/ppo_log.csv")             # exact for small logs, rollup for large ones
+    rollup.sla_trend(0, 2_000_000, max_points=500)
+    load_rollup(RunStore().latest(model="ppo")["path"])   # a run store run (analytics/run_store.py)
+    python -m analytics.rollups results/*_log.csv        # precompute the .rollup.npz caches
+
+Notes:
+    - Counts, means (over non-missing values, like pandas) and SLA % are
+      exact. Box statistics are within the sketch accuracy (exact values
+      when a bucket only ever saw one value, e.g. whole-second times);
+      heatmap groups are exact until the TaskID range outgrows HEAT_BINS.
+    - dashboard_summary() uses analytics/aggregates.py's exact in-memory
+      aggregates for logs up to EXACT_ROWS rows and the rollup beyond.
+"""
+
+import json
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from analytics.aggregates import (BATCH_SIZE, CLOUD_LABELS, HEATMAP_GROUPS, read_chunks, sla_flags,  # noqa: E402
+                                  summarize_log)
+from analytics.run_store import RUN_FILE  # noqa: E402
+
+MAX_BINS = 4096         # Finest-level bins kept per BinCounts
+HEAT_BINS = 65536       # TaskID bins for the heatmap (exact groups up to this TaskID range)
+MAX_POINTS = 1000       # Default points per trend view
+CHUNK_ROWS = 1_000_000
+EXACT_ROWS = 200_000    # dashboard_summary: logs up to this size use the exact aggregates
+ALPHA = 0.005           # Sketch relative accuracy
+ROLLUP_SUFFIX = ".rollup.npz"
+RUN_ROLLUP = "run" + ROLLUP_SUFFIX  # Inside a run store run directory
+FORMAT_VERSION = 2
+N_CLOUDS = len(CLOUD_LABELS)
+BOX_COLUMNS = ("ExecutionTime", "CPUCost")
+
+
+class BinCounts:
+    """Per-bin sums of `columns` values from `origin` on, coarsening to stay within max_bins.
+
+    Positions below the origin prepend bins (moving the origin left by whole
+    bin widths) instead of being clamped into the first bin.
+    """
+
+    def __init__(self, width, columns, max_bins=MAX_BINS, origin=0):
+        self.width = int(width)
+        self.origin = origin
+        self.max_bins = max_bins
+        self.counts = np.zeros((0, columns))
+
+    def add(self, positions, values):
+        positions = np.asarray(positions)
+        if positions.size == 0:
+            return
+        lowest = positions.min()
+        if lowest < self.origin:
+            shift = int(-((lowest - self.origin) // self.width))
+            self.counts = np.vstack([np.zeros((shift, self.counts.shape[1])), self.counts])
+            self.origin -= shift * self.width
+        bins = ((positions - self.origin) // self.width).astype(np.int64)
+        while max(int(bins.max()) + 1, len(self.counts)) > self.max_bins:
+            self._coarsen()
+            bins //= 2
+        needed = int(bins.max()) + 1
+        if needed > len(self.counts):
+            self.counts = np.vstack([self.counts, np.zeros((needed - len(self.counts), self.counts.shape[1]))])
+        for column in range(self.counts.shape[1]):
+            self.counts[:needed, column] += np.bincount(bins, weights=values[:, column], minlength=needed)
+
+    def _coarsen(self):
+        if len(self.counts) % 2:
+            self.counts = np.vstack([self.counts, np.zeros((1, self.counts.shape[1]))])
+        self.counts = self.counts.reshape(-1, 2, self.counts.shape[1]).sum(axis=1)
+        self.width *= 2
+
+    def level(self, k):
+        """(bin width, counts) with 2^k finest bins merged per bin."""
+        factor = 1 << k
+        counts = self.counts
+        if len(counts) % factor:
+            counts = np.vstack([counts, np.zeros((factor - len(counts) % factor, counts.shape[1]))])
+        return self.width * factor, counts.reshape(-1, factor, counts.shape[1]).sum(axis=1)
+
+    def view(self, start=None, end=None, max_points=MAX_POINTS):
+        """(bin start positions, counts) over [start, end) with at most max_points bins."""
+        start = self.origin if start is None else max(start, self.origin)
+        end = self.origin + len(self.counts) * self.width if end is None else end
+        span_bins = max(1, math.ceil((end - start) / self.width))
+        k = max(0, math.ceil(math.log2(span_bins / max(1, max_points)))) if span_bins > max_points else 0
+        while True:             # Alignment can add one bin at each end
+            width, counts = self.level(k)
+            first = int((start - self.origin) // width)
+            last = int(math.ceil((end - self.origin) / width))
+            if last - first <= max_points or first >= last - 1:
+                break
+            k += 1
+        first, last = max(first, 0), min(last, len(counts))
+        return self.origin + np.arange(first, last) * width, counts[first:last], width
+
+
+class QuantileSketch:
+    """Log-bucketed sketch of a value stream with relative accuracy alpha."""
+
+    def __init__(self, alpha=ALPHA):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = {}      # bucket index -> [count, smallest, largest value seen in it]
+        self.negative = {}      # same for -value
+        self.zeros = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _merge_counts(self, buckets, values):
+        keys = np.ceil(np.log(values) / self.log_gamma).astype(np.int64)
+        order = np.argsort(keys, kind="stable")
+        keys, values = keys[order], values[order]
+        keys, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+        lows, highs = np.minimum.reduceat(values, starts), np.maximum.reduceat(values, starts)
+        for key, count, low, high in zip(keys.tolist(), counts.tolist(), lows.tolist(), highs.tolist()):
+            if key in buckets:
+                bucket = buckets[key]
+                bucket[0] += count
+                bucket[1], bucket[2] = min(bucket[1], low), max(bucket[2], high)
+            else:
+                buckets[key] = [count, low, high]
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.count += int(values.size)
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.zeros += int(np.count_nonzero(values == 0))
+        if (values > 0).any():
+            self._merge_counts(self.positive, values[values > 0])
+        if (values < 0).any():
+            self._merge_counts(self.negative, -values[values < 0])
+
+    def _value(self, key, low, high):
+        """Bucket midpoint (relative error <= alpha), clamped to the values seen (exact for one value)."""
+        return min(max(2 * self.gamma ** key / (self.gamma + 1), low), high)
+
+    def _ordered(self):
+        """(representative value, count, smallest, largest) per bucket, from the smallest value up."""
+        for key in sorted(self.negative, reverse=True):
+            count, low, high = self.negative[key]
+            yield -self._value(key, low, high), count, -high, -low
+        if self.zeros:
+            yield 0.0, self.zeros, 0.0, 0.0
+        for key in sorted(self.positive):
+            count, low, high = self.positive[key]
+            yield self._value(key, low, high), count, low, high
+
+    def quantiles(self, qs):
+        """Values at the given quantiles (linear ranks like np.percentile), clipped to [min, max]."""
+        ranks = sorted((q * (self.count - 1), i) for i, q in enumerate(qs))
+        out = [math.nan] * len(qs)
+        seen = 0
+        pending = iter(ranks)
+        rank = next(pending, None)
+        for value, count, _, _ in self._ordered():
+            seen += count
+            while rank is not None and rank[0] < seen:
+                out[rank[1]] = min(max(value, self.min), self.max)
+                rank = next(pending, None)
+        return out
+
+    def box(self):
+        """Same keys as aggregates.box_stats: quartiles, 1.5 x IQR whisker ends, mean, count."""
+        if self.count == 0:
+            return {"q1": np.nan, "median": np.nan, "q3": np.nan, "lowerfence": np.nan,
+                    "upperfence": np.nan, "mean": np.nan, "count": 0}
+        q1, median, q3 = self.quantiles([0.25, 0.5, 0.75])
+        low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        ends = []           # Whisker candidates: exact bounds of buckets within the fences,
+        for value, _, smallest, largest in self._ordered():     # the clamped midpoint of one straddling them
+            if largest < low or smallest > high:
+                continue
+            ends.append(smallest if smallest >= low else min(max(value, low), largest))
+            ends.append(largest if largest <= high else max(min(value, high), smallest))
+        lower = min(ends) if ends else self.min
+        upper = max(ends) if ends else self.max
+        return {"q1": q1, "median": median, "q3": q3, "lowerfence": lower, "upperfence": upper,
+                "mean": self.sum / self.count, "count": self.count}
+
+    def to_arrays(self, prefix):
+        arrays = {f"{prefix}_stats": np.array([self.zeros, self.count, self.sum, self.min, self.max, self.alpha])}
+        for sign, buckets in (("pos", self.positive), ("neg", self.negative)):
+            keys = sorted(buckets)
+            arrays[f"{prefix}_{sign}_keys"] = np.array(keys, dtype=np.int64)
+            arrays[f"{prefix}_{sign}_buckets"] = np.array([buckets[k] for k in keys], dtype=np.float64).reshape(-1, 3)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        zeros, count, total, low, high, alpha = arrays[f"{prefix}_stats"]
+        sketch = cls(float(alpha))
+        for sign, buckets in (("pos", sketch.positive), ("neg", sketch.negative)):
+            for key, (n, smallest, largest) in zip(arrays[f"{prefix}_{sign}_keys"].tolist(),
+                                                   arrays[f"{prefix}_{sign}_buckets"].tolist()):
+                buckets[key] = [int(n), smallest, largest]
+        sketch.zeros, sketch.count = int(zeros), int(count)
+        sketch.sum, sketch.min, sketch.max = float(total), float(low), float(high)
+        return sketch
+
+
+def prepare_chunk(df):
+    """read_log's conversion for one chunk: SLAMet -> 1.0 / 0.0 (NaN if missing)."""
+    df["SLAMet"] = sla_flags(df["SLAMet"])
+    return df
+
+
+class LogRollup:
+    def __init__(self, batch_size=BATCH_SIZE, max_bins=MAX_BINS, alpha=ALPHA):
+        self.batch_size = batch_size
+        self.rows = 0
+        self.sla_met = 0.0
+        self.cost_sum = 0.0
+        self.cost_rows = 0              # Rows with a CPUCost (means skip NaN, like pandas)
+        self.exec_sum = 0.0
+        self.exec_rows = 0
+        self.reward_sum = 0.0           # SLA hit minus cost penalty, over rows with a CPUCost
+        self.cloud_counts = np.zeros(N_CLOUDS, dtype=np.int64)
+        self.task_min = math.inf
+        self.task_max = -math.inf
+        self.trend = BinCounts(batch_size, 2, max_bins)                 # [met, tasks] per row batch
+        self.batch_met = np.zeros(0, dtype=np.uint8)                    # SLA hits per batch_size rows
+        self.heat = None                                                # [met, known] per cloud, per TaskID bin
+        self.max_bins = max_bins
+        self.sketches = {column: QuantileSketch(alpha) for column in BOX_COLUMNS}
+
+    def add(self, df):
+        """Fold one chunk (columns as in aggregates.read_log) into the rollup."""
+        n = len(df)
+        if n == 0:
+            return
+        known = df["SLAMet"].notna().to_numpy()
+        met = df["SLAMet"].eq(1.0).to_numpy(np.float64)   # a missing SLAMet counts as a miss
+        clouds = df["SelectedCloud"].to_numpy(np.int64)
+        task_ids = df["TaskID"].to_numpy(np.int64)
+        cost = df["CPUCost"].to_numpy(np.float64)
+        exec_time = df["ExecutionTime"].to_numpy(np.float64)
+        has_cost = ~np.isnan(cost)
+        self.sla_met += met.sum()
+        self.cost_sum += float(cost[has_cost].sum())
+        self.cost_rows += int(has_cost.sum())
+        self.exec_sum += float(np.nansum(exec_time))
+        self.exec_rows += int(np.count_nonzero(~np.isnan(exec_time)))
+        self.reward_sum += float((met[has_cost] - 0.1 * cost[has_cost]).sum())
+        valid_cloud = (clouds >= 0) & (clouds < N_CLOUDS)
+        self.cloud_counts += np.bincount(clouds[valid_cloud], minlength=N_CLOUDS)
+        self.task_min = min(self.task_min, int(task_ids.min()))
+        self.task_max = max(self.task_max, int(task_ids.max()))
+
+        positions = self.rows + np.arange(n)
+        self.trend.add(positions, np.column_stack([met, np.ones(n)]))
+        self._add_batches(positions // self.batch_size, met)
+        if self.heat is None:
+            self.heat = BinCounts(1, 2 * N_CLOUDS, HEAT_BINS, origin=int(task_ids.min()))
+        values = np.zeros((n, 2 * N_CLOUDS))
+        rows = np.flatnonzero(valid_cloud & known)
+        values[rows, clouds[rows]] = met[rows]
+        values[rows, N_CLOUDS + clouds[rows]] = 1.0
+        self.heat.add(task_ids, values)
+        for column, sketch in self.sketches.items():
+            sketch.add(df[column].to_numpy(np.float64))
+        self.rows += n
+
+    def _add_batches(self, batches, met):
+        needed = int(batches[-1]) + 1
+        if needed > len(self.batch_met):   # Grow by doubling: amortized O(1) per batch
+            grown = np.zeros(max(needed, 2 * len(self.batch_met)), dtype=np.uint8)
+            grown[:len(self.batch_met)] = self.batch_met
+            self.batch_met = grown
+        first = int(batches[0])
+        self.batch_met[first:needed] += np.bincount(batches - first, weights=met).astype(np.uint8)
+
+    def _batch_view(self, start, end, max_points):
+        """Like BinCounts.view, summed from batch_met (for windows the coarse bins are too wide for)."""
+        n_batches = -(-self.rows // self.batch_size)
+        first, last = max(0, start // self.batch_size), min(n_batches, -(-end // self.batch_size))
+        factor = 1
+        while -(-(last - first + first % factor) // factor) > max_points and factor < n_batches:
+            factor *= 2
+        first -= first % factor
+        met = self.batch_met[first:last].astype(np.int64)
+        tasks = np.full(len(met), self.batch_size, dtype=np.int64)
+        if last == n_batches and self.rows % self.batch_size:
+            tasks[-1] = self.rows % self.batch_size     # Trailing partial batch
+        pad = -len(met) % factor
+        met, tasks = np.pad(met, (0, pad)), np.pad(tasks, (0, pad))
+        counts = np.column_stack([met.reshape(-1, factor).sum(axis=1), tasks.reshape(-1, factor).sum(axis=1)])
+        width = self.batch_size * factor
+        return first * self.batch_size + np.arange(len(counts)) * width, counts, width
+
+    # ---- views ----
+    def sla_trend(self, start=None, end=None, max_points=MAX_POINTS):
+        """SLA % per point over tasks [start, end) (row order), at most max_points points."""
+        start = 0 if start is None else max(0, int(start))
+        end = self.rows if end is None else min(self.rows, int(end))
+        if end - start <= max_points * self.trend.width // 2 and self.trend.width > self.batch_size:
+            first, counts, width = self._batch_view(start, end, max_points)
+        else:
+            first, counts, width = self.trend.view(start, end, max_points)
+        pct = counts[:, 0] / np.maximum(counts[:, 1], 1) * 100
+        keep = counts[:, 1] > 0
+        return pd.DataFrame({"Task": first[keep], "Tasks": counts[keep, 1].astype(np.int64),
+                             "Batch": first[keep] // self.batch_size, "SLAMet": pct[keep]})
+
+    def violation_heatmap(self, groups=HEATMAP_GROUPS):
+        """% SLA violations per cloud (rows) and TaskID group (columns), like aggregates.violation_heatmap."""
+        labels = [f"G{i}" for i in range(1, groups + 1)]
+        if self.heat is None or not len(self.heat.counts):
+            return pd.DataFrame(columns=labels)
+        counts = self.heat.counts
+        # pd.cut's equal-width, right-closed edges; exact while a bin is one TaskID wide
+        positions = self.heat.origin + np.arange(len(counts)) * self.heat.width + (self.heat.width - 1) / 2
+        edges = np.linspace(self.task_min, self.task_max, groups + 1)
+        edges[0] -= max(self.task_max - self.task_min, 1) * 0.001
+        group = np.clip(np.searchsorted(edges, positions, side="left") - 1, 0, groups - 1)
+        met = np.zeros((groups, N_CLOUDS))
+        known = np.zeros((groups, N_CLOUDS))
+        np.add.at(met, group, counts[:, :N_CLOUDS])
+        np.add.at(known, group, counts[:, N_CLOUDS:])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            pct = 100 - met / known * 100
+        frame = pd.DataFrame(pct.T, index=[CLOUD_LABELS[c] for c in range(N_CLOUDS)], columns=labels)
+        frame.index.name, frame.columns.name = "Cloud", "TaskGroup"
+        return frame[known.sum(axis=0) > 0]      # Only clouds that were used, like the groupby version
+
+    def summary(self, max_points=MAX_POINTS):
+        """Everything app.py draws, with the same keys as aggregates.summarize (plus the rollup itself)."""
+        n = max(self.rows, 1)
+        used = np.argsort(-self.cloud_counts, kind="stable")
+        used = used[self.cloud_counts[used] > 0]        # Most used first, like value_counts()
+        return {
+            "rows": self.rows,
+            "sla_pct": self.sla_met / n * 100,
+            "mean_cost": self.cost_sum / self.cost_rows if self.cost_rows else np.nan,
+            "mean_exec_time": self.exec_sum / self.exec_rows if self.exec_rows else np.nan,
+            "reward_score": self.reward_sum / self.cost_rows if self.cost_rows else np.nan,
+            "sla_trend": self.sla_trend(max_points=max_points),
+            "cloud_usage": pd.DataFrame({"Cloud": [CLOUD_LABELS[c] for c in used],
+                                         "Count": self.cloud_counts[used]}),
+            "violation_heatmap": self.violation_heatmap(),
+            "box": {column: sketch.box() for column, sketch in self.sketches.items()},
+            "rollup": self,
+        }
+
+    # ---- persistence ----
+    def save(self, path):
+        arrays = {"trend": self.trend.counts, "batch_met": self.batch_met[:-(-self.rows // self.batch_size)],
+                  "heat": self.heat.counts if self.heat is not None else np.zeros((0, 2 * N_CLOUDS))}
+        for column, sketch in self.sketches.items():
+            arrays.update(sketch.to_arrays(column))
+        meta = {"version": FORMAT_VERSION, "rows": self.rows, "sla_met": self.sla_met, "cost_sum": self.cost_sum,
+                "cost_rows": self.cost_rows, "exec_sum": self.exec_sum, "exec_rows": self.exec_rows,
+                "reward_sum": self.reward_sum, "cloud_counts": self.cloud_counts.tolist(),
+                "task_min": self.task_min, "task_max": self.task_max, "max_bins": self.max_bins,
+                "batch_size": self.batch_size, "trend_width": self.trend.width,
+                "heat_width": self.heat.width if self.heat is not None else 1,
+                "heat_origin": self.heat.origin if self.heat is not None else 0}
+        with open(path, "wb") as f:
+            np.savez_compressed(f, meta=np.array(json.dumps(meta)), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta["version"] != FORMAT_VERSION:
+                raise ValueError(f"rollup format {meta['version']} != {FORMAT_VERSION}")
+            rollup = cls(meta["batch_size"], meta["max_bins"])
+            for key in ("rows", "sla_met", "cost_sum", "cost_rows", "exec_sum", "exec_rows", "reward_sum",
+                        "task_min", "task_max"):
+                setattr(rollup, key, meta[key])
+            rollup.cloud_counts = np.array(meta["cloud_counts"], dtype=np.int64)
+            rollup.trend.counts, rollup.trend.width = data["trend"], meta["trend_width"]
+            rollup.batch_met = data["batch_met"]
+            if rollup.rows:
+                rollup.heat = BinCounts(meta["heat_width"], 2 * N_CLOUDS, HEAT_BINS, meta["heat_origin"])
+                rollup.heat.counts = data["heat"]
+            rollup.sketches = {column: QuantileSketch.from_arrays(data, column) for column in BOX_COLUMNS}
+        return rollup
+
+
+def build_rollup(path, chunk_rows=CHUNK_ROWS):
+    """One streaming pass over a log CSV or a run store run directory (only the columns it needs)."""
+    rollup = LogRollup()
+    for chunk in read_chunks(path, chunk_rows):
+        rollup.add(prepare_chunk(chunk))
+    return rollup
+
+
+def load_rollup(path, cache=True):
+    """Rollup of a log, from <log>.rollup.npz (<run>/rollup.npz for a run) when newer than the log."""
+    if os.path.isdir(path):
+        cache_path, source = os.path.join(path, RUN_ROLLUP), os.path.join(path, RUN_FILE)
+    else:
+        cache_path, source = path + ROLLUP_SUFFIX, path
+    if cache and os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(source):
+        try:
+            return LogRollup.load(cache_path)
+        except (ValueError, KeyError, OSError):
+            pass                    # Stale format or broken file: rebuild
+    rollup = build_rollup(path)
+    if cache:
+        try:
+            rollup.save(cache_path)
+        except OSError:
+            pass                    # Read-only results directory: serve from memory
+    return rollup
+
+
+def dashboard_summary(path, exact_rows=EXACT_ROWS):
+    """What app.py draws: exact aggregates for logs up to exact_rows rows, the rollup's beyond.
+
+    Either way the result carries the rollup under "rollup" for the zoomable SLA trend.
+    """
+    rollup = load_rollup(path)
+    if rollup.rows > exact_rows:
+        return rollup.summary()
+    return dict(summarize_log(path), rollup=rollup)
+
+
+if __name__ == "__main__":
+    for log_path in sys.argv[1:]:
+        built = load_rollup(log_path)
+        print(f"✅ {log_path}: {built.rows} rows -> {log_path + ROLLUP_SUFFIX} "
+              f"(trend bins of {built.trend.width} tasks)")
@@ -0,0 +1,422 @@
+"""
+Partitioned Run Store
+---------------------
+Purpose:
+    Keeps every scheduler run (simulation, evaluation or an imported legacy
+    CSV) instead of overwriting results/<model>_log.csv. Each run is a
+    directory of compressed per-column files, partitioned by model, model
+    version, seed and date, so a query opens only the partitions and
+    columns it asks for.
+
+Layout (root, default results/runs):
+    model=ppo/version=ppo_v2-1a2b3c4d/seed=0/date=2026-10-17/run=20261017T101500-9f3a2c/
+        run.json                    keys, row count, column types, meta, per-part stats
+        part-000000/TaskID.npz      one compressed array per column and part
+        part-000000/SLAMet.npz      strings are stored as codes + categories
+        ...
+
+Pruning:
+    - Partition keys (model, version, seed, since / until dates, run_id)
+      are matched against directory names while walking the tree; other
+      partitions are never opened.
+    - Row filters such as ("TaskID", ">=", 1000) or ("SLAMet", "==", "NO")
+      skip whole parts whose min / max (or categories) in run.json cannot
+      match, then read only the filter and requested columns of the rest.
+      Missing values (NaN) never match a filter.
+
+Usage:
+    from analytics.run_store import RunStore
+    store = RunStore("results/runs")
+    df = store.read(["SLAMet", "CPUCost"], model="ppo", since="7d")       # PPO runs from last week
+    df = store.read(["TaskID", "CPUCost"], model="ppo", filters=[("SLAMet", "==", "NO")])
+    store.latest(model="ppo")                                            # newest run's metadata
+    python -m simulation.simulate --policy ppo --tasks 100000 --store results/runs
+    python -m analytics.run_store import results                         # legacy *_log.csv files
+    python -m analytics.run_store ls --model ppo --since 7d
+    python -m analytics.run_store query --model ppo --columns SLAMet,CPUCost --where "TaskID>=100"
+
+Notes:
+    - Runs are written to a hidden temporary directory and renamed into place
+      when complete, so readers never see a half-written run and concurrent
+      writers (evaluate's worker processes) need no locking.
+    - Runs are immutable; the dashboard caches its rollup inside the run directory
+      (run.rollup.npz).
+    - Dates are local calendar dates of when the run was written (the file's
+      modification date for imported CSVs).
+    - Directories that do not look like partitions (stray files, malformed
+      dates, runs without a readable run.json) are skipped, not errors.
+    - results/runs/ is in .gitignore, like results/evaluation/.
+"""
+
+import argparse
+import datetime as dt
+import json
+import operator
+import os
+import re
+import shutil
+import sys
+import uuid
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from analytics.aggregates import MODEL_LOGS  # noqa: E402
+
+DEFAULT_ROOT = os.path.join("results", "runs")
+PARTITION_KEYS = ("model", "version", "seed", "date")
+RUN_FILE = "run.json"
+PART_FORMAT = "part-{:06d}"
+FORMAT_VERSION = 1
+# Dashboard model name -> store model key (simulation policy labels)
+STORE_MODELS = {"PPO": "ppo", "A2C": "a2c", "DQN": "dqn", "FCFS": "fcfs", "Round Robin": "rr"}
+LEGACY_VERSION = "legacy"
+NO_SEED = "none"
+OPERATORS = {
+    "==": operator.eq, "!=": operator.ne, "<": operator.lt, "<=": operator.le,
+    ">": operator.gt, ">=": operator.ge,
+}
+
+
+def partition_value(value):
+    """Directory-safe text for a partition key value."""
+    text = NO_SEED if value is None else str(value)
+    return re.sub(r"[^A-Za-z0-9._+-]", "-", text) or "-"
+
+
+def as_date(value):
+    """date from a date/datetime, 'YYYY-MM-DD', '<n>d' (n days ago), int days ago or a timedelta."""
+    if value is None or isinstance(value, dt.date) and not isinstance(value, dt.datetime):
+        return value
+    if isinstance(value, dt.datetime):
+        return value.date()
+    if isinstance(value, dt.timedelta):
+        return dt.date.today() - value
+    if isinstance(value, int):
+        return dt.date.today() - dt.timedelta(days=value)
+    text = str(value).strip()
+    if text.endswith("d") and text[:-1].isdigit():
+        return dt.date.today() - dt.timedelta(days=int(text[:-1]))
+    return dt.date.fromisoformat(text)
+
+
+def _accepts(wanted):
+    """Matcher for one partition key: None = any, else a value or a collection of values."""
+    if wanted is None:
+        return lambda value: True
+    if isinstance(wanted, (list, tuple, set, frozenset)):
+        allowed = {partition_value(item) for item in wanted}
+    else:
+        allowed = {partition_value(wanted)}
+    return lambda value: value in allowed
+
+
+def _parse_where(text):
+    """'TaskID>=100' -> ("TaskID", ">=", 100.0); values that are not numbers stay strings."""
+    match = re.fullmatch(r"\s*(\w+)\s*(==|!=|<=|>=|<|>)\s*(.+?)\s*", text)
+    if not match:
+        raise ValueError(f"❌ Bad filter '{text}' (expected COLUMN OP VALUE, e.g. TaskID>=100)")
+    column, op, value = match.groups()
+    try:
+        value = float(value)
+    except ValueError:
+        pass
+    return column, op, value
+
+
+# ---- writing ----
+def _save_column(path, series):
+    """One column of one part -> .npz; returns its stats (min / max, or categories) for pruning."""
+    if series.dtype == object or isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(series):
+        codes, categories = pd.factorize(series, sort=True)
+        categories = np.asarray(categories, dtype=str)
+        dtype = np.int8 if len(categories) < 127 else np.int32
+        np.savez_compressed(path, codes=codes.astype(dtype), categories=categories)
+        return "category", {"categories": categories.tolist()}
+    values = series.to_numpy()
+    np.savez_compressed(path, values=values)
+    finite = values[~np.isnan(values)] if values.dtype.kind == "f" else values
+    if finite.size == 0:
+        return values.dtype.str, {}
+    return values.dtype.str, {"min": finite.min().item(), "max": finite.max().item()}
+
+
+class RunWriter:
+    """Appends DataFrame chunks to one new run; use as a context manager (published on clean exit)."""
+
+    def __init__(self, root, model, version=LEGACY_VERSION, seed=None, date=None, run_id=None, meta=None):
+        created = dt.datetime.now()
+        self.keys = {"model": partition_value(model), "version": partition_value(version),
+                     "seed": partition_value(seed), "date": (as_date(date) or created.date()).isoformat()}
+        self.run_id = run_id or f"{created:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+        parent = os.path.join(root, *(f"{key}={self.keys[key]}" for key in PARTITION_KEYS))
+        self.path = os.path.join(parent, f"run={self.run_id}")
+        self.tmp_path = os.path.join(parent, f".run={self.run_id}.tmp")
+        self.info = {"format": FORMAT_VERSION, "run_id": self.run_id, **self.keys,
+                     "created": created.isoformat(), "rows": 0, "columns": {},
+                     "parts": [], "meta": dict(meta or {})}
+        os.makedirs(self.tmp_path)
+
+    def append(self, df):
+        """Write one chunk as the next part."""
+        if len(df) == 0:
+            return
+        name = PART_FORMAT.format(len(self.info["parts"]))
+        os.makedirs(os.path.join(self.tmp_path, name))
+        stats = {}
+        for column in df.columns:
+            known = self.info["columns"].get(column)
+            series = df[column]
+            if known == "category" and series.isna().all():
+                series = series.astype(object)      # read_csv gives float for an all-empty text chunk
+            dtype, stats[column] = _save_column(os.path.join(self.tmp_path, name, f"{column}.npz"), series)
+            if known not in (None, dtype) and "category" in (known, dtype):
+                raise ValueError(f"❌ Column {column} changed type from {known} to {dtype} between chunks")
+            if known is None or known != "category" and np.dtype(dtype).kind == "f":
+                self.info["columns"][column] = dtype     # int chunks followed by float (NaN) ones widen
+        self.info["parts"].append({"name": name, "rows": len(df), "stats": stats})
+        self.info["rows"] += len(df)
+
+    def close(self):
+        """Publish the run (atomic rename) and return its metadata."""
+        with open(os.path.join(self.tmp_path, RUN_FILE), "w") as f:
+            json.dump(self.info, f, indent=2)
+        os.rename(self.tmp_path, self.path)
+        return dict(self.info, path=self.path)
+
+    def abort(self):
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+# ---- reading ----
+def _load_column(path, dtype):
+    with np.load(path) as data:
+        if "codes" not in data:
+            return data["values"]
+        codes, categories = data["codes"], data["categories"].astype(object)
+    values = np.empty(len(codes), dtype=object)
+    values[:] = np.nan                      # Missing strings come back as NaN, like read_csv
+    present = codes >= 0
+    values[present] = categories[codes[present]]
+    return values
+
+
+def _may_match(stats, op, value):
+    """False only when a part's stats prove no row can satisfy `column op value`."""
+    if "categories" in stats:
+        if not isinstance(value, str):
+            return True
+        categories = stats["categories"]
+        if op == "==":
+            return value in categories
+        if op == "!=":
+            return categories != [value]
+        return True
+    if "min" not in stats:
+        return False                        # All missing: missing values never match
+    if isinstance(value, str):
+        return True
+    low, high = stats["min"], stats["max"]
+    return {"==": low <= value <= high, "!=": not low == high == value, "<": low < value,
+            "<=": low <= value, ">": high > value, ">=": high >= value}[op]
+
+
+def scan_run(run, columns=None, filters=()):
+    """DataFrames of one run (metadata dict or run directory), one per part that may match the filters."""
+    if isinstance(run, str):
+        run = load_run_info(run)
+    types = run["columns"]
+    wanted = list(types) if columns is None else list(columns)
+    missing = [column for column in wanted + [f[0] for f in filters] if column not in types]
+    if missing:
+        raise KeyError(f"❌ Run {run['run_id']} has no column(s) {missing}")
+    needed = list(dict.fromkeys(wanted + [f[0] for f in filters]))
+    for part in run["parts"]:
+        if not all(_may_match(part["stats"].get(column, {}), op, value) for column, op, value in filters):
+            continue                        # Pruned by min / max or categories
+        folder = os.path.join(run["path"], part["name"])
+        data = {column: _load_column(os.path.join(folder, f"{column}.npz"), types[column]) for column in needed}
+        frame = pd.DataFrame(data, columns=needed)
+        if filters:
+            mask = np.ones(len(frame), dtype=bool)
+            for column, op, value in filters:
+                values = frame[column]
+                try:
+                    mask &= OPERATORS[op](values, value).to_numpy(dtype=bool) & values.notna().to_numpy()
+                except TypeError:           # e.g. a number compared with text: no row matches
+                    mask[:] = False
+            frame = frame[mask].reset_index(drop=True)
+            if not len(frame):
+                continue
+        yield frame[wanted]
+
+
+def load_run_info(path):
+    with open(os.path.join(path, RUN_FILE)) as f:
+        return dict(json.load(f), path=path)
+
+
+class RunStore:
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+
+    def writer(self, model, version=LEGACY_VERSION, seed=None, date=None, run_id=None, meta=None):
+        """RunWriter for a new run (see RunWriter)."""
+        return RunWriter(self.root, model, version, seed, date, run_id, meta)
+
+    def write_run(self, frames, model, version=LEGACY_VERSION, seed=None, date=None, meta=None):
+        """Write a DataFrame or an iterable of chunks as one run; returns its metadata."""
+        writer = self.writer(model, version, seed, date, meta=meta)
+        try:
+            for frame in [frames] if isinstance(frames, pd.DataFrame) else frames:
+                writer.append(frame)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.close()
+
+    def import_csv(self, path, model, version=LEGACY_VERSION, seed=None, date=None, chunk_size=1_000_000):
+        """Copy a legacy flat log into the store (dated by the file's modification time)."""
+        date = date or dt.date.fromtimestamp(os.path.getmtime(path))
+        return self.write_run(pd.read_csv(path, chunksize=chunk_size), model, version, seed, date,
+                              meta={"source": os.path.abspath(path)})
+
+    def _partitions(self, matchers, since, until):
+        """Run directories under partitions that match, walking only matching key=value folders."""
+        def walk(folder, depth):
+            try:
+                entries = sorted(os.scandir(folder), key=lambda entry: entry.name)
+            except FileNotFoundError:
+                return
+            key = PARTITION_KEYS[depth] if depth < len(PARTITION_KEYS) else "run"
+            for entry in entries:
+                name, _, value = entry.name.partition("=")
+                if not entry.is_dir() or name != key:
+                    continue                # Hidden temporaries, caches, stray files
+                if key == "date":
+                    try:
+                        day = dt.date.fromisoformat(value)
+                    except ValueError:
+                        continue            # Not a partition this store wrote
+                    if since and day < since or until and day > until:
+                        continue
+                elif not matchers[key](value):
+                    continue
+                if key == "run":
+                    yield entry.path
+                else:
+                    yield from walk(entry.path, depth + 1)
+
+        return walk(self.root, 0)
+
+    def runs(self, model=None, version=None, seed=None, since=None, until=None, run_id=None):
+        """Metadata (run.json + path) of every matching run, oldest first."""
+        matchers = {"model": _accepts(model), "version": _accepts(version), "seed": _accepts(seed),
+                    "run": _accepts(run_id)}
+        found = []
+        for path in self._partitions(matchers, as_date(since), as_date(until)):
+            try:
+                found.append(load_run_info(path))
+            except (OSError, ValueError):
+                continue                    # No readable run.json: not a run this store wrote
+        return sorted(found, key=lambda run: (run["created"], run["run_id"]))
+
+    def latest(self, **partition):
+        """Newest matching run's metadata, or None."""
+        found = self.runs(**partition)
+        return found[-1] if found else None
+
+    def scan(self, columns=None, filters=(), **partition):
+        """(run metadata, DataFrame) per matching part of every matching run, streamed."""
+        filters = [_parse_where(f) if isinstance(f, str) else tuple(f) for f in filters]
+        for run in self.runs(**partition):
+            for frame in scan_run(run, columns, filters):
+                yield run, frame
+
+    def read(self, columns=None, filters=(), keys=("model", "version", "seed", "run_id"), **partition):
+        """One DataFrame of the matching rows; `keys` adds those partition values as columns."""
+        frames = []
+        for run, frame in self.scan(columns, filters, **partition):
+            for key in keys:
+                frame.insert(len(frame.columns), key, run[key])
+            frames.append(frame)
+        if not frames:
+            return pd.DataFrame(columns=list(columns or []) + list(keys))
+        return pd.concat(frames, ignore_index=True)
+
+    def import_legacy(self, results_dir="results", version=LEGACY_VERSION):
+        """Import every results/<model>_log.csv the dashboard knows; returns the new runs."""
+        imported = []
+        for model, name in MODEL_LOGS.items():
+            path = os.path.join(results_dir, name)
+            if os.path.exists(path):
+                imported.append(self.import_csv(path, STORE_MODELS[model], version))
+        return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partitioned store of scheduler runs")
+    parser.add_argument("--root", default=DEFAULT_ROOT)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importing = commands.add_parser("import", help="Import legacy CSV logs (a file, or a results folder)")
+    importing.add_argument("path")
+    importing.add_argument("--model", help="Store model key (required for a single file)")
+    importing.add_argument("--version", default=LEGACY_VERSION)
+    importing.add_argument("--seed", default=None)
+
+    for name, text in (("ls", "List matching runs"), ("query", "Read matching rows")):
+        sub = commands.add_parser(name, help=text)
+        sub.add_argument("--model")
+        sub.add_argument("--version")
+        sub.add_argument("--seed")
+        sub.add_argument("--since", help="YYYY-MM-DD or <n>d (n days ago)")
+        sub.add_argument("--until", help="YYYY-MM-DD or <n>d")
+        sub.add_argument("--run-id")
+        if name == "query":
+            sub.add_argument("--columns", help="Comma-separated columns (default: all)")
+            sub.add_argument("--where", action="append", default=[], help="Row filter, e.g. TaskID>=100 (repeatable)")
+            sub.add_argument("--out", help="Write the rows to this CSV instead of printing a preview")
+    args = parser.parse_args()
+
+    store = RunStore(args.root)
+    if args.command == "import":
+        if os.path.isdir(args.path):
+            imported = store.import_legacy(args.path, args.version)
+        elif args.model:
+            imported = [store.import_csv(args.path, args.model, args.version, args.seed)]
+        else:
+            parser.error("--model is required when importing a single CSV")
+        for run in imported:
+            print(f"✅ {run['meta']['source']} -> {run['path']} ({run['rows']} rows)")
+        return
+
+    partition = {"model": args.model, "version": args.version, "seed": args.seed,
+                 "since": args.since, "until": args.until, "run_id": args.run_id}
+    if args.command == "ls":
+        for run in store.runs(**partition):
+            print(f"📁 {run['run_id']}  model={run['model']} version={run['version']} seed={run['seed']} "
+                  f"date={run['date']}  {run['rows']} rows")
+        return
+    columns = args.columns.split(",") if args.columns else None
+    df = store.read(columns, args.where, **partition)
+    if args.out:
+        df.to_csv(args.out, index=False)
+        print(f"📝 {len(df)} rows written to {args.out}")
+    else:
+        print(df.head(20).to_string())
+        print(f"📊 {len(df)} rows")
+
+
+if __name__ == "__main__":
+    main()
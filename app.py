@@ -4,20 +4,35 @@
 #   - Load experiment logs for PPO, A2C, DQN, FCFS, Round Robin
 #   - Visualize SLA %, cost, execution time, reward, trends, and explainability
 # Inputs (expected under ./results/):
+#   - runs/  run store (analytics/run_store.py): the newest run of each model
 #   - ppo_log.csv, A2C_log.csv, dqn_log.csv, fcfs_log.csv, round_robin_log.csv
+#     for models without a stored run (import them with
+#     python -m analytics.run_store import results)
 #   - explainability_table.csv  (for the Explainability table page)
 # Output:
 #   - Interactive dashboard with sidebar navigation
 # Notes:
 #   - Designed for dark theme; Plotly/Seaborn figures embedded in Streamlit
+#   - Each log is read once per file modification time and reduced to
+#     per-model aggregates: exact ones (analytics/aggregates.py) for logs up
+#     to 200k rows, streaming rollups (analytics/rollups.py, cached as
+#     <log>.rollup.npz) beyond; sidebar clicks only redraw from those
+#   - Charts send a bounded number of points whatever the log size: the SLA
+#     trend picks its resolution from the zoomed task range, the heatmap and
+#     box plots come from precomputed counts (and quantile sketches for
+#     large logs)
 # ============================================================
 
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 import seaborn as sns
 import matplotlib.pyplot as plt
 import os
+from analytics.aggregates import log_paths
+from analytics.rollups import MAX_POINTS, dashboard_summary
+from analytics.run_store import RUN_FILE, STORE_MODELS, RunStore
 
 # ✅ Set dark layout and cosmic theme
 theme_color = "#00ffff"
@@ -31,18 +46,33 @@ st.markdown(f"""
     <h1 style='color:{theme_color};'>🚀 Multi-Cloud Scheduling Evaluation Dashboard</h1>
 """, unsafe_allow_html=True)
 
-# ✅ Load logs from the ./results folder
-def load_data():
-    base_path = "results"
-    return {
-        "PPO": pd.read_csv(os.path.join(base_path, "ppo_log.csv")),
-        "A2C": pd.read_csv(os.path.join(base_path, "A2C_log.csv")),
-        "DQN": pd.read_csv(os.path.join(base_path, "dqn_log.csv")),
-        "FCFS": pd.read_csv(os.path.join(base_path, "fcfs_log.csv")),
-        "Round Robin": pd.read_csv(os.path.join(base_path, "round_robin_log.csv"))
-    }
+# ✅ Load logs from the ./results folder (cached per file mtime; a changed log is re-read)
+@st.cache_data(show_spinner="Aggregating logs...")
+def load_summary(path, mtime):
+    return dashboard_summary(path)
 
-model_data = load_data()
+@st.cache_data
+def load_table(path, mtime):
+    return pd.read_csv(path)
+
+def log_sources():
+    # Newest stored run per model; the flat CSV where the store has none
+    store = RunStore(os.path.join("results", "runs"))
+    sources = log_paths("results")
+    for model, key in STORE_MODELS.items():
+        run = store.latest(model=key)
+        if run:
+            sources[model] = run["path"]
+    return sources
+
+def source_mtime(path):
+    return os.path.getmtime(os.path.join(path, RUN_FILE) if os.path.isdir(path) else path)
+
+def load_data(sources):
+    return {model: load_summary(path, source_mtime(path)) for model, path in sources.items()}
+
+data_sources = log_sources()
+model_data = load_data(data_sources)
 
 # ✅ PPO highlight color map (keeps others muted)
 color_map = {"PPO": "green", "A2C": "gray", "DQN": "gray", "FCFS": "gray", "Round Robin": "gray"}
@@ -50,78 +80,75 @@ color_map = {"PPO": "green", "A2C": "gray", "DQN": "gray", "FCFS": "gray", "Roun
 # 📊 SLA Compliance %
 def sla_chart():
     # Compute SLA% per model
-    sla_values = {m: (df['SLAMet'].astype(str).str.upper() == "YES").mean()*100 for m, df in model_data.items()}
+    sla_values = {m: summary["sla_pct"] for m, summary in model_data.items()}
     df = pd.DataFrame(list(sla_values.items()), columns=["Model", "SLA Compliance %"])
     fig = px.bar(df, x="Model", y="SLA Compliance %", title="✅ SLA Compliance %", color="Model", color_discrete_map=color_map)
     st.plotly_chart(fig, use_container_width=True)
 
 # 💰 Avg CPU Cost
 def cost_chart():
-    df = pd.DataFrame({"Model": list(model_data.keys()), "Avg CPU Cost": [df["CPUCost"].mean() for df in model_data.values()]})
+    df = pd.DataFrame({"Model": list(model_data.keys()), "Avg CPU Cost": [s["mean_cost"] for s in model_data.values()]})
     fig = px.bar(df, x="Model", y="Avg CPU Cost", title="💰 Average CPU Cost", color="Model", color_discrete_map=color_map)
     st.plotly_chart(fig, use_container_width=True)
 
 # ⏱️ Avg Execution Time
 def exec_chart():
-    df = pd.DataFrame({"Model": list(model_data.keys()), "Avg Execution Time": [df["ExecutionTime"].mean() for df in model_data.values()]})
+    df = pd.DataFrame({"Model": list(model_data.keys()), "Avg Execution Time": [s["mean_exec_time"] for s in model_data.values()]})
     fig = px.bar(df, x="Model", y="Avg Execution Time", title="⏱️ Average Execution Time", color="Model", color_discrete_map=color_map)
     st.plotly_chart(fig, use_container_width=True)
 
 # 🎯 Reward Score (simple proxy: SLA hit minus cost penalty) for RL models
 def reward_chart():
-    rewards = {}
-    for model in ["PPO", "A2C", "DQN"]:
-        df = model_data[model]
-        rewards[model] = ((df['SLAMet'].str.upper() == "YES").astype(int) - 0.1 * df['CPUCost']).mean()
+    rewards = {model: model_data[model]["reward_score"] for model in ["PPO", "A2C", "DQN"]}
     df = pd.DataFrame(rewards.items(), columns=["Model", "Avg Reward Score"])
     fig = px.bar(df, x="Model", y="Avg Reward Score", title="🎯 Avg Reward Score", color="Model", color_discrete_map=color_map)
     st.plotly_chart(fig, use_container_width=True)
 
-# 📈 PPO SLA Trend over batches
+# 📈 PPO SLA Trend over batches (zoom with the slider; at most MAX_POINTS points at any range)
 def sla_trend_chart():
-    df = model_data["PPO"].copy()
-    df["Batch"] = df.index // 10
-    df_trend = df.groupby("Batch")["SLAMet"].apply(lambda x: (x == "YES").mean()*100).reset_index()
-    fig = px.line(df_trend, x="Batch", y="SLAMet", title="📈 PPO SLA Trend Over Time")
+    rollup = model_data["PPO"]["rollup"]
+    start, end = st.slider("Task range", 0, max(rollup.rows, 1), (0, max(rollup.rows, 1)))
+    df_trend = rollup.sla_trend(start, end, max_points=MAX_POINTS)  # SLA % per batch of >= 10 tasks
+    fig = px.line(df_trend, x="Task", y="SLAMet", hover_data=["Tasks"], title="📈 PPO SLA Trend Over Time")
     st.plotly_chart(fig, use_container_width=True)
 
 # ☁️ PPO Cloud Usage distribution
 def cloud_usage_chart():
-    df = model_data["PPO"]
-    clouds = df["SelectedCloud"].map({0: "AWS", 1: "Azure", 2: "GCP"}).value_counts().reset_index()
-    clouds.columns = ["Cloud", "Count"]
+    clouds = model_data["PPO"]["cloud_usage"]
     fig = px.pie(clouds, values="Count", names="Cloud", title="☁️ PPO Cloud Selection")
     st.plotly_chart(fig, use_container_width=True)
 
 # 🔥 SLA Violation Heatmap for PPO
 def violation_heatmap():
-    df = model_data["PPO"].copy()
-    df["SLAMet"] = df["SLAMet"].astype(str).str.upper().map({"YES": 1, "NO": 0})
-    df["Cloud"] = df["SelectedCloud"].map({0: "AWS", 1: "Azure", 2: "GCP"})
-    df["TaskGroup"] = pd.cut(df["TaskID"], bins=10, labels=[f"G{i}" for i in range(1, 11)])
-    # Pivot to % violations (100 - SLA%)
-    heatmap_data = df.pivot_table(index="Cloud", columns="TaskGroup", values="SLAMet", aggfunc=lambda x: 100 - x.mean()*100)
+    # % violations (100 - SLA%) per cloud and TaskID group
+    heatmap_data = model_data["PPO"]["violation_heatmap"]
     fig, ax = plt.subplots()
     sns.heatmap(heatmap_data, annot=True, cmap="coolwarm", fmt=".1f", cbar_kws={'label': '% SLA Violations'}, ax=ax)
     ax.set_title("🔴 PPO SLA Violation Heatmap")
     st.pyplot(fig)
 
+# 📦 Box plot from precomputed quartiles/whiskers (no raw rows needed)
+def box_figure(column, title):
+    fig = go.Figure()
+    for name, summary in model_data.items():
+        b = summary["box"][column]
+        fig.add_trace(go.Box(name=name, x=[name], q1=[b["q1"]], median=[b["median"]], q3=[b["q3"]],
+                             lowerfence=[b["lowerfence"]], upperfence=[b["upperfence"]],
+                             marker_color=color_map[name]))
+    fig.update_layout(title=title, xaxis_title="Model", yaxis_title=column, legend_title_text="Model")
+    return fig
+
 # 📦 Variance across tasks (execution time & cost) per model
 def task_boxplot():
-    dfs = []
-    for name, df in model_data.items():
-        df = df.copy()
-        df["Model"] = name
-        dfs.append(df)
-    all_df = pd.concat(dfs)
-    fig1 = px.box(all_df, x="Model", y="ExecutionTime", title="⏱️ Task Execution Time Variance", color="Model", color_discrete_map=color_map)
-    fig2 = px.box(all_df, x="Model", y="CPUCost", title="💰 Task CPU Cost Variance", color="Model", color_discrete_map=color_map)
+    fig1 = box_figure("ExecutionTime", "⏱️ Task Execution Time Variance")
+    fig2 = box_figure("CPUCost", "💰 Task CPU Cost Variance")
     st.plotly_chart(fig1, use_container_width=True)
     st.plotly_chart(fig2, use_container_width=True)
 
 # 🧠 Explainability Table (prebuilt CSV)
 def explain_table():
-    df = pd.read_csv("results/explainability_table.csv")
+    path = "results/explainability_table.csv"
+    df = load_table(path, os.path.getmtime(path))
     st.subheader("🧠 Explainability Table")
     st.dataframe(df)
 
@@ -132,6 +159,7 @@ def final_summary():
 
 # 🔍 Sidebar Navigation
 st.sidebar.title("🔍 Navigation")
+st.sidebar.caption(" · ".join(f"{model}: {os.path.basename(path)}" for model, path in data_sources.items()))
 page = st.sidebar.radio("Choose a Metric", [
     "SLA Compliance %", "Average CPU Cost", "Execution Time",
     "Reward Score", "PPO SLA Trend", "Cloud Usage (PPO)",
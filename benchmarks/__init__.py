@@ -0,0 +1,6 @@
+"""
+Load-testing tools for the inference servers.
+
+See benchmarks/load_test.py for the replay benchmark (throughput and tail
+latency as JSON, optional local server spawn and baseline comparison).
+"""
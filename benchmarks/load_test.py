@@ -0,0 +1,482 @@
+"""
+Inference Server Load Test
+--------------------------
+Purpose:
+    Replays real scheduler states against a PPO / A2C / DQN server (or the
+    gateway) using that server's own wire protocol, and reports throughput and
+    p50 / p95 / p99 / max latency as JSON. Optionally starts the server itself
+    and compares the result with a stored baseline.
+
+States:
+    - Training datasets with a StateVec column are replayed as-is.
+    - Scheduler logs (results/*.csv) are turned back into the state the Java
+      simulator sends: [cpu/10000, mem/1024, start/1000, sla/10, 0] with
+      cpu = SLADuration * 8000. Memory demand is not logged, so the middle of
+      its range (576 MB) is used.
+    - Workload directories / part files from simulation/workload.py give the
+      exact simulator states (up to --max-states of them).
+
+Load models:
+    - closed loop (default): --concurrency clients, each sends its next request
+      as soon as the previous reply arrives.
+    - open loop (--rate R): requests arrive at R per second (Poisson or
+      uniform) over a pool of --concurrency connections. Latency is measured
+      from the scheduled arrival time, so queueing behind a slow server counts.
+
+Usage (from the repository root):
+    python -m benchmarks.load_test --target ppo --spawn
+    python -m benchmarks.load_test --target dqn --spawn --server-args="--backend numpy" --format binary
+    python -m benchmarks.load_test --target a2c --port 9999 --rate 2000 --duration 10
+    python -m benchmarks.load_test --target gateway --model dqn --spawn --concurrency 32
+    python -m benchmarks.load_test --target ppo --spawn --server-args=--blocking --connect-per-request
+    python -m benchmarks.load_test --target ppo --spawn --bulk 1000 --connect-per-request   # one burst per request
+    python -m benchmarks.load_test --target ppo --spawn --baseline benchmarks/baseline.json --update-baseline
+    python -m benchmarks.load_test --target ppo --spawn --baseline benchmarks/baseline.json   # exit 1 on regression
+
+Notes:
+    - The JSON report goes to stdout (and --out); progress messages go to stderr.
+    - A baseline file maps scenario keys (target/model/format/loop/concurrency)
+      to earlier reports. A run regresses when throughput drops, or p50 / p99
+      latency grows, by more than --tolerance (default 15%), or when it sees
+      errors the baseline did not.
+    - With --bulk N every request carries N tasks (a {"tasks": [...]} line or
+      a DECIDE_BATCH frame); the report adds tasks per second next to
+      requests per second.
+    - The client runs on the same machine as a spawned server and competes with
+      it for CPU; --format binary keeps client-side overhead lowest.
+"""
+
+import argparse
+import asyncio
+import datetime
+import glob
+import json
+import os
+import platform
+import shlex
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+from serving import protocol  # noqa: E402
+from simulation.task_model import MEM_DEMAND_RANGE, SLA_MIPS, build_states  # noqa: E402
+from simulation.workload import is_workload, read_workload  # noqa: E402
+
+HOST = 'localhost'
+
+# target -> (server script, default port)
+SERVERS = {
+    "ppo": (os.path.join(ROOT, "ppo-server", "ppo_training_server.py"), 5055),
+    "a2c": (os.path.join(ROOT, "A2C-server", "predict_server_a2c.py"), 9999),
+    "dqn": (os.path.join(ROOT, "DQN-server", "dqn_predict_server.py"), 9999),
+    "gateway": (os.path.join(ROOT, "gateway-server", "inference_gateway.py"), 6060),
+}
+MODEL_CODES = {name: code for code, name in protocol.MODEL_IDS.items() if name}
+DEFAULT_STATES = sorted(glob.glob(os.path.join(ROOT, "results", "*_log.csv"))) + [
+    os.path.join(ROOT, "Google Colab", "Datasets", "ppo_training_dataset_cleaned_5f.csv")]
+
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+# ---------------- States & requests ----------------
+
+def parse_vectors(series):
+    parts = series.astype(str).str.strip().str.strip("[]").str.split(",", expand=True)
+    parts = parts.reindex(columns=range(protocol.STATE_DIM)).replace("", np.nan)
+    return parts.astype(np.float32).fillna(0.0).to_numpy()
+
+
+def log_states(df):
+    """Rebuild the simulator's state vector from a scheduler log."""
+    cpu = df["SLADuration"].to_numpy(np.float64) * SLA_MIPS
+    mem = np.full(len(df), sum(MEM_DEMAND_RANGE) / 2)
+    start = df["StartTime"].to_numpy(np.float64)
+    sla = df["SLADuration"].to_numpy(np.float64)
+    return np.stack([cpu / 10000, mem / 1024, start / 1000, sla / 10, np.zeros(len(df))], axis=1)
+
+
+def workload_states(path, limit):
+    """First `limit` states of a generated workload."""
+    blocks, count = [], 0
+    for tasks in read_workload(path):
+        blocks.append(build_states(tasks)[:limit - count])
+        count += len(blocks[-1])
+        if count >= limit:
+            break
+    return np.concatenate(blocks)
+
+
+def load_states(paths, limit=1_000_000):
+    """(N, 5) float32 states from datasets (StateVec), scheduler logs and/or generated workloads."""
+    blocks = []
+    for path in paths:
+        if is_workload(path):
+            blocks.append(workload_states(path, limit))
+            continue
+        df = pd.read_csv(path)
+        df.columns = df.columns.str.strip()
+        if "StateVec" in df.columns:
+            blocks.append(parse_vectors(df["StateVec"]))
+        elif {"SLADuration", "StartTime"} <= set(df.columns):
+            blocks.append(log_states(df))
+        else:
+            raise ValueError(f"❌ {path} has neither StateVec nor SLADuration/StartTime columns")
+    states = np.concatenate(blocks).astype(np.float32)
+    return states[np.isfinite(states).all(axis=1)]
+
+
+def encode_bulk_requests(states, target, fmt, model, bulk):
+    """Pre-encoded bulk requests of `bulk` tasks each."""
+    code = MODEL_CODES[model] if target == "gateway" else 0
+    requests = []
+    for first in range(0, len(states) - bulk + 1, bulk):
+        chunk = states[first:first + bulk]
+        task_ids = np.arange(first, first + len(chunk))
+        if fmt == "binary":
+            requests.append(protocol.encode_decide_batch(task_ids, chunk, chunk[:, 3] * 10, model=code))
+            continue
+        tasks = [{"task_id": int(i), "state": [round(float(v), 6) for v in s]} for i, s in zip(task_ids, chunk)]
+        payload = {"model": model, "tasks": tasks} if target == "gateway" else {"tasks": tasks}
+        requests.append((json.dumps(payload) + "\n").encode())
+    return requests
+
+
+def encode_requests(states, target, fmt, model, bulk=1):
+    """Pre-encoded request bytes, one per state (or per `bulk` states), in the target's own protocol."""
+    if bulk > 1:
+        return encode_bulk_requests(states, target, fmt, model, bulk)
+    if fmt == "binary":
+        code = MODEL_CODES[model] if target == "gateway" else 0
+        return [protocol.encode_decide(i, s, model=code) for i, s in enumerate(states)]
+    requests = []
+    for i, s in enumerate(states):
+        values = [round(float(v), 6) for v in s]
+        if target == "ppo":
+            payload = {"task_id": i, "state": json.dumps(values)}  # PPOClient's stringified list
+        elif target == "gateway":
+            payload = {"model": model, "state": values}
+        else:
+            payload = {"state": values}
+        requests.append((json.dumps(payload) + "\n").encode())
+    return requests
+
+
+# ---------------- Client ----------------
+
+class Connection:
+    """One client socket; replies are a line (JSON) or a frame (binary)."""
+
+    def __init__(self, host, port, binary, reuse=True):
+        self.host = host
+        self.port = port
+        self.binary = binary
+        self.reuse = reuse
+        self.reader = self.writer = None
+
+    async def _read_reply(self):
+        if self.binary:
+            msg_type, _, length = protocol.read_header(await self.reader.readexactly(protocol.HEADER.size))
+            payload = await self.reader.readexactly(length)
+            if msg_type == protocol.MSG_ACTIONS:
+                return bool((protocol.decode_actions(payload)[2] >= 0).all())
+            return msg_type == protocol.MSG_ACTION and protocol.decode_reply(msg_type, payload)[1] is not None
+        line = await self.reader.readline()  # newline (async servers) or EOF (blocking servers)
+        return bool(line.strip()) and b'"error"' not in line
+
+    async def request(self, data):
+        """Send one request and wait for its reply; False on error replies or broken sockets."""
+        try:
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            self.writer.write(data)
+            await self.writer.drain()
+            ok = await self._read_reply()
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            ok = False
+            self.close()
+        if not self.reuse:
+            self.close()
+        return ok
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+
+    def add(self, ok, latency):
+        if ok:
+            self.latencies.append(latency)
+        else:
+            self.errors += 1
+
+
+async def closed_loop(connections, requests, count=None, deadline=None, offset=0):
+    """Each connection sends back-to-back until `count` requests or `deadline`."""
+    recorder = Recorder()
+    next_index = [0]
+
+    async def client(conn):
+        while True:
+            i = next_index[0]
+            if (count is not None and i >= count) or (deadline is not None and time.perf_counter() >= deadline):
+                return
+            next_index[0] += 1
+            started = time.perf_counter()
+            ok = await conn.request(requests[(offset + i) % len(requests)])
+            recorder.add(ok, time.perf_counter() - started)
+
+    await asyncio.gather(*(client(conn) for conn in connections))
+    return recorder
+
+
+async def open_loop(connections, requests, rate, count, arrival="poisson", seed=0, offset=0):
+    """`count` arrivals at `rate` per second over a shared pool of connections."""
+    recorder = Recorder()
+    pool = asyncio.Queue()
+    for conn in connections:
+        pool.put_nowait(conn)
+    rng = np.random.default_rng(seed)
+    gaps = rng.exponential(1.0 / rate, count) if arrival == "poisson" else np.full(count, 1.0 / rate)
+    start = time.perf_counter()
+    schedule = start + np.cumsum(gaps)
+
+    async def one(i, scheduled):
+        conn = await pool.get()
+        try:
+            ok = await conn.request(requests[(offset + i) % len(requests)])
+        finally:
+            pool.put_nowait(conn)
+        recorder.add(ok, time.perf_counter() - scheduled)  # includes time queued for a connection
+
+    tasks = []
+    for i, scheduled in enumerate(schedule):
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(i, scheduled)))
+    await asyncio.gather(*tasks)
+    return recorder
+
+
+async def run_load(args, requests):
+    connections = [Connection(args.host, args.port, args.format == "binary", not args.connect_per_request)
+                   for _ in range(args.concurrency)]
+    try:
+        if args.warmup:
+            await closed_loop(connections, requests, count=args.warmup)
+        started = time.perf_counter()
+        if args.rate:
+            count = int(args.rate * args.duration) if args.duration else args.requests
+            recorder = await open_loop(connections, requests, args.rate, count, args.arrival,
+                                       args.seed, offset=args.warmup)
+        else:
+            deadline = started + args.duration if args.duration else None
+            recorder = await closed_loop(connections, requests, None if deadline else args.requests,
+                                         deadline, offset=args.warmup)
+        return recorder, time.perf_counter() - started
+    finally:
+        for conn in connections:
+            conn.close()
+
+
+# ---------------- Report & baseline ----------------
+
+def scenario_key(args):
+    model = f"/{args.model}" if args.target == "gateway" else ""
+    loop = f"open{args.rate:g}" if args.rate else "closed"
+    per_request = "/connect-per-request" if args.connect_per_request else ""
+    bulk = f"/bulk{args.bulk}" if args.bulk > 1 else ""
+    return f"{args.target}{model}/{args.format}/{loop}/c{args.concurrency}{per_request}{bulk}"
+
+
+def build_report(args, recorder, elapsed, n_states):
+    lat_ms = np.asarray(recorder.latencies, dtype=np.float64) * 1e3
+    pct = (lambda q: float(np.percentile(lat_ms, q))) if lat_ms.size else (lambda q: None)
+    return {
+        "scenario": scenario_key(args),
+        "target": args.target,
+        "model": args.model if args.target == "gateway" else args.target,
+        "format": args.format,
+        "loop": "open" if args.rate else "closed",
+        "offered_rps": args.rate or None,
+        "arrival": args.arrival if args.rate else None,
+        "concurrency": args.concurrency,
+        "connect_per_request": args.connect_per_request,
+        "server_args": args.server_args if args.spawn else None,
+        "states": n_states,
+        "requests": int(lat_ms.size + recorder.errors),
+        "errors": recorder.errors,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(lat_ms.size / elapsed, 2) if elapsed > 0 else 0.0,
+        "tasks_per_request": args.bulk,
+        "throughput_tasks_per_s": round(lat_ms.size * args.bulk / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "mean": float(lat_ms.mean()) if lat_ms.size else None,
+            "p50": pct(50), "p95": pct(95), "p99": pct(99),
+            "max": float(lat_ms.max()) if lat_ms.size else None,
+        },
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                    "cpus": os.cpu_count()},
+    }
+
+
+def compare(report, baseline, tolerance):
+    """List of regression messages (empty when the run is within tolerance)."""
+    problems = []
+    if report["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+        problems.append(f"throughput {report['throughput_rps']:.0f} < baseline {baseline['throughput_rps']:.0f} req/s")
+    for q in ("p50", "p99"):
+        now, before = report["latency_ms"][q], baseline["latency_ms"][q]
+        if now is not None and before is not None and now > before * (1 + tolerance):
+            problems.append(f"{q} {now:.3f} ms > baseline {before:.3f} ms")
+    if report["errors"] and not baseline["errors"]:
+        problems.append(f"{report['errors']} errors (baseline had none)")
+    return problems
+
+
+def load_baselines(path):
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+# ---------------- Local server ----------------
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(host, port, proc, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"❌ Server exited with code {proc.returncode} before listening")
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"❌ Server did not listen on {host}:{port} within {timeout}s")
+
+
+def spawn_server(args):
+    script, _ = SERVERS[args.target]
+    cmd = [sys.executable, script, "--host", args.host, "--port", str(args.port), *shlex.split(args.server_args)]
+    out = open(args.server_log, "w") if args.server_log else subprocess.DEVNULL
+    log(f"🚀 Starting {' '.join(cmd)}")
+    proc = subprocess.Popen(cmd, stdout=out, stderr=subprocess.STDOUT, cwd=ROOT)
+    try:
+        wait_for_port(args.host, args.port, proc, args.startup_timeout)
+    except Exception:
+        stop_server(proc)
+        raise
+    return proc
+
+
+def stop_server(proc):
+    if proc.poll() is None:
+        proc.send_signal(signal.SIGINT)  # servers exit cleanly on KeyboardInterrupt
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay load test for the inference servers")
+    parser.add_argument("--target", choices=sorted(SERVERS), default="ppo")
+    parser.add_argument("--model", choices=sorted(MODEL_CODES), default="ppo", help="Model to query on the gateway")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, help="Server port (default: the target's port, or a free one with --spawn)")
+    parser.add_argument("--format", choices=("json", "binary"), default="json",
+                        help="json = the target's own JSON dialect, binary = DECIDE frames")
+    parser.add_argument("--states", nargs="+", default=DEFAULT_STATES,
+                        help="CSV datasets / logs or simulation/workload.py outputs to replay")
+    parser.add_argument("--max-states", type=int, default=1_000_000, help="States read from each workload")
+    parser.add_argument("--concurrency", type=int, default=8, help="Client connections")
+    parser.add_argument("--requests", type=int, default=10000, help="Measured requests (ignored with --duration)")
+    parser.add_argument("--duration", type=float, help="Measure for this many seconds instead")
+    parser.add_argument("--warmup", type=int, default=200, help="Unmeasured requests sent first")
+    parser.add_argument("--rate", type=float, default=0.0, help="Open loop: arrivals per second (0 = closed loop)")
+    parser.add_argument("--arrival", choices=("poisson", "uniform"), default="poisson")
+    parser.add_argument("--bulk", type=int, default=1, help="Tasks per request (bulk API when > 1)")
+    parser.add_argument("--connect-per-request", action="store_true",
+                        help="New connection per request, like the Java clients (needed for --blocking servers)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--spawn", action="store_true", help="Start the target server locally for this run")
+    parser.add_argument("--server-args", default="", help="Extra arguments for the spawned server (use --server-args=\"--flag ...\")")
+    parser.add_argument("--server-log", help="File for the spawned server's output (default: discarded)")
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--out", help="Also write the JSON report here")
+    parser.add_argument("--baseline", help="JSON file of baseline reports keyed by scenario")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the scenario's baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    if args.port is None:
+        args.port = free_port() if args.spawn else SERVERS[args.target][1]
+
+    states = load_states(args.states, args.max_states)
+    requests = encode_requests(states, args.target, args.format, args.model, args.bulk)
+    log(f"📦 {len(states)} states from {len(args.states)} file(s)")
+
+    proc = spawn_server(args) if args.spawn else None
+    try:
+        recorder, elapsed = asyncio.run(run_load(args, requests))
+    finally:
+        if proc is not None:
+            stop_server(proc)
+
+    report = build_report(args, recorder, elapsed, len(states))
+    lat = report["latency_ms"]
+    log(f"✅ {report['scenario']}: {report['throughput_rps']:,.0f} req/s "
+        f"({report['throughput_tasks_per_s']:,.0f} tasks/s), "
+        f"p50 {lat['p50'] or 0:.3f} ms, p99 {lat['p99'] or 0:.3f} ms, errors {report['errors']}")
+
+    status = 0
+    baselines = load_baselines(args.baseline)
+    if args.baseline and not args.update_baseline:
+        if report["scenario"] in baselines:
+            problems = compare(report, baselines[report["scenario"]], args.tolerance)
+            report["regressions"] = problems
+            for problem in problems:
+                log(f"❌ Regression: {problem}")
+            status = 1 if problems else 0
+        else:
+            log(f"⚠️ No baseline for {report['scenario']} in {args.baseline}")
+    if args.baseline and args.update_baseline:
+        baselines[report["scenario"]] = report
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        log(f"📝 Baseline for {report['scenario']} saved to {args.baseline}")
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
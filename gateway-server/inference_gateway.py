@@ -0,0 +1,114 @@
+"""
+Multi-Model Inference Gateway
+-----------------------------
+Purpose:
+    One process that loads the PPO, A2C and DQN models once and serves all of
+    them from a single event loop, thread pool and socket. Lets the schedulers
+    be compared head-to-head at the same time without three interpreters, three
+    torch imports and three sets of sockets (the A2C and DQN servers both bind
+    9999 and cannot run together).
+
+Protocol (main port, newline-delimited JSON):
+    Client -> Gateway:
+        {"model": "ppo" | "a2c" | "dqn", "state": [0.72, 0.33, 0.15, 1.0, 0.28]}
+        "state" may also be the PPO-style stringified list.
+
+    Gateway -> Client:
+        {"model": "a2c", "action": 1}
+        Errors: {"error": "..."}
+
+    Requests without "model" go to --default-model and get that model's
+    legacy reply ("1", {"cloud": 1} or {"action": 1}).
+
+    Binary DECIDE frames (serving/protocol.py) are accepted on every port;
+    the header's model byte picks ppo=1, a2c=2, dqn=3 (0 = default).
+
+Legacy ports:
+    --legacy ppo=5055 --legacy a2c=9999 --legacy dqn=9998
+    opens extra listeners pinned to one model with its original reply shape,
+    so PPOClient / A2CClient / DQNClient work unchanged (point DQNClient at
+    9998 or any free port).
+
+Usage:
+    python gateway-server/inference_gateway.py
+    python gateway-server/inference_gateway.py --models ppo,dqn --default-model dqn
+    python gateway-server/inference_gateway.py --backend numpy   # no torch import
+    python gateway-server/inference_gateway.py --processes 4     # 4 workers, one model copy
+"""
+
+import argparse
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+from serving import protocol  # noqa: E402
+from serving.policies import as_policy, load_model, model_file  # noqa: E402
+from serving.async_server import run_servers  # noqa: E402
+from serving.runner import (add_server_arguments, attach_online_learners, build_service,  # noqa: E402
+                            monitoring_servers, run_workers)
+
+HOST = 'localhost'
+PORT = 6060
+
+# key -> (model path, legacy dialect, deterministic predict)
+MODELS = {
+    "ppo": (os.path.join(ROOT, "ppo-server", "ppo_v2.zip"), protocol.PPO, False),
+    "a2c": (os.path.join(ROOT, "A2C-server", "a2c_from_ppo_model_v2.zip"), protocol.A2C, True),
+    "dqn": (os.path.join(ROOT, "DQN-server", "dqn_v1.zip"), protocol.DQN, True),
+}
+
+
+def parse_legacy(spec):
+    key, _, port = spec.partition("=")
+    if key not in MODELS or not port.isdigit():
+        raise argparse.ArgumentTypeError(f"expected MODEL=PORT with MODEL in {sorted(MODELS)}, got '{spec}'")
+    return key, int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-model (PPO/A2C/DQN) inference gateway")
+    add_server_arguments(parser, HOST, PORT)
+    parser.add_argument("--models", default="ppo,a2c,dqn", help="Comma-separated models to load")
+    parser.add_argument("--default-model", default="ppo", help="Model for requests without a 'model' key")
+    parser.add_argument("--legacy", type=parse_legacy, action="append", default=[],
+                        help="Extra MODEL=PORT listener with that model's original reply shape")
+    args = parser.parse_args()
+    if args.blocking:
+        parser.error("the gateway has no blocking mode")
+    if args.weights:
+        parser.error("--weights is per model; the gateway uses each model's <zip>.npz")
+
+    keys = [k.strip().lower() for k in args.models.split(",") if k.strip()]
+    unknown = sorted(set(keys) - set(MODELS)) + sorted({k for k, _ in args.legacy} - set(keys))
+    if unknown or args.default_model not in keys:
+        parser.error(f"unknown or unloaded model(s): {unknown or [args.default_model]}")
+
+    # Loaded once; with --processes the workers share these copy-on-write
+    policies = {}
+    for key in keys:
+        path, dialect, deterministic = MODELS[key]
+        policies[key] = as_policy(load_model(key, path, args.backend), deterministic)
+
+    def start(args):
+        service = build_service(args)
+        for key, policy in policies.items():
+            path, dialect, _ = MODELS[key]
+            service.add_model(key, policy, dialect, default=(key == args.default_model),
+                              source=model_file(path, args.backend))
+        attach_online_learners(service, args)
+
+        servers = [service.listener(args.host, args.port, "Gateway")]
+        for key, port in args.legacy:
+            servers.append(service.listener(args.host, port, f"{key.upper()} legacy", pinned_key=key))
+        print(f"✅ Micro-batching up to {args.batch_size} states / {args.batch_window_us} µs per model")
+        try:
+            run_servers(*servers, *monitoring_servers(service, args))
+        finally:
+            service.close()
+
+    run_workers(start, args, [(args.host, args.port)] + [(args.host, port) for _, port in args.legacy])
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,8 @@
 PPO Inference Socket Server
 ---------------------------
 Purpose:
-    Exposes a minimal TCP socket server that loads a pretrained PPO model
-    (Stable-Baselines3) and serves inference for a single request at a time.
+    Exposes a TCP socket server that loads a pretrained PPO model
+    (Stable-Baselines3) and serves inference for the Java simulator.
 
 Protocol (very simple):
     Client -> Server: JSON string with key "state", where payload['state'] is itself
@@ -14,54 +14,90 @@ Protocol (very simple):
     Server -> Client: stringified integer action (e.g., "0", "1", or "2"), representing
                       the chosen cloud index.
 
+Modes:
+    - async (default): asyncio server that accepts many simultaneous connections.
+      Requests are newline-delimited (PPOClient already uses println), each reply
+      is followed by a newline, and a connection may carry several requests.
+      The single loaded PPO model is shared by all handlers. States from
+      concurrent requests are micro-batched into one predict() over an (N, 5)
+      array, which runs on a small thread pool so the event loop keeps accepting.
+    - blocking (--blocking): the original one-connection-at-a-time loop.
+
+    The async mode also accepts length-prefixed binary DECIDE frames on the
+    same port (see serving/protocol.py); the format is detected per request.
+
+Usage:
+    python ppo_training_server.py                 # async mode on localhost:5055
+    python ppo_training_server.py --workers 8     # larger predict thread pool
+    python ppo_training_server.py --batch-size 128 --batch-window-us 500
+    python ppo_training_server.py --blocking      # legacy single-client loop
+    python ppo_training_server.py --backend numpy # torch-free, uses ppo_v2.npz
+    python ppo_training_server.py --processes 4   # 4 pre-forked workers on one port
+
 Notes:
     - The double-JSON for "state" is intentional to match the existing Java sender.
       We parse JSON once to get 'payload', then json.loads(payload['state']) again
-      to convert the inner stringified list to a Python list.
-    - This server is single-threaded and handles one client connection at a time.
-      For concurrent requests, wrap the client handler in a thread or process pool.
+      to convert the inner stringified list to a Python list. A plain JSON list is
+      accepted as well.
     - Prints include emojis for quick visual tracing during demos/logs.
 """
 
+import argparse
+import os
 import socket
-import json
-import numpy as np
-from stable_baselines3 import PPO
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from serving import protocol  # noqa: E402
+from serving.policies import as_policy, load_model  # noqa: E402
+from serving.runner import add_server_arguments, serve_async  # noqa: E402
 
 # Server & model config
 HOST = 'localhost'
 PORT = 5055
-STATE_DIM = 5  # Expected length of input state vector
-MODEL_PATH = "ppo_v2.zip"
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ppo_v2.zip")
+
+
+def serve_blocking(model, host, port):
+    """Original single-threaded loop: one client connection at a time."""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind((host, port))
+    server.listen(1)
+    print(f"✅ PPO Server running on {host}:{port}...")
+
+    while True:
+        client, addr = server.accept()
+        data = protocol.read_line(client)  # Whole line, not one recv() chunk
+
+        try:
+            _, state = protocol.PPO.decode(data)  # Parse payload + stringified state list
+            action, _ = model.predict(state)  # Predict best action using PPO model
+            response = str(int(action))  # Convert action to string for sending
 
-# Load trained PPO model
-model = PPO.load(MODEL_PATH)
-print(f"✅ PPO Model loaded from {MODEL_PATH}")
+            print(f"🧠 Predicted Cloud Index: {response}")  # Log prediction
+            client.send(response.encode())  # Send prediction back to client
 
-# Create and start socket server
-server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-server.bind((HOST, PORT))
-server.listen(1)
-print(f"✅ PPO Server running on {HOST}:{PORT}...")
+        except Exception as e:
+            print(f"❌ Error: {e}\n⚠️ Payload: {data}")
+        finally:
+            client.close()  # Close client connection
 
-while True:
-    client, addr = server.accept()
-    data = client.recv(4096).decode()
 
-    try:
-        payload = json.loads(data)  # Parse incoming JSON payload
-        state = np.array(json.loads(payload['state']), dtype=np.float32)  # Parse stringified state list
+def main():
+    parser = argparse.ArgumentParser(description="PPO inference socket server")
+    add_server_arguments(parser, HOST, PORT)
+    parser.add_argument("--model", default=MODEL_PATH, help="Path to the PPO .zip")
+    args = parser.parse_args()
 
-        if len(state) != STATE_DIM:
-            raise ValueError(f"❌ Expected {STATE_DIM}-length state vector, got {len(state)}")
+    # Load trained PPO model (SB3 zip, or exported NumPy weights with --backend numpy)
+    model = load_model("ppo", args.model, args.backend, args.weights)
 
-        action, _ = model.predict(state)  # Predict best action using PPO model
-        response = str(int(action))  # Convert action to string for sending
+    if args.blocking:
+        serve_blocking(model, args.host, args.port)
+    else:
+        # Sampled (non-deterministic) actions, same as the blocking loop's model.predict(state)
+        serve_async(as_policy(model, deterministic=False), protocol.PPO, args, "PPO")
 
-        print(f"🧠 Predicted Cloud Index: {response}")  # Log prediction
-        client.send(response.encode())  # Send prediction back to client
 
-    except Exception as e:
-        print(f"❌ Error: {e}\n⚠️ Payload: {data}")
-    finally:
-        client.close()  # Close client connection
+if __name__ == "__main__":
+    main()
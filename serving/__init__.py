@@ -0,0 +1,7 @@
+"""
+Shared serving components for the PPO / A2C / DQN inference servers.
+
+The server scripts under ppo-server/, A2C-server/ and DQN-server/ add the
+repository root to sys.path and import from here, so the socket handling
+lives in one place instead of being copied into every script.
+"""
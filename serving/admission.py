@@ -0,0 +1,146 @@
+"""
+Deadline-Aware Admission Control
+--------------------------------
+Purpose:
+    Keeps an overloaded or slow server from stalling its clients. The Java
+    client blocks on the socket until it gets a reply and picks AWS (0) when
+    something goes wrong, so a late model answer is worse than a quick
+    reasonable one. Every request gets a latency budget derived from the
+    task's own `sla_deadline`; if the model cannot answer within it, or too
+    many requests are already waiting for the model, the server answers at
+    once from a built-in heuristic instead.
+
+Budget:
+    budget = clamp(budget_fraction * sla_deadline, min_budget, max_budget)
+    measured from the moment the request was read. Requests without a
+    deadline (sla_deadline missing or 0) use the deadline encoded in the
+    state (state[3] * 10), and max_budget if that is 0 too.
+
+Queue:
+    At most `max_queue` requests per model may wait on the micro-batcher
+    (cache hits never wait). Beyond that, new requests skip the model. A
+    bulk request counts as one request per task and gets the budget of its
+    tightest deadline; it falls back as a whole (each task gets its own
+    heuristic choice). A bulk request with more tasks than max_queue always
+    falls back, so size --admission-queue for the largest bulk you send.
+
+Fallback heuristic:
+    The cheapest cloud whose execution time (cpuDemand / MIPS, truncated as
+    in Java) meets the deadline, using the simulator's MIPS / rate table;
+    the fastest cloud if none does. With a CloudLoad tracker (--cloud-load,
+    serving/cloud_load.py) a cloud's current backlog counts against the
+    deadline too, so fallbacks steer away from busy providers. Fallback
+    replies carry model_version 0.
+
+Metrics:
+    inference_fallbacks_total{model,reason}    overload (queue full) / timeout (budget spent)
+    inference_queue_depth{model}               requests currently waiting on the model
+
+Usage:
+    python ppo-server/ppo_training_server.py --admission --admission-queue 512
+    python gateway-server/inference_gateway.py --admission --admission-budget-fraction 0.02
+"""
+
+import asyncio
+import time
+
+from simulation.task_model import CLOUD_MIPS, CLOUD_RATE_PER_MIPS
+
+REASONS = ("overload", "timeout")
+MIPS = tuple(int(mips) for mips in CLOUD_MIPS)
+BY_COST = tuple(sorted(range(len(MIPS)), key=lambda cloud: CLOUD_RATE_PER_MIPS[cloud]))
+FASTEST = max(range(len(MIPS)), key=lambda cloud: MIPS[cloud])
+
+
+def task_deadline(payload, state):
+    """SLA deadline in seconds: the client's sla_deadline, else the one encoded in the state."""
+    deadline = payload.get('sla_deadline') if isinstance(payload, dict) else None
+    try:
+        deadline = float(deadline)
+    except (TypeError, ValueError):
+        deadline = 0.0
+    return deadline if deadline > 0 else float(state[3]) * 10.0
+
+
+def cheapest_feasible(cpu_demand, deadline, backlog=None):
+    """Cheapest cloud meeting the deadline for this cpuDemand (after its backlog), else the soonest done."""
+    cpu_demand = int(cpu_demand)
+    for cloud in BY_COST:
+        if cpu_demand // MIPS[cloud] + (backlog[cloud] if backlog else 0.0) <= deadline:
+            return cloud
+    if backlog:
+        return min(range(len(MIPS)), key=lambda cloud: backlog[cloud] + cpu_demand / MIPS[cloud])
+    return FASTEST
+
+
+class AdmissionController:
+    def __init__(self, max_queue=1024, budget_fraction=0.01, min_budget_ms=1.0, max_budget_ms=50.0,
+                 cloud_load=None):
+        self.max_queue = max_queue
+        self.budget_fraction = budget_fraction
+        self.min_budget = min_budget_ms / 1e3
+        self.max_budget = max_budget_ms / 1e3
+        self.cloud_load = cloud_load    # Optional CloudLoad: backlog-aware fallbacks
+        self.waiting = {}               # model -> requests waiting on the model
+        self.fallbacks = {}             # (model, reason) -> count
+
+    def budget(self, deadline):
+        """Seconds the model may take for a task with this SLA deadline."""
+        if deadline <= 0:
+            return self.max_budget
+        return min(self.max_budget, max(self.min_budget, self.budget_fraction * deadline))
+
+    def fallback(self, key, state, deadline, reason):
+        """Heuristic (action, version 0, reason) and count it."""
+        self.fallbacks[(key, reason)] = self.fallbacks.get((key, reason), 0) + 1
+        backlog = self.cloud_load.backlog() if self.cloud_load is not None else None
+        return cheapest_feasible(round(float(state[0]) * 10000), deadline, backlog), 0, reason
+
+    async def decide(self, endpoint, payload, state, started):
+        """(action, version, fallback reason or None) within the request's budget."""
+        key = endpoint.key
+        deadline = task_deadline(payload, state)
+        waiting = self.waiting.get(key, 0)
+        if waiting >= self.max_queue:
+            return self.fallback(key, state, deadline, "overload")
+        remaining = self.budget(deadline) - (time.perf_counter() - started)
+        if remaining <= 0:
+            return self.fallback(key, state, deadline, "timeout")
+
+        self.waiting[key] = waiting + 1
+        try:
+            action, version = await asyncio.wait_for(endpoint.decide(state), remaining)
+        except asyncio.TimeoutError:
+            return self.fallback(key, state, deadline, "timeout")
+        finally:
+            self.waiting[key] -= 1
+        return action, version, None
+
+    async def decide_many(self, endpoint, payloads, states, started):
+        """Bulk decide: one budget (the tightest deadline) and one queue check for all tasks."""
+        key = endpoint.key
+        deadlines = [task_deadline(payload, state) for payload, state in zip(payloads, states)]
+        waiting = self.waiting.get(key, 0)
+        remaining = self.budget(min(deadlines)) - (time.perf_counter() - started)
+        if waiting + len(states) > self.max_queue:
+            reason = "overload"
+        elif remaining <= 0:
+            reason = "timeout"
+        else:
+            self.waiting[key] = waiting + len(states)
+            try:
+                actions, version = await asyncio.wait_for(endpoint.decide_many(states), remaining)
+                return actions, version, None
+            except asyncio.TimeoutError:
+                reason = "timeout"
+            finally:
+                self.waiting[key] -= len(states)
+        actions = [self.fallback(key, state, deadline, reason)[0] for state, deadline in zip(states, deadlines)]
+        return actions, 0, reason
+
+    def counters(self):
+        """Metrics collector: fallbacks per model and reason, current queue depth."""
+        for (key, reason), count in self.fallbacks.items():
+            yield "inference_fallbacks_total", (("model", key), ("reason", reason)), count
+        for key, waiting in self.waiting.items():
+            yield "inference_queue_depth", (("model", key),), waiting
@@ -0,0 +1,135 @@
+"""
+Async Line Server
+-----------------
+Purpose:
+    Shared asyncio TCP front-end for the inference servers. Accepts many
+    simultaneous connections, reads newline-delimited requests (the Java
+    clients send one JSON object per `println`) and hands each line to an
+    async handler, writing the reply back followed by a newline.
+
+Binary frames:
+    If a `frame_handler` is given, every request whose first byte is the
+    binary magic (see serving/protocol.py) is read as a length-prefixed frame
+    instead of a line, and the handler's reply frame is written back as-is.
+
+Notes:
+    - A connection may carry any number of requests. The Java clients send one
+      and close; load generators can keep the socket open and send more.
+    - Requests on the same connection are answered in order.
+    - Several listeners (e.g. the gateway's per-model legacy ports) can share
+      one event loop through `run_servers`.
+    - Handlers must not run model inference on the event loop; see
+      InferenceService.run_blocking in serving/service.py.
+    - accept / recv / send / total times and connection counts go to the
+      `metrics` registry (serving/metrics.py), labelled with the listener name.
+    - In a pre-forked worker (serving/prefork.py) a listener accepts on the
+      socket the parent bound for its (host, port), or binds with
+      SO_REUSEPORT when REUSE_PORT is set.
+"""
+
+import asyncio
+import logging
+import time
+
+from serving import protocol
+from serving.metrics import Metrics
+
+log = logging.getLogger(__name__)
+
+MAX_LINE_BYTES = protocol.MAX_PAYLOAD_BYTES  # Longest accepted request line (bulk requests)
+LISTEN_BACKLOG = 1024       # Pending connections queued by the kernel
+
+INHERITED_SOCKETS = {}      # (host, port) -> listening socket bound by a pre-fork parent
+REUSE_PORT = False          # Pre-fork workers binding their own SO_REUSEPORT sockets
+
+
+class AsyncLineServer:
+    def __init__(self, handler, host, port, name="Inference", frame_handler=None, metrics=None):
+        self.handler = handler              # async (line bytes) -> bytes | None
+        self.frame_handler = frame_handler  # async (msg_type, model, payload) -> frame bytes
+        self.host = host
+        self.port = port
+        self.name = name
+        self.metrics = metrics or Metrics()
+        self._listener = (("listener", name.lower()),)
+        self._stages = {stage: self._listener + (("stage", stage),) for stage in ("accept", "recv", "send", "total")}
+
+    async def _read_frame(self, reader, first):
+        header = first + await reader.readexactly(protocol.HEADER.size - 1)
+        msg_type, model, length = protocol.read_header(header)
+        return msg_type, model, await reader.readexactly(length)
+
+    async def _serve_client(self, reader, writer):
+        metrics, stages = self.metrics, self._stages
+        metrics.inc("inference_connections_total", self._listener)
+        metrics.inc("inference_open_connections", self._listener)
+        waiting_since = time.perf_counter()   # accept: connection -> first request byte
+        try:
+            while True:
+                first = await reader.read(1)
+                if not first:
+                    break               # Client closed the connection
+                started = time.perf_counter()
+                if waiting_since is not None:
+                    metrics.observe("inference_transport_seconds", started - waiting_since, stages["accept"])
+                    waiting_since = None
+
+                if first[0] == protocol.MAGIC and self.frame_handler is not None:
+                    request = await self._read_frame(reader, first)
+                    received = time.perf_counter()
+                    reply = await self.frame_handler(*request)
+                else:
+                    try:
+                        line = (first + await reader.readline()).strip()
+                    except ValueError:
+                        log.warning(f"❌ Request line exceeds {MAX_LINE_BYTES} bytes, closing connection")
+                        break
+                    if not line:
+                        continue
+                    received = time.perf_counter()
+                    reply = await self.handler(line)
+                    if reply is None:
+                        continue
+                    reply += b"\n"
+
+                handled = time.perf_counter()
+                writer.write(reply)
+                await writer.drain()
+                sent = time.perf_counter()
+                metrics.observe("inference_transport_seconds", received - started, stages["recv"])
+                metrics.observe("inference_transport_seconds", sent - handled, stages["send"])
+                metrics.observe("inference_transport_seconds", sent - started, stages["total"])
+        except asyncio.IncompleteReadError:
+            pass                        # Connection closed mid-frame
+        except ValueError as e:
+            log.warning(f"{e}, closing connection")
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            metrics.inc("inference_open_connections", self._listener, -1)
+            writer.close()
+
+    async def serve_forever(self):
+        sock = INHERITED_SOCKETS.get((self.host, self.port))
+        if sock is not None:
+            server = await asyncio.start_server(self._serve_client, sock=sock, limit=MAX_LINE_BYTES)
+        else:
+            server = await asyncio.start_server(
+                self._serve_client, self.host, self.port,
+                limit=MAX_LINE_BYTES, backlog=LISTEN_BACKLOG, reuse_port=REUSE_PORT or None,
+            )
+        print(f"✅ {self.name} async server running on {self.host}:{self.port}...")
+        async with server:
+            await server.serve_forever()
+
+
+def run_servers(*servers):
+    """Run one or more listeners on a single event loop until Ctrl+C."""
+
+    async def serve_all():
+        await asyncio.gather(*(server.serve_forever() for server in servers))
+
+    try:
+        asyncio.run(serve_all())
+    except KeyboardInterrupt:
+        print("❌ Server manually stopped.")
@@ -0,0 +1,102 @@
+"""
+Micro-Batcher
+-------------
+Purpose:
+    Collects the states of concurrent requests for a short window and runs a
+    single batched predict over a stacked (N, STATE_DIM) array, then hands each
+    caller its own action. One PyTorch dispatch per batch instead of per task.
+
+Window:
+    A batch is closed when it holds `max_batch_size` states or when
+    `max_delay_us` microseconds have passed since its first state arrived,
+    whichever comes first. With max_delay_us=0 the batcher only groups
+    requests that were already queued, so a lone request is never delayed.
+
+Notes:
+    - While one batch is running predict, new requests keep queueing, so under
+      load the next batch naturally grows towards max_batch_size.
+    - If the batched predict raises, every caller in that batch gets the error.
+    - States whose caller has already given up (cancelled, e.g. by admission
+      control) are dropped before predict, so an overloaded server sheds them.
+    - With a `metrics` registry, each batch records its size and predict time
+      under the endpoint's model key.
+    - With tagged=True, predict_batch returns (actions, tag) and every caller
+      gets (action, tag); endpoints use it to report which model version
+      answered.
+"""
+
+import asyncio
+import time
+
+import numpy as np
+
+from serving.metrics import BATCH_BUCKETS
+
+
+class MicroBatcher:
+    def __init__(self, predict_batch, run_blocking, max_batch_size=64, max_delay_us=200, metrics=None, model="",
+                 tagged=False):
+        self.predict_batch = predict_batch  # (N, STATE_DIM) float32 -> (N,) actions [, tag]
+        self.tagged = tagged
+        self.run_blocking = run_blocking    # async helper that offloads to the thread pool
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_delay = max(0, int(max_delay_us)) / 1e6
+        self.batches = 0                    # Number of predict calls issued
+        self.items = 0                      # Number of states served
+        self.metrics = metrics
+        self._model = (("model", model),)
+        self._predict_stage = self._model + (("stage", "predict"),)
+        self._queue = None
+        self._worker = None
+
+    async def submit(self, state):
+        """Queue one state and wait for its action."""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((state, future))
+        return await future
+
+    def _drain(self, batch):
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            self._drain(batch)
+            if len(batch) < self.max_batch_size and self.max_delay > 0:
+                await asyncio.sleep(self.max_delay)
+                self._drain(batch)
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+
+            states = np.stack([state for state, _ in batch])
+            started = time.perf_counter()
+            try:
+                result = await self.run_blocking(self.predict_batch, states)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            actions, tag = result if self.tagged else (result, None)
+            self.count_batch(len(batch), time.perf_counter() - started)
+            for (_, future), action in zip(batch, actions):
+                if not future.done():       # Caller may have gone away
+                    future.set_result((int(action), tag) if self.tagged else int(action))
+
+    def count_batch(self, size, seconds):
+        """Account for one predict call (also used by bulk requests, which bypass the queue)."""
+        self.batches += 1
+        self.items += size
+        if self.metrics is not None:
+            self.metrics.observe("inference_stage_seconds", seconds, self._predict_stage)
+            self.metrics.observe("inference_batch_size", size, self._model, BATCH_BUCKETS)
+
+    @property
+    def mean_batch_size(self):
+        return self.items / self.batches if self.batches else 0.0
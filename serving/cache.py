@@ -0,0 +1,84 @@
+"""
+Decision Cache
+--------------
+Purpose:
+    Optional LRU cache of model decisions keyed by a quantized state vector.
+    The simulator draws cpu/mem demand from narrow ranges and PPOClient
+    already rounds every feature to 5 decimals, so many requests repeat the
+    same (or nearly the same) state. A hit returns the cached cloud index and
+    skips inference entirely.
+
+Quantization:
+    key = round(state / quantum) per feature. `quantum` is one float for all
+    features or one per feature, e.g. "0.01,0.01,1,0.01,0.01" ignores the
+    arrival-time feature almost entirely. quantum=1e-5 only merges states
+    that PPOClient would have printed identically.
+
+Notes:
+    - Bounded to `max_entries`; the least recently used entry is evicted.
+    - `invalidate()` drops every entry and bumps `generation`. Endpoints call
+      it whenever their model changes, and results computed under an older
+      generation are never stored.
+    - With PPO's stochastic predict, a cached state always gets the action
+      that was sampled first.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+
+def parse_quantum(text):
+    """'0.001' -> 0.001, '0.01,0.01,1,0.01,0.01' -> float32 array."""
+    values = [float(v) for v in str(text).split(",") if v.strip()]
+    if not values or any(v <= 0 for v in values):
+        raise ValueError(f"❌ Cache quantum must be positive, got '{text}'")
+    return values[0] if len(values) == 1 else np.array(values, dtype=np.float32)
+
+
+class DecisionCache:
+    def __init__(self, max_entries=100_000, quantum=1e-3):
+        self.max_entries = int(max_entries)
+        self.quantum = quantum
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.generation = 0
+        self._entries = OrderedDict()
+
+    def key(self, state):
+        return np.rint(np.asarray(state, dtype=np.float64) / self.quantum).astype(np.int64).tobytes()
+
+    def get(self, key):
+        action = self._entries.get(key)
+        if action is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return action
+
+    def put(self, key, action, generation):
+        if generation != self.generation:
+            return                      # Computed by a model that has since been replaced
+        self._entries[key] = action
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self):
+        self._entries.clear()
+        self.generation += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "hit_rate": round(self.hit_rate, 4)}
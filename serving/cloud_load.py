@@ -0,0 +1,181 @@
+"""
+Live Per-Cloud Load
+-------------------
+Purpose:
+    Tracks how busy each cloud is from the decisions the server makes, so
+    the fifth state feature (always 0.0 from processTupleArrival) and the
+    heuristics can see real backlog instead of FCFScheduler's random
+    "fakeUtil". Every update is O(1): no per-task lists are scanned.
+
+Per cloud:
+    busy_until      projected time the cloud finishes everything placed on it
+                    (one FIFO queue per cloud; a task starts at
+                    max(arrival, busy_until) and runs cpuDemand / MIPS seconds)
+    backlog         outstanding work, max(0, busy_until - now) seconds
+    cost rate       exponentially decayed cost per second over `cost_window`
+
+Updates:
+    - Each answered request places its task on the chosen cloud with the
+      execution time and cost of the task model (or the ones the client
+      reports, when it sends an outcome with the request).
+    - A later request for a task_id placed in the last `max_pending`
+      decisions that reports execution_time / cost (sla_met YES / NO)
+      corrects the estimate by the difference instead of placing it again.
+
+Non-finite input:
+    States with NaN / infinity are rejected by protocol.parse_state and
+    ignored here too, as are NaN / Infinity in reported execution_time and
+    cost, so one bad request cannot poison busy_until or the cost rates.
+
+Clock:
+    "task" uses the client's simulation time (state[2] * 1000, never going
+    backwards), "wall" the server's monotonic clock.
+
+Usage:
+    python ppo-server/ppo_training_server.py --cloud-load                     # metrics + heuristics
+    python ppo-server/ppo_training_server.py --cloud-load --cloud-load-state  # also fill state[4]
+
+Notes:
+    - With --cloud-load-state, state[4] = total backlog / 10 (the scale of
+      state[3] = sla / 10) is written before inference. The shipped models
+      were trained with 0 there, so retrain before relying on it; cache keys
+      include it, so the decision cache hits less often.
+    - One tracker per process is shared by every model of the gateway (they
+      place tasks on the same clouds); with --processes N each worker only
+      sees the tasks it answered.
+"""
+
+import math
+import time
+from collections import OrderedDict
+
+from simulation.task_model import CLOUD_MIPS, CLOUD_NAMES, CLOUD_RATE_PER_MIPS
+
+CLOCKS = ("task", "wall")
+REPORTED = ("YES", "NO")
+MIPS = tuple(float(mips) for mips in CLOUD_MIPS)
+RATES = tuple(float(rate) for rate in CLOUD_RATE_PER_MIPS)
+
+
+def _number(value):
+    """Finite float, else 0.0 (a reported NaN / Infinity must not reach the running sums)."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return number if math.isfinite(number) else 0.0
+
+
+class CloudLoad:
+    def __init__(self, clock="task", cost_window=60.0, max_pending=65536, fill_state=False):
+        if clock not in CLOCKS:
+            raise ValueError(f"clock must be one of {CLOCKS}, got '{clock}'")
+        self.clock = clock
+        self.cost_window = cost_window
+        self.max_pending = max_pending
+        self.fill_state = fill_state
+        n = len(CLOUD_NAMES)
+        self.busy_until = [0.0] * n
+        self.cost_rate = [0.0] * n      # Decayed to `cost_updated`
+        self.cost_updated = [0.0] * n
+        self.placed = [0] * n
+        self.now = 0.0
+        self.pending = OrderedDict()    # task_id -> (cloud, exec_time, cost) still open to a report
+        self._started = time.monotonic()
+
+    # ---- clock ----
+    def advance(self, state=None):
+        """Move the clock to this request's time (never backwards) and return it."""
+        if self.clock == "wall":
+            self.now = time.monotonic() - self._started
+        elif state is not None and math.isfinite(float(state[2])):
+            self.now = max(self.now, float(state[2]) * 1000.0)
+        return self.now
+
+    # ---- reads ----
+    def backlog(self, now=None):
+        """Outstanding work per cloud in seconds."""
+        now = self.now if now is None else now
+        return [max(0.0, busy - now) for busy in self.busy_until]
+
+    def cost_rates(self, now=None):
+        """Decayed cost per second per cloud."""
+        now = self.now if now is None else now
+        return [rate * math.exp(-max(0.0, now - updated) / self.cost_window)
+                for rate, updated in zip(self.cost_rate, self.cost_updated)]
+
+    def finish_times(self, cpu_demand, now=None):
+        """Projected completion time of a task with this cpuDemand on each cloud."""
+        now = self.now if now is None else now
+        return [max(busy, now) + cpu_demand / mips for busy, mips in zip(self.busy_until, MIPS)]
+
+    def least_loaded(self, cpu_demand, now=None):
+        """Cloud that would finish this task first (the real getLeastLoadedCloudIndex)."""
+        finish = self.finish_times(cpu_demand, now)
+        return finish.index(min(finish))
+
+    def fill(self, state):
+        """Write the load feature into state[4] in place (with fill_state) and return the state."""
+        self.advance(state)
+        if self.fill_state:
+            state[4] = sum(self.backlog()) / 10.0
+        return state
+
+    # ---- updates ----
+    def _add_cost(self, cloud, cost):
+        decay = math.exp(-max(0.0, self.now - self.cost_updated[cloud]) / self.cost_window)
+        self.cost_rate[cloud] = self.cost_rate[cloud] * decay + cost / self.cost_window
+        self.cost_updated[cloud] = self.now
+
+    def place(self, cloud, exec_time, cost, task_id=None):
+        """Queue a task on `cloud` at the current time (non-finite times / costs are ignored)."""
+        if not (math.isfinite(exec_time) and math.isfinite(cost)):
+            return
+        self.busy_until[cloud] = max(self.busy_until[cloud], self.now) + exec_time
+        self._add_cost(cloud, cost)
+        self.placed[cloud] += 1
+        if task_id is not None:
+            self.pending[task_id] = (cloud, exec_time, cost)
+            if len(self.pending) > self.max_pending:
+                self.pending.popitem(last=False)
+
+    def report(self, task_id, exec_time, cost):
+        """Correct an earlier placement with the measured outcome; False if the task is unknown."""
+        if not (math.isfinite(exec_time) and math.isfinite(cost)):
+            return False
+        placed = self.pending.pop(task_id, None)
+        if placed is None:
+            return False
+        cloud, estimated_exec, estimated_cost = placed
+        self.busy_until[cloud] += exec_time - estimated_exec
+        self._add_cost(cloud, cost - estimated_cost)
+        return True
+
+    def record(self, model, payload, state, action):
+        """Observer hook: account for one answered request (errors are ignored)."""
+        if action < 0 or state is None or not all(math.isfinite(float(value)) for value in state):
+            return
+        self.advance(state)
+        task_id = payload.get('task_id') if isinstance(payload, dict) else None
+        exec_time = _number(payload.get('execution_time')) if isinstance(payload, dict) else 0.0
+        reported = exec_time > 0 and str(payload.get('sla_met', "PENDING")).upper() in REPORTED
+        if reported and self.report(task_id, exec_time, _number(payload.get('cost'))):
+            return
+        if reported:
+            cost = _number(payload.get('cost'))
+        else:
+            cpu_demand = float(state[0]) * 10000.0
+            exec_time = cpu_demand / MIPS[action]
+            cost = cpu_demand * RATES[action] / 10000.0
+        self.place(action, exec_time, cost, task_id)
+
+    def counters(self):
+        """Metrics collector: per-cloud backlog, cost rate and placements."""
+        for name, backlog, rate, placed in zip(CLOUD_NAMES, self.backlog(), self.cost_rates(), self.placed):
+            labels = (("cloud", name),)
+            yield "inference_cloud_backlog_seconds", labels, round(backlog, 6)
+            yield "inference_cloud_cost_rate", labels, round(rate, 6)
+            yield "inference_cloud_placements_total", labels, placed
+
+    def close(self):
+        pass
@@ -0,0 +1,302 @@
+"""
+Decision Log
+------------
+Purpose:
+    Append-only record of every request a server answers: the decision plus
+    everything PPOClient already sends (task_id, state, reward, done,
+    next_state, cost, sla_met, sla_deadline, execution_time). Records are
+    fixed-width NumPy structured rows written in bulk, so readers memory-map
+    the files instead of parsing CSV.
+
+Layout (one directory per log):
+    schema.json             record dtype, bytes per record, format version
+    segment-000001.dlog     headerless RECORD_DTYPE rows, append-only
+    segment-000002.dlog     next segment once the previous one holds
+    ...                     `segment_records` rows (or after a restart)
+    worker-0/ ...           same layout per worker with --processes N
+
+Record (little-endian, packed, 77 bytes):
+    timestamp f8 (unix s) | model u1 (protocol.MODEL_IDS) | action i2 (-1 = error) |
+    task_id i8 | state 5*f4 | reward f4 | done u1 | next_state 5*f4 | cost f4 |
+    sla_met u1 (0=NO 1=YES 2=PENDING) | sla_deadline f4 | execution_time f4
+
+Write path:
+    `record()` only appends a tuple to an in-memory list under a lock. A
+    background thread turns full batches (or whatever is pending every
+    `flush_interval` seconds) into one structured array and writes it with a
+    single write() call, rotating segments as they fill.
+
+Usage:
+    python ppo-server/ppo_training_server.py --decision-log logs/ppo
+    python -m serving.decision_log logs/ppo                          # summary
+    python -m serving.decision_log logs/ppo --export-columns ppo.cols --export-csv ppo_log.csv
+
+    from serving.decision_log import read_log, to_training_columns, to_log_frame
+    records = read_log("logs/ppo")        # memory-mapped segments, concatenated view
+    cols = to_training_columns(records)   # same layout as Google Colab/columnar_dataset.py
+    df = to_log_frame(records)            # dashboard CSV schema
+
+Notes:
+    - A partially written record at the end of the active segment is ignored
+      by the reader.
+    - A task_id that is not an integer is recorded as -1; a request that
+      cannot be recorded at all is skipped on its own, not with its batch.
+    - PPOClient sends its request before the outcome is known, so reward is 0
+      and sla_met is PENDING in those rows; to_log_frame leaves SLAMet empty.
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from serving import protocol  # noqa: E402
+
+log = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+RECORD_DTYPE = np.dtype([("timestamp", "<f8"), ("model", "u1"), ("action", "<i2")] + protocol.DECIDE_DTYPE.descr)
+SEGMENT_PATTERN = "segment-{:06d}.dlog"
+MODEL_CODES = {name: code for code, name in protocol.MODEL_IDS.items() if name}
+PENDING = protocol.SLA_CODES["PENDING"]
+
+
+def _vector(raw, fallback):
+    """Optional next_state field (stringified or plain list) -> 5 floats."""
+    if raw is None:
+        return fallback
+    try:
+        return protocol.parse_state(raw)
+    except (ValueError, TypeError):
+        return fallback
+
+
+def _number(payload, key):
+    try:
+        return float(payload.get(key) or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _task_id(payload):
+    """Integer task_id; -1 when the client sent something that is not one (e.g. "T-7")."""
+    value = payload.get('task_id') or 0
+    try:
+        number = float(value)
+        return int(number) if number.is_integer() and abs(number) < 2 ** 63 else -1
+    except (TypeError, ValueError):
+        return -1
+
+
+def build_records(items):
+    """[(timestamp, model, action, payload dict, state)] -> RECORD_DTYPE array (bad items are skipped)."""
+    records = np.zeros(len(items), dtype=RECORD_DTYPE)
+    zeros = np.zeros(protocol.STATE_DIM, dtype=np.float32)
+    kept = 0
+    for timestamp, model, action, payload, state in items:
+        state = zeros if state is None else state
+        try:
+            records[kept] = (
+                timestamp, MODEL_CODES.get(model, 0), action,
+                _task_id(payload), state, _number(payload, 'reward'), bool(payload.get('done')),
+                _vector(payload.get('next_state'), state), _number(payload, 'cost'),
+                protocol.SLA_CODES.get(str(payload.get('sla_met', "PENDING")).upper(), PENDING),
+                _number(payload, 'sla_deadline'), _number(payload, 'execution_time'),
+            )
+            kept += 1
+        except Exception as e:     # One malformed request must not cost the rest of the batch
+            log.warning(f"⚠️ Decision log skipped a record: {e}")
+    return records[:kept]
+
+
+class DecisionLog:
+    def __init__(self, directory, segment_records=1 << 20, batch_records=4096, flush_interval=1.0):
+        self.directory = directory
+        self.segment_records = max(1, int(segment_records))
+        self.batch_records = max(1, int(batch_records))
+        self.flush_interval = flush_interval
+        self.records_written = 0
+        os.makedirs(directory, exist_ok=True)
+        self._write_schema()
+
+        existing = sorted(glob.glob(os.path.join(directory, "segment-*.dlog")))
+        self._segment = int(os.path.basename(existing[-1])[8:14]) if existing else 0
+        self._file = None
+        self._segment_count = 0
+
+        self._lock = threading.Lock()
+        self._pending = []
+        self._batches = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="decision-log", daemon=True)
+        self._writer.start()
+
+    def _write_schema(self):
+        schema = {"version": FORMAT_VERSION, "record_bytes": RECORD_DTYPE.itemsize,
+                  "dtype": [list(field) for field in RECORD_DTYPE.descr]}
+        with open(os.path.join(self.directory, "schema.json"), "w") as f:
+            json.dump(schema, f, indent=2)
+
+    def record(self, model, payload, state, action):
+        """Queue one request (called on the request path; no I/O, no conversion)."""
+        item = (time.time(), model, action, payload, state)
+        with self._lock:
+            self._pending.append(item)
+            if len(self._pending) < self.batch_records:
+                return
+            batch, self._pending = self._pending, []
+        self._batches.put(batch)
+
+    def _take_pending(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        return batch
+
+    def _run(self):
+        while True:
+            try:
+                batch = self._batches.get(timeout=self.flush_interval)
+            except queue.Empty:
+                batch = self._take_pending()
+            if batch is None:
+                break
+            if batch:
+                self._write_batch(batch)
+        self._write_batch(self._take_pending())
+        if self._file is not None:
+            self._file.close()
+
+    def _write_batch(self, batch):
+        try:
+            self._write(build_records(batch))
+        except Exception as e:
+            log.error(f"❌ Decision log write failed, {len(batch)} records dropped: {e}")
+
+    def _write(self, records):
+        while len(records):
+            if self._file is None or self._segment_count >= self.segment_records:
+                self._rotate()
+            room = self.segment_records - self._segment_count
+            chunk, records = records[:room], records[room:]
+            self._file.write(chunk.tobytes())
+            self._file.flush()
+            self._segment_count += len(chunk)
+            self.records_written += len(chunk)
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+        self._segment += 1
+        self._segment_count = 0
+        self._file = open(os.path.join(self.directory, SEGMENT_PATTERN.format(self._segment)), "ab")
+
+    def close(self):
+        """Write everything still pending and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._batches.put(None)
+        self._writer.join()
+
+
+# ---------------- Reader ----------------
+
+def segment_paths(directory):
+    """Segments of a log, then those of its worker-*/ subdirectories (pre-forked servers)."""
+    paths = sorted(glob.glob(os.path.join(directory, "segment-*.dlog")))
+    return paths + sorted(glob.glob(os.path.join(directory, "worker-*", "segment-*.dlog")))
+
+
+def read_segments(directory):
+    """One read-only memory map per segment (whole records only)."""
+    maps = []
+    for path in segment_paths(directory):
+        count = os.path.getsize(path) // RECORD_DTYPE.itemsize
+        if count:
+            maps.append(np.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(count,)))
+    return maps
+
+
+def read_log(directory):
+    """All records; a single segment stays memory-mapped, several are concatenated."""
+    maps = read_segments(directory)
+    if not maps:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return maps[0] if len(maps) == 1 else np.concatenate(maps)
+
+
+def to_training_columns(records):
+    """Columns in the columnar_dataset.py layout (state, next_state, action, reward, done, ...)."""
+    return {
+        "state": np.ascontiguousarray(records["state"]),
+        "next_state": np.ascontiguousarray(records["next_state"]),
+        "action": records["action"].astype(np.int64),
+        "reward": np.ascontiguousarray(records["reward"]),
+        "done": records["done"].astype(bool),
+        "sla_met": records["sla_met"] == protocol.SLA_CODES["YES"],
+        "cpu_cost": np.ascontiguousarray(records["cost"]),
+    }
+
+
+def to_log_frame(records):
+    """Dashboard log schema (TaskID, SelectedCloud, ..., SLAMet) from decision records."""
+    import pandas as pd
+    start = records["state"][:, 2].astype(np.float64) * 1000  # state[2] = start / 1000
+    sla = np.array(["NO", "YES", ""], dtype=object)[np.minimum(records["sla_met"], PENDING)]
+    return pd.DataFrame({
+        "TaskID": records["task_id"],
+        "SelectedCloud": records["action"],
+        "StartTime": start,
+        "EndTime": start + records["execution_time"],
+        "ExecutionTime": records["execution_time"],
+        "CPUCost": records["cost"],
+        "SLADuration": records["sla_deadline"],
+        "SLAMet": sla,
+    })
+
+
+def export_columns(records, out_dir, source=None):
+    """Write .npy columns + meta.json, loadable with columnar_dataset.load_columnar()."""
+    cols = to_training_columns(records)
+    os.makedirs(out_dir, exist_ok=True)
+    for name, values in cols.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), values)
+    with open(os.path.join(out_dir, "meta.json"), "w") as f:
+        json.dump({"rows": int(len(records)), "columns": sorted(cols), "source": source}, f, indent=2)
+    return out_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or export a decision log directory")
+    parser.add_argument("directory")
+    parser.add_argument("--export-columns", help="Write training columns (.npy + meta.json) here")
+    parser.add_argument("--export-csv", help="Write the dashboard CSV schema here")
+    args = parser.parse_args()
+
+    records = read_log(args.directory)
+    valid = records[records["action"] >= 0]
+    print(f"📦 {len(records)} records in {len(segment_paths(args.directory))} segment(s), "
+          f"{len(records) - len(valid)} errors")
+    for name, code in MODEL_CODES.items():
+        rows = valid[valid["model"] == code]
+        if len(rows):
+            usage = np.bincount(rows["action"], minlength=3)
+            print(f"🧠 {name.upper()}: {len(rows)} decisions, clouds {usage.tolist()}")
+    if args.export_columns:
+        export_columns(valid, args.export_columns, source=os.path.abspath(args.directory))
+        print(f"✅ Training columns written to {args.export_columns}")
+    if args.export_csv:
+        to_log_frame(valid).to_csv(args.export_csv, index=False)
+        print(f"✅ Log CSV written to {args.export_csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+SB3 -> NumPy Weight Exporter
+----------------------------
+Purpose:
+    Reads the policy network out of a Stable-Baselines3 zip (policy.pth) and
+    writes the layers needed for inference to a compact .npz file that
+    serving/numpy_policy.py can run without torch.
+
+Usage (from the repository root):
+    python -m serving.export_weights                      # all three bundled models
+    python -m serving.export_weights ppo-server/ppo_v2.zip -o /tmp/ppo.npz
+    python -m serving.export_weights --check "Google Colab/Datasets/ppo_training_dataset_cleaned_5f.csv"
+
+Notes:
+    - Only the exporter needs torch (to unpickle policy.pth); the exported
+      file is plain arrays.
+    - Actor-critic policies (PPO/A2C) export mlp_extractor.policy_net + action_net,
+      DQN exports the online q_net (not the target net).
+    - Activation defaults follow SB3 (Tanh for actor-critic, ReLU for DQN)
+      unless the saved policy_kwargs override activation_fn.
+    - --check loads the SB3 model too and asserts both backends pick the same
+      deterministic action on every state in the given dataset(s).
+"""
+
+import argparse
+import io
+import json
+import os
+import re
+import zipfile
+
+import numpy as np
+
+from serving.numpy_policy import NumpyPolicy
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BUNDLED_MODELS = [
+    os.path.join(ROOT, "ppo-server", "ppo_v2.zip"),
+    os.path.join(ROOT, "A2C-server", "a2c_from_ppo_model_v2.zip"),
+    os.path.join(ROOT, "DQN-server", "dqn_v1.zip"),
+]
+ACTIVATION_NAMES = {"Tanh": "tanh", "ReLU": "relu"}
+
+
+def _sequential_layers(state_dict, prefix):
+    """Collect (W, b) for prefix.0, prefix.2, ... in index order."""
+    pattern = re.compile(re.escape(prefix) + r"\.(\d+)\.weight$")
+    indices = sorted(int(m.group(1)) for key in state_dict if (m := pattern.match(key)))
+    return [(state_dict[f"{prefix}.{i}.weight"], state_dict[f"{prefix}.{i}.bias"]) for i in indices]
+
+
+def _activation(data, default):
+    kwargs = data.get("policy_kwargs") or {}
+    for name, short in ACTIVATION_NAMES.items():
+        if name in str(kwargs.get("activation_fn", "")):
+            return short
+    return default
+
+
+def export_policy(zip_path):
+    """Build a NumpyPolicy from the weights stored in an SB3 zip."""
+    import torch  # Only the exporter depends on torch
+
+    with zipfile.ZipFile(zip_path) as archive:
+        data = json.loads(archive.read("data"))
+        state_dict = torch.load(io.BytesIO(archive.read("policy.pth")), map_location="cpu", weights_only=True)
+    algo = "a2c" if "a2c" in os.path.basename(zip_path).lower() else "ppo"
+    return policy_from_state_dict(state_dict, data.get("policy_kwargs"), algo, source=zip_path)
+
+
+def policy_from_sb3(model, algo):
+    """NumpyPolicy copy of an already loaded SB3 model's network."""
+    return policy_from_state_dict(model.policy.state_dict(), model.policy_kwargs, algo, source=algo.upper())
+
+
+def policy_from_state_dict(state_dict, policy_kwargs, actor_critic_algo, source=""):
+    """Layers of an SB3 policy state_dict -> NumpyPolicy (DQN is detected from the layout)."""
+    state_dict = {k: v.detach().cpu().numpy() if hasattr(v, "detach") else np.asarray(v)
+                  for k, v in state_dict.items()}
+    data = {"policy_kwargs": policy_kwargs}
+
+    if "action_net.weight" in state_dict:
+        layers = _sequential_layers(state_dict, "mlp_extractor.policy_net")
+        layers.append((state_dict["action_net.weight"], state_dict["action_net.bias"]))
+        algo, activation = actor_critic_algo, _activation(data, "tanh")
+    elif "q_net.q_net.0.weight" in state_dict:
+        layers = _sequential_layers(state_dict, "q_net.q_net")
+        algo, activation = "dqn", _activation(data, "relu")
+    else:
+        raise ValueError(f"❌ Unsupported policy layout in {source}: {sorted(state_dict)[:4]}...")
+
+    # torch Linear stores (out, in); the NumPy forward pass uses x @ W
+    return NumpyPolicy([(W.T, b) for W, b in layers], activation, algo)
+
+
+def load_sb3(zip_path, algo):
+    from stable_baselines3 import A2C, DQN, PPO
+    cls = {"ppo": PPO, "a2c": A2C, "dqn": DQN}[algo]
+    return cls.load(zip_path, custom_objects={"lr_schedule": lambda _: 0.0003})
+
+
+def dataset_states(csv_path):
+    """StateVec column as (N, 5) arrays, raw and min-max normalized, stacked."""
+    import pandas as pd
+    col = pd.read_csv(csv_path, usecols=["StateVec"])["StateVec"]
+    raw = col.str.strip("[]").str.split(",", expand=True).astype(np.float32)
+    raw = raw.reindex(columns=range(5)).fillna(0.0).to_numpy()  # Pad short vectors like fivefeatures.py
+    span = raw.max(axis=0) - raw.min(axis=0)
+    normalized = (raw - raw.min(axis=0)) / np.where(span > 0, span, 1.0)
+    return np.vstack([raw, normalized.astype(np.float32)])
+
+
+def check_against_sb3(policy, zip_path, states):
+    model = load_sb3(zip_path, policy.algo)
+    expected, _ = model.predict(states, deterministic=True)
+    got = policy.predict_batch(states, deterministic=True)
+    mismatches = int((np.asarray(expected).reshape(-1) != got).sum())
+    print(f"{'✅' if mismatches == 0 else '❌'} {policy.algo.upper()}: {mismatches} mismatches on {len(states)} states")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export SB3 policy weights to a torch-free .npz")
+    parser.add_argument("models", nargs="*", default=BUNDLED_MODELS, help="SB3 .zip files")
+    parser.add_argument("-o", "--output", help="Output path (single model only; default: <zip>.npz)")
+    parser.add_argument("--check", action="append", default=[], metavar="CSV",
+                        help="Dataset with a StateVec column to compare actions against SB3")
+    args = parser.parse_args()
+    if args.output and len(args.models) != 1:
+        parser.error("--output needs exactly one model")
+
+    states = np.vstack([dataset_states(path) for path in args.check]) if args.check else None
+    failed = 0
+    for zip_path in args.models:
+        out_path = args.output or os.path.splitext(zip_path)[0] + ".npz"
+        policy = export_policy(zip_path)
+        policy.save(out_path)
+        print(f"✅ Exported {zip_path} -> {out_path} ({policy.algo}, {policy.activation}, "
+              f"{len(policy.layers)} layers)")
+        if states is not None:
+            failed += check_against_sb3(NumpyPolicy.load(out_path), zip_path, states) > 0
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Request Metrics
+---------------
+Purpose:
+    Cheap in-process counters and histograms for the async servers, and a
+    small text endpoint that serves them in the Prometheus exposition format
+    on a separate local port (--metrics-port).
+
+Metrics:
+    inference_requests_total{model,format}         requests answered (json / binary)
+    inference_errors_total{model,format}           requests answered with an error
+    inference_bulk_tasks_total{model,format}       tasks scheduled through bulk requests
+    inference_transport_seconds{listener,stage}    accept (connection -> first byte),
+                                                   recv (first byte -> full request),
+                                                   send (reply write + drain),
+                                                   total (first byte -> reply sent)
+    inference_stage_seconds{model,stage}           decode (JSON / frame), validate (state),
+                                                   decide (cache + batch wait + predict),
+                                                   predict (one batched predict call)
+    inference_batch_size{model}                    states per batched predict
+    inference_cache_{hits,misses,evictions}_total  per model, when the cache is on
+    inference_connections_total{listener}          accepted connections
+    inference_open_connections{listener}           currently open connections
+    inference_model_version{model}                 version currently served
+    inference_model_reloads_total{model,result}    hot reloads: loaded, rejected, rolled_back
+    inference_fallbacks_total{model,reason}        heuristic replies (with --admission): overload, timeout
+    inference_queue_depth{model}                   requests waiting on the model (with --admission)
+    inference_cloud_backlog_seconds{cloud}         outstanding work per cloud (with --cloud-load)
+    inference_cloud_cost_rate{cloud}               decayed cost per second (with --cloud-load)
+    inference_cloud_placements_total{cloud}        tasks placed per cloud (with --cloud-load)
+    inference_online_buffer_size{model}            replay buffer fill (with --online)
+    inference_online_policy_version{model}         policies published (with --online)
+
+Usage:
+    python ppo-server/ppo_training_server.py --metrics-port 9100 --log-level warning
+    curl -s localhost:9100/metrics
+
+Notes:
+    - Everything is updated from the event loop thread, so no locks are needed.
+    - Histogram buckets are fixed; an observation is one bisect and two adds.
+"""
+
+import asyncio
+import bisect
+
+LATENCY_BUCKETS = (25e-6, 50e-6, 100e-6, 250e-6, 500e-6, 1e-3, 2.5e-3, 5e-3,
+                   10e-3, 25e-3, 50e-3, 100e-3, 250e-3, 1.0)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+HELP = {
+    "inference_requests_total": ("counter", "Requests answered"),
+    "inference_errors_total": ("counter", "Requests answered with an error"),
+    "inference_bulk_tasks_total": ("counter", "Tasks scheduled through bulk requests"),
+    "inference_transport_seconds": ("histogram", "Socket-side time per request stage"),
+    "inference_stage_seconds": ("histogram", "Processing time per request stage"),
+    "inference_batch_size": ("histogram", "States per batched predict"),
+    "inference_cache_hits_total": ("counter", "Decision cache hits"),
+    "inference_cache_misses_total": ("counter", "Decision cache misses"),
+    "inference_cache_evictions_total": ("counter", "Decision cache evictions"),
+    "inference_connections_total": ("counter", "Accepted connections"),
+    "inference_open_connections": ("gauge", "Currently open connections"),
+    "inference_model_version": ("gauge", "Model version currently served"),
+    "inference_model_reloads_total": ("counter", "Hot reload attempts by result"),
+    "inference_fallbacks_total": ("counter", "Requests answered by the fallback heuristic"),
+    "inference_queue_depth": ("gauge", "Requests waiting on the model"),
+    "inference_cloud_backlog_seconds": ("gauge", "Outstanding work per cloud in seconds"),
+    "inference_cloud_cost_rate": ("gauge", "Decayed cost per second per cloud"),
+    "inference_cloud_placements_total": ("counter", "Tasks placed per cloud"),
+    "inference_online_buffer_size": ("gauge", "Transitions in the online replay buffer"),
+    "inference_online_policy_version": ("counter", "Policies published by the online learner"),
+}
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}" if labels else ""
+
+
+class Metrics:
+    def __init__(self):
+        self.values = {}        # (name, labels) -> counter / gauge value
+        self.histograms = {}    # (name, labels) -> Histogram
+        self.collectors = []    # callables yielding (name, labels, value) at render time
+
+    def inc(self, name, labels=(), amount=1):
+        key = (name, labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def observe(self, name, value, labels=(), buckets=LATENCY_BUCKETS):
+        histogram = self.histograms.get((name, labels))
+        if histogram is None:
+            histogram = self.histograms[(name, labels)] = Histogram(buckets)
+        histogram.observe(value)
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    def render(self):
+        """All metrics in the Prometheus text format."""
+        series = {}
+        for (name, labels), value in self.values.items():
+            series.setdefault(name, []).append((labels, value))
+        for collector in self.collectors:
+            for name, labels, value in collector():
+                series.setdefault(name, []).append((labels, value))
+        histograms = {}
+        for (name, labels), histogram in self.histograms.items():
+            histograms.setdefault(name, []).append((labels, histogram))
+
+        lines = []
+        for name in sorted(set(series) | set(histograms)):
+            kind, text = HELP.get(name, ("untyped", name))
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(series.get(name, [])):
+                lines.append(f"{name}{_labels(labels)} {value}")
+            for labels, histogram in sorted(histograms.get(name, []), key=lambda item: item[0]):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Plain-text metrics endpoint; answers any HTTP GET (or bare connection) with render()."""
+
+    def __init__(self, metrics, host, port):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+
+    async def _serve_client(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readline(), timeout=5)
+            is_http = request.startswith((b"GET", b"HEAD"))
+            while is_http and (await asyncio.wait_for(reader.readline(), timeout=5)).strip():
+                pass                # Skip HTTP headers up to the blank line
+            body = self.metrics.render().encode()
+            if is_http:
+                writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                             b"Content-Length: %d\r\n\r\n" % len(body))
+            writer.write(body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve_forever(self):
+        server = await asyncio.start_server(self._serve_client, self.host, self.port)
+        print(f"📈 Metrics endpoint on http://{self.host}:{self.port}/metrics")
+        async with server:
+            await server.serve_forever()
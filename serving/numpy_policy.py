@@ -0,0 +1,78 @@
+"""
+NumPy Policy Backend
+--------------------
+Purpose:
+    Torch-free forward pass for the exported PPO / A2C / DQN networks. The
+    servers only need a tiny MLP (5 -> 64 -> 64 -> 3) to pick a cloud, so the
+    weights are exported once from the SB3 zip (see serving/export_weights.py)
+    and evaluated here with a couple of matrix products.
+
+Weights file (.npz):
+    algo        "ppo" | "a2c" | "dqn"
+    activation  "tanh" | "relu"
+    W0, b0, W1, b1, ...   layers as (in, out) float32 matrices, last one is the
+                          action head (logits for PPO/A2C, Q-values for DQN)
+
+Notes:
+    - Deterministic actions are argmax over logits / Q-values, the same as
+      SB3's predict(..., deterministic=True).
+    - With deterministic=False, PPO/A2C sample from the categorical policy
+      (Gumbel-max over the logits), like SB3's stochastic predict. DQN is
+      always greedy here (no epsilon exploration at serving time).
+    - `predict(obs, deterministic)` mirrors the SB3 signature so the legacy
+      blocking loops can use either backend.
+"""
+
+import numpy as np
+
+ACTIVATIONS = {
+    "tanh": np.tanh,
+    "relu": lambda x: np.maximum(x, 0.0),
+}
+
+
+class NumpyPolicy:
+    def __init__(self, layers, activation, algo, deterministic=True, seed=None):
+        self.layers = [(np.ascontiguousarray(W, dtype=np.float32), np.asarray(b, dtype=np.float32))
+                       for W, b in layers]
+        self.activation = activation
+        self.algo = algo
+        self.deterministic = deterministic
+        self._act = ACTIVATIONS[activation]
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def load(cls, path, deterministic=True):
+        with np.load(path, allow_pickle=False) as data:
+            n_layers = sum(1 for name in data.files if name.startswith("W"))
+            layers = [(data[f"W{i}"], data[f"b{i}"]) for i in range(n_layers)]
+            return cls(layers, str(data["activation"]), str(data["algo"]), deterministic)
+
+    def save(self, path):
+        arrays = {"algo": np.array(self.algo), "activation": np.array(self.activation)}
+        for i, (W, b) in enumerate(self.layers):
+            arrays[f"W{i}"], arrays[f"b{i}"] = W, b
+        np.savez(path, **arrays)
+
+    def logits(self, states):
+        """Raw output of the action head: (N, n_actions)."""
+        h = np.asarray(states, dtype=np.float32).reshape(-1, self.layers[0][0].shape[0])
+        for W, b in self.layers[:-1]:
+            h = self._act(h @ W + b)
+        W, b = self.layers[-1]
+        return h @ W + b
+
+    def predict_batch(self, states, deterministic=None):
+        out = self.logits(states)
+        if deterministic is None:
+            deterministic = self.deterministic
+        if not deterministic and self.algo != "dqn":
+            out = out + self._rng.gumbel(size=out.shape).astype(np.float32)
+        return out.argmax(axis=1)
+
+    def predict(self, observation, deterministic=False):
+        """SB3-compatible signature (same default): returns (actions, None)."""
+        actions = self.predict_batch(observation, deterministic)
+        if np.ndim(observation) == 1:
+            return actions[0], None
+        return actions, None
@@ -0,0 +1,278 @@
+"""
+Online Learning
+---------------
+Purpose:
+    Keeps improving a served policy from live traffic without stopping the
+    server. Every answered request becomes a (state, action, reward)
+    transition in a bounded replay buffer; a background trainer thread
+    periodically updates its own copy of the network on samples from that
+    buffer and publishes the new weights to the endpoint in one reference
+    swap, so the next batched predict already uses them.
+
+Rewards:
+    PPOClient asks for a decision before the task runs, so its requests carry
+    reward 0 and sla_met "PENDING". `reward_source` decides what is learned:
+    - "client": only transitions whose sla_met is YES / NO (the client
+                reported the outcome) are used, with the client's reward.
+    - "model":  the reward is recomputed from the state and the chosen cloud
+                with the simulator's task model (simulation/task_model.py):
+                1 - 1.5 * (SLA missed) - cost / 10.
+    - "auto" (default): the client's reward when reported, else "model".
+    Each decision is treated as a one-step episode (no bootstrapping from
+    next_state), matching how the simulator scores a task.
+
+Updates (NumPy, on the exported network layers):
+    - PPO / A2C: advantage-weighted log-likelihood of the taken action
+      (advantage = reward - batch mean, normalized) plus an entropy bonus.
+    - DQN: regression of Q(state, action) towards the reward.
+    Adam, gradient norm clipped to 0.5, `updates` minibatches per round.
+
+Notes:
+    - The request path only appends a tuple under a lock; reward computation,
+      buffer inserts and training all happen on the trainer thread.
+    - Served weights become a NumPy forward pass even with --backend sb3
+      (the SB3 network is copied once with export_weights.policy_from_sb3).
+    - `save_path` writes each published policy as .npz via an atomic rename,
+      so a restart with --backend numpy --weights <path> resumes from it.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+
+import numpy as np
+
+from serving import protocol
+from serving.export_weights import policy_from_sb3
+from serving.numpy_policy import NumpyPolicy
+from simulation.task_model import evaluate, tasks_from_states
+
+log = logging.getLogger(__name__)
+
+REWARD_SOURCES = ("auto", "client", "model")
+MAX_GRAD_NORM = 0.5
+REPORTED = {"YES", "NO"}
+
+
+class ReplayBuffer:
+    """Fixed-capacity ring buffer of (state, action, reward)."""
+
+    def __init__(self, capacity, state_dim=protocol.STATE_DIM):
+        self.capacity = int(capacity)
+        self.states = np.zeros((self.capacity, state_dim), dtype=np.float32)
+        self.actions = np.zeros(self.capacity, dtype=np.int64)
+        self.rewards = np.zeros(self.capacity, dtype=np.float32)
+        self.size = 0
+        self._next = 0
+
+    def __len__(self):
+        return self.size
+
+    def add_batch(self, states, actions, rewards):
+        for start in range(0, len(states), self.capacity):
+            s, a, r = (x[start:start + self.capacity] for x in (states, actions, rewards))
+            idx = (self._next + np.arange(len(s))) % self.capacity
+            self.states[idx], self.actions[idx], self.rewards[idx] = s, a, r
+            self._next = int((self._next + len(s)) % self.capacity)
+            self.size = min(self.capacity, self.size + len(s))
+
+    def sample(self, n, rng):
+        idx = rng.integers(0, self.size, size=n)
+        return self.states[idx], self.actions[idx], self.rewards[idx]
+
+
+def transition_rewards(payloads, states, actions, source="auto"):
+    """Rewards for a batch of requests, and a mask of the transitions to keep."""
+    reported = np.array([str(p.get('sla_met', "PENDING")).upper() in REPORTED for p in payloads], dtype=bool)
+    client = np.array([float(p.get('reward') or 0.0) for p in payloads], dtype=np.float32)
+    if source == "client":
+        return client, reported
+    model = evaluate(tasks_from_states(states), actions)["reward"].astype(np.float32)
+    if source == "model":
+        return model, np.ones(len(payloads), dtype=bool)
+    return np.where(reported, client, model), np.ones(len(payloads), dtype=bool)
+
+
+def _forward(layers, x, act):
+    hiddens = [x]
+    for W, b in layers[:-1]:
+        h = hiddens[-1] @ W + b
+        hiddens.append(np.tanh(h) if act == "tanh" else np.maximum(h, 0.0))
+    W, b = layers[-1]
+    return hiddens[-1] @ W + b, hiddens
+
+
+def _backward(layers, hiddens, grad_out, act):
+    grads = [None] * len(layers)
+    g = grad_out
+    for i in range(len(layers) - 1, -1, -1):
+        h = hiddens[i]
+        grads[i] = (h.T @ g, g.sum(axis=0))
+        if i:
+            g = g @ layers[i][0].T
+            g = g * (1.0 - h * h) if act == "tanh" else g * (h > 0)
+    return grads
+
+
+class Adam:
+    def __init__(self, params, lr=3e-4, betas=(0.9, 0.999), eps=1e-8):
+        self.lr, self.betas, self.eps = lr, betas, eps
+        self.m = [np.zeros_like(p) for p in params]
+        self.v = [np.zeros_like(p) for p in params]
+        self.t = 0
+
+    def step(self, params, grads):
+        self.t += 1
+        b1, b2 = self.betas
+        for p, g, m, v in zip(params, grads, self.m, self.v):
+            m *= b1
+            m += (1 - b1) * g
+            v *= b2
+            v += (1 - b2) * g * g
+            m_hat = m / (1 - b1 ** self.t)
+            v_hat = v / (1 - b2 ** self.t)
+            p -= self.lr * m_hat / (np.sqrt(v_hat) + self.eps)
+
+
+def trainable_policy(policy, algo):
+    """NumpyPolicy copy of a served policy (NumpyPolicy or SB3Policy) to train and publish."""
+    if isinstance(policy, NumpyPolicy):
+        layers = [(W.copy(), b.copy()) for W, b in policy.layers]
+        return NumpyPolicy(layers, policy.activation, policy.algo, policy.deterministic)
+    trainable = policy_from_sb3(policy.model, algo)
+    trainable.deterministic = policy.deterministic
+    return trainable
+
+
+class OnlineLearner:
+    def __init__(self, endpoint, policy, reward_source="auto", capacity=50_000, batch_size=256, updates=20,
+                 interval=5.0, min_samples=512, lr=3e-4, ent_coef=0.01, save_path=None, seed=None):
+        if reward_source not in REWARD_SOURCES:
+            raise ValueError(f"❌ Unknown reward source '{reward_source}', expected one of {REWARD_SOURCES}")
+        self.endpoint = endpoint
+        self.algo = policy.algo
+        self.activation = policy.activation
+        self.deterministic = policy.deterministic
+        self.layers = [(W.copy(), b.copy()) for W, b in policy.layers]  # Trainer's private copy
+        self.reward_source = reward_source
+        self.buffer = ReplayBuffer(capacity)
+        self.batch_size = batch_size
+        self.updates = updates
+        self.interval = interval
+        self.min_samples = max(min_samples, batch_size)
+        self.ent_coef = ent_coef
+        self.save_path = save_path
+        self.optimizer = Adam([p for layer in self.layers for p in layer], lr=lr)
+        self.rng = np.random.default_rng(seed)
+        self.version = 0                # Published policies so far
+        self.last_loss = float("nan")
+
+        self._lock = threading.Lock()
+        self._pending = []
+        self._loop = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"online-{endpoint.key}", daemon=True)
+
+    # ---- request path ----
+    def record(self, model, payload, state, action):
+        """Observer hook: queue one answered request (other models and errors are ignored)."""
+        if model != self.endpoint.key or action < 0 or state is None:
+            return
+        if self._loop is None:          # First request: remember the serving loop, start training
+            self._loop = asyncio.get_running_loop()
+            self._thread.start()
+        with self._lock:
+            self._pending.append((payload, state, action))
+
+    # ---- trainer thread ----
+    def _drain(self):
+        with self._lock:
+            items, self._pending = self._pending, []
+        if not items:
+            return 0
+        payloads = [payload for payload, _, _ in items]
+        states = np.stack([state for _, state, _ in items]).astype(np.float32)
+        actions = np.array([action for _, _, action in items], dtype=np.int64)
+        rewards, keep = transition_rewards(payloads, states, actions, self.reward_source)
+        self.buffer.add_batch(states[keep], actions[keep], rewards[keep])
+        return int(keep.sum())
+
+    def _loss_grad(self, out, actions, rewards):
+        n = len(actions)
+        rows = np.arange(n)
+        if self.algo == "dqn":
+            err = out[rows, actions] - rewards
+            grad = np.zeros_like(out)
+            grad[rows, actions] = 2.0 * err / n
+            return float(np.mean(err ** 2)), grad
+
+        adv = rewards - rewards.mean()
+        adv = adv / (adv.std() + 1e-8)
+        z = out - out.max(axis=1, keepdims=True)
+        logp = z - np.log(np.exp(z).sum(axis=1, keepdims=True))
+        p = np.exp(logp)
+        entropy = -(p * logp).sum(axis=1)
+        loss = -np.mean(adv * logp[rows, actions]) - self.ent_coef * entropy.mean()
+        onehot = np.zeros_like(out)
+        onehot[rows, actions] = 1.0
+        grad = -(adv[:, None] * (onehot - p)) / n
+        grad += self.ent_coef * p * (logp + entropy[:, None]) / n
+        return float(loss), grad
+
+    def train_round(self):
+        """A few minibatch updates on the private copy; returns the mean loss."""
+        params = [p for layer in self.layers for p in layer]
+        losses = []
+        for _ in range(self.updates):
+            states, actions, rewards = self.buffer.sample(self.batch_size, self.rng)
+            out, hiddens = _forward(self.layers, states, self.activation)
+            loss, grad_out = self._loss_grad(out, actions, rewards)
+            grads = [g for pair in _backward(self.layers, hiddens, grad_out, self.activation) for g in pair]
+            norm = np.sqrt(sum(float((g * g).sum()) for g in grads))
+            if norm > MAX_GRAD_NORM:
+                grads = [g * (MAX_GRAD_NORM / norm) for g in grads]
+            self.optimizer.step(params, [g.astype(np.float32) for g in grads])
+            losses.append(loss)
+        self.last_loss = float(np.mean(losses))
+        return self.last_loss
+
+    def snapshot(self):
+        """Independent NumpyPolicy with the current trained weights."""
+        layers = [(W.copy(), b.copy()) for W, b in self.layers]
+        return NumpyPolicy(layers, self.activation, self.algo, self.deterministic)
+
+    def publish(self):
+        policy = self.snapshot()
+        if self.save_path:
+            tmp = self.save_path + ".tmp.npz"
+            policy.save(tmp)
+            os.replace(tmp, self.save_path)     # Readers never see a half-written file
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self.endpoint.set_policy, policy, "online")
+        else:
+            self.endpoint.set_policy(policy, "online")
+        self.version += 1
+        log.info("🔁 %s online policy v%d published (buffer %d, loss %.4f)",
+                 self.endpoint.key.upper(), self.version, len(self.buffer), self.last_loss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self._drain()
+                if len(self.buffer) >= self.min_samples:
+                    self.train_round()
+                    self.publish()
+            except Exception as e:
+                log.error(f"❌ Online update for {self.endpoint.key} failed: {e}")
+
+    def counters(self):
+        """Metrics collector: buffer size and published versions."""
+        labels = (("model", self.endpoint.key),)
+        yield "inference_online_buffer_size", labels, len(self.buffer)
+        yield "inference_online_policy_version", labels, self.version
+
+    def close(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
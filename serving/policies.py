@@ -0,0 +1,73 @@
+"""
+Policy Backends
+---------------
+Purpose:
+    Uniform batched interface over the loaded models:
+
+        policy.predict_batch(states)  # (N, STATE_DIM) float32 -> (N,) int actions
+
+    The micro-batcher and the server handlers only talk to this interface.
+
+Backends:
+    - sb3:   Stable-Baselines3 model loaded from the .zip (imports torch).
+    - numpy: weights exported by serving/export_weights.py, run by
+             serving/numpy_policy.py without importing torch at all.
+"""
+
+import os
+
+import numpy as np
+
+from serving.numpy_policy import NumpyPolicy
+
+BACKENDS = ("sb3", "numpy")
+
+
+class SB3Policy:
+    """Wraps a Stable-Baselines3 model (PPO, A2C or DQN)."""
+
+    def __init__(self, model, deterministic=True):
+        self.model = model
+        self.deterministic = deterministic
+
+    def predict_batch(self, states):
+        actions, _ = self.model.predict(states, deterministic=self.deterministic)
+        return np.asarray(actions).reshape(-1)
+
+
+MODEL_SUFFIXES = {"sb3": ".zip", "numpy": ".npz"}
+
+
+def model_file(model_path, backend="sb3", weights_path=None):
+    """File the backend actually loads: the SB3 zip, or its exported .npz."""
+    if backend == "numpy":
+        return weights_path or os.path.splitext(model_path)[0] + ".npz"
+    return model_path
+
+
+def load_model(algo, model_path, backend="sb3", weights_path=None):
+    """Load a model for `algo` ("ppo", "a2c", "dqn") with the chosen backend.
+
+    Both return objects expose SB3's predict(obs, deterministic), so the
+    legacy blocking loops work with either.
+    """
+    if backend == "numpy":
+        path = model_file(model_path, backend, weights_path)
+        model = NumpyPolicy.load(path)
+        print(f"✅ {algo.upper()} NumPy weights loaded from {path}")
+        return model
+
+    import stable_baselines3  # Deferred so the numpy backend never imports torch
+    algo_cls = getattr(stable_baselines3, algo.upper())
+    # lr_schedule override avoids SB3 load-time compatibility issues
+    model = algo_cls.load(model_path, custom_objects={"lr_schedule": lambda _: 0.0003})
+    print(f"✅ {algo.upper()} model loaded from {model_path}")
+    return model
+
+
+def as_policy(model, deterministic=True):
+    """Wrap a loaded model in the batched predict_batch interface."""
+    if isinstance(model, NumpyPolicy):
+        model.deterministic = deterministic
+        return model
+    return SB3Policy(model, deterministic)
@@ -0,0 +1,172 @@
+"""
+Pre-Forked Workers
+------------------
+Purpose:
+    Spreads inference over several cores. The parent process loads the
+    model(s) once, binds the listening sockets and forks `processes` workers.
+    Each worker inherits the loaded weights copy-on-write (no second torch
+    import or PPO.load) and runs the normal async server (event loop, micro-
+    batcher, predict thread pool) on the shared sockets. The parent only
+    supervises: it restarts workers that die and forwards SIGHUP / shutdown.
+
+Sockets:
+    - default:      the parent binds each port once; all workers accept on
+                    the same listening socket.
+    - reuse_port:   every worker binds its own socket with SO_REUSEPORT and
+                    the kernel balances new connections across them (Linux).
+
+Threads:
+    Each worker caps torch at `torch_threads` intra-op threads (default
+    cores // processes, at least 1), so N workers do not each start a
+    thread per core and oversubscribe the CPU.
+
+Usage:
+    python ppo-server/ppo_training_server.py --processes 4
+    python gateway-server/inference_gateway.py --processes 4 --reuse-port
+
+Notes:
+    - Per-worker state stays per worker: decision cache, micro-batches,
+      metrics (worker i serves --metrics-port + i) and the decision log
+      (<dir>/worker-i/, read back together by serving/decision_log.py).
+    - A worker that dies is forked again from the parent; crashes within a
+      second of starting back off exponentially (up to 30 s) instead of
+      looping.
+    - Ctrl+C / SIGTERM on the parent stops the workers with SIGTERM, which
+      they handle like Ctrl+C (logs flushed) before it exits.
+    - Needs os.fork (Linux / macOS).
+"""
+
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+
+from serving import async_server
+
+MIN_UPTIME = 1.0        # Seconds a worker must live for its exit not to count as a crash loop
+MAX_BACKOFF = 30.0
+STOP_TIMEOUT = 10.0
+
+
+def default_torch_threads(processes):
+    return max(1, (os.cpu_count() or 1) // max(1, processes))
+
+
+def set_torch_threads(threads):
+    """Cap torch's intra-op pool in this process (only if the sb3 backend imported torch)."""
+    torch = sys.modules.get("torch")
+    if torch is not None and threads > 0:
+        torch.set_num_threads(threads)
+
+
+def bind_sockets(addresses):
+    """(host, port) -> listening socket, bound once in the parent and shared by all workers."""
+    sockets = {}
+    for host, port in addresses:
+        sockets[(host, port)] = socket.create_server((host, port), backlog=async_server.LISTEN_BACKLOG)
+    return sockets
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def _worker_main(index, start_worker, sockets, reuse_port, torch_threads):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)    # Ctrl+C reaches the whole group; the parent coordinates
+    signal.signal(signal.SIGTERM, _interrupt)       # Graceful stop from the parent
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)    # Unless a reloader installs its own handler
+    set_torch_threads(torch_threads)
+    async_server.INHERITED_SOCKETS.update(sockets)
+    async_server.REUSE_PORT = reuse_port
+    start_worker(index)
+
+
+class Supervisor:
+    def __init__(self, start_worker, addresses, processes, reuse_port=False, torch_threads=0):
+        self.start_worker = start_worker    # index -> runs one worker's servers until stopped
+        self.processes = processes
+        self.reuse_port = reuse_port
+        self.torch_threads = torch_threads or default_torch_threads(processes)
+        self.sockets = {} if reuse_port else bind_sockets(addresses)
+        self.workers = {}                   # pid -> worker index
+        self.started = {}                   # worker index -> start time
+        self.crashes = {}                   # worker index -> consecutive quick exits
+        self.restarts = 0
+
+    def spawn(self, index):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _worker_main(index, self.start_worker, self.sockets, self.reuse_port, self.torch_threads)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                sys.stdout.flush()
+                os._exit(code)
+        self.workers[pid] = index
+        self.started[index] = time.monotonic()
+        return pid
+
+    def _forward_hup(self, signum, frame):
+        for pid in self.workers:
+            os.kill(pid, signal.SIGHUP)
+
+    def _restart_delay(self, index):
+        if time.monotonic() - self.started[index] >= MIN_UPTIME:
+            self.crashes[index] = 0
+            return 0.0
+        self.crashes[index] = self.crashes.get(index, 0) + 1
+        return min(MAX_BACKOFF, 0.5 * 2 ** (self.crashes[index] - 1))
+
+    def run(self):
+        """Fork the workers and restart them as they die, until Ctrl+C / SIGTERM."""
+        signal.signal(signal.SIGTERM, _interrupt)
+        signal.signal(signal.SIGHUP, self._forward_hup)
+        for index in range(self.processes):
+            self.spawn(index)
+        print(f"🍴 {self.processes} workers forked ({'SO_REUSEPORT' if self.reuse_port else 'shared socket'}, "
+              f"{self.torch_threads} torch thread(s) each)")
+        try:
+            while True:
+                pid, status = os.wait()
+                index = self.workers.pop(pid, None)
+                if index is None:
+                    continue
+                delay = self._restart_delay(index)
+                print(f"⚠️ Worker {index} (pid {pid}) exited with code {os.waitstatus_to_exitcode(status)}, "
+                      f"restarting{f' in {delay:g}s' if delay else ''}")
+                time.sleep(delay)
+                self.spawn(index)
+                self.restarts += 1
+        except KeyboardInterrupt:
+            self.stop()
+            print("❌ Server manually stopped.")
+
+    def stop(self):
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + STOP_TIMEOUT
+        while self.workers and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self.workers.pop(pid, None)
+            else:
+                time.sleep(0.05)
+        for pid in self.workers:            # Did not stop in time
+            os.kill(pid, signal.SIGKILL)
+        for sock in self.sockets.values():
+            sock.close()
+
+
+def serve_prefork(start_worker, addresses, processes, reuse_port=False, torch_threads=0):
+    Supervisor(start_worker, addresses, processes, reuse_port, torch_threads).run()
@@ -0,0 +1,274 @@
+"""
+Request Dialects & Binary Framing
+---------------------------------
+Purpose:
+    Parsing and reply formatting for the three JSON protocols the Java clients
+    speak, plus a compact length-prefixed binary format. Each server picks the
+    JSON dialect its client expects:
+
+    PPO  request {"state": "[0.62, 0.30, 0.12, 0.0, 0.45]", ...}   reply  1
+    A2C  request {"state": [0.72, 0.33, 0.15, 1.0, 0.28]}          reply  {"cloud": 1, "model_version": 2}
+    DQN  request {"state": [0.75, 0.45, 0.20, 1.0, 0.35]}          reply  {"action": 1, "model_version": 2}
+
+Binary frames (little-endian):
+    header   magic 0xCB | version u8 | msg_type u8 | model u8 | payload_len u32
+    DECIDE   task_id i64 | state 5*f32 | reward f32 | done u8 | next_state 5*f32 |
+             cost f32 | sla_met u8 (0=NO 1=YES 2=PENDING) | sla_deadline f32 |
+             execution_time f32                                     (66 bytes)
+    ACTION   task_id i64 | action i16 | model_version u32           (reply)
+    ERROR    task_id i64 | utf-8 message                            (reply)
+    DECIDE_BATCH   N DECIDE records back to back                    (N * 66 bytes)
+    ACTIONS        model_version u32 | N * (task_id i64 | action i16) (reply, action -1 = rejected task)
+
+Bulk JSON (any dialect):
+    request  {"model": "a2c", "tasks": [{"task_id": 7, "state": [...], "sla_deadline": 1.1}, ...]}
+    reply    {"model": "a2c", "model_version": 2,
+              "results": [{"task_id": 7, "action": 1}, {"task_id": 8, "error": "..."}]}
+    "model" is optional (pinned / default model). Results keep the request
+    order; a task that fails validation gets an "error" entry while the rest
+    are still scheduled.
+
+    `model` selects the gateway model (0 = default, see MODEL_IDS). The server
+    checks the first byte of every frame: 0xCB starts a binary frame, anything
+    else is a newline-terminated JSON line, so both formats can share a port
+    and even a connection.
+
+Notes:
+    - "state" is accepted both as a stringified list (PPOClient) and as a plain
+      JSON list (A2CClient / DQNClient) in every dialect.
+    - Errors are returned as {"error": "..."} in every dialect.
+    - JSON object replies and ACTION frames carry the version of the model
+      that made the decision (serving/reload.py). PPO's bare-integer reply
+      stays a bare integer because PPOClient parses it with Integer.parseInt.
+    - A decoded binary DECIDE becomes the same payload dict as a JSON request,
+      so everything after decoding is format-agnostic.
+    - A bulk request is at most MAX_BULK_TASKS tasks; its JSON line or frame
+      must also fit in MAX_PAYLOAD_BYTES.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+STATE_DIM = 5  # Expected length of input state vector
+
+
+def parse_state(raw_state):
+    """Convert a stringified or plain JSON list into a float32 state vector."""
+    if isinstance(raw_state, str):
+        raw_state = json.loads(raw_state)  # Double-encoded PPO format
+    state = np.array(raw_state, dtype=np.float32)
+    if state.shape != (STATE_DIM,):
+        raise ValueError(f"❌ Expected {STATE_DIM}-length state vector, got {state.size}")
+    return check_finite(state)
+
+
+def check_finite(state):
+    """The state itself, or ValueError if it holds NaN or infinity."""
+    if not np.isfinite(state).all():
+        raise ValueError("❌ State contains NaN or infinity")
+    return state
+
+
+class Dialect:
+    def __init__(self, name, response_key=None):
+        self.name = name
+        self.response_key = response_key  # None -> bare integer reply
+
+    def decode(self, data):
+        """Return (payload dict, state vector) for one request line."""
+        payload = json.loads(data)
+        return payload, parse_state(payload['state'])
+
+    def encode_action(self, action, model_version=None):
+        if self.response_key is None:
+            return str(int(action)).encode()
+        reply = {self.response_key: int(action)}
+        if model_version is not None:
+            reply['model_version'] = int(model_version)
+        return json.dumps(reply).encode()
+
+    def encode_error(self, message):
+        return json.dumps({'error': message}).encode()
+
+
+PPO = Dialect("ppo")
+A2C = Dialect("a2c", response_key="cloud")
+DQN = Dialect("dqn", response_key="action")
+
+
+# ---------------- Binary framing ----------------
+
+MAGIC = 0xCB
+VERSION = 1
+HEADER = struct.Struct("<BBBBI")    # magic, version, msg_type, model, payload_len
+MAX_PAYLOAD_BYTES = 1 << 20
+MAX_BULK_TASKS = 10_000
+
+MSG_DECIDE = 1
+MSG_ACTION = 2
+MSG_ERROR = 3
+MSG_DECIDE_BATCH = 4
+MSG_ACTIONS = 5
+
+MODEL_IDS = {0: None, 1: "ppo", 2: "a2c", 3: "dqn"}
+SLA_CODES = {"NO": 0, "YES": 1, "PENDING": 2}
+SLA_NAMES = {code: name for name, code in SLA_CODES.items()}
+
+DECIDE_DTYPE = np.dtype([
+    ("task_id", "<i8"), ("state", "<f4", STATE_DIM), ("reward", "<f4"), ("done", "u1"),
+    ("next_state", "<f4", STATE_DIM), ("cost", "<f4"), ("sla_met", "u1"),
+    ("sla_deadline", "<f4"), ("execution_time", "<f4"),
+])
+ACTION_REPLY = struct.Struct("<qhI")
+LEGACY_ACTION_REPLY = struct.Struct("<qh")  # Before model_version was added
+TASK_ID = struct.Struct("<q")
+ACTIONS_HEADER = struct.Struct("<I")        # model_version
+ACTION_DTYPE = np.dtype([("task_id", "<i8"), ("action", "<i2")])
+
+
+def frame(msg_type, payload, model=0):
+    return HEADER.pack(MAGIC, VERSION, msg_type, model, len(payload)) + payload
+
+
+def read_header(header_bytes):
+    """Return (msg_type, model id, payload length); raises on a bad header."""
+    magic, version, msg_type, model, length = HEADER.unpack(header_bytes)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"❌ Bad binary header (magic={magic:#x}, version={version})")
+    if length > MAX_PAYLOAD_BYTES:
+        raise ValueError(f"❌ Binary payload of {length} bytes exceeds {MAX_PAYLOAD_BYTES}")
+    return msg_type, model, length
+
+
+def decode_decide(payload_bytes):
+    """Binary DECIDE payload -> (payload dict, state vector), like Dialect.decode."""
+    if len(payload_bytes) != DECIDE_DTYPE.itemsize:
+        raise ValueError(f"❌ DECIDE payload must be {DECIDE_DTYPE.itemsize} bytes, got {len(payload_bytes)}")
+    record = np.frombuffer(payload_bytes, dtype=DECIDE_DTYPE, count=1)[0]
+    return record_payload(record), record['state'].copy()
+
+
+def parse_tasks(tasks):
+    """Bulk JSON "tasks" list -> (payload dicts, states or None, per-task error or None)."""
+    if not isinstance(tasks, list) or not tasks:
+        raise ValueError("❌ 'tasks' must be a non-empty list")
+    if len(tasks) > MAX_BULK_TASKS:
+        raise ValueError(f"❌ {len(tasks)} tasks exceed the bulk limit of {MAX_BULK_TASKS}")
+    payloads, states, errors = [], [], []
+    for task in tasks:
+        payload = task if isinstance(task, dict) else {}
+        try:
+            if not isinstance(task, dict):
+                raise ValueError("❌ Task must be an object")
+            states.append(parse_state(task['state']))
+            errors.append(None)
+        except (KeyError, TypeError, ValueError) as e:
+            states.append(None)
+            errors.append(f"❌ Missing {e}" if isinstance(e, KeyError) else str(e))
+        payloads.append(payload)
+    return payloads, states, errors
+
+
+def decode_decide_batch(payload_bytes):
+    """Binary DECIDE_BATCH payload -> structured array of DECIDE records (a copy)."""
+    if not payload_bytes or len(payload_bytes) % DECIDE_DTYPE.itemsize:
+        raise ValueError(f"❌ DECIDE_BATCH payload must be a multiple of {DECIDE_DTYPE.itemsize} bytes, "
+                         f"got {len(payload_bytes)}")
+    records = np.frombuffer(payload_bytes, dtype=DECIDE_DTYPE).copy()
+    if len(records) > MAX_BULK_TASKS:
+        raise ValueError(f"❌ {len(records)} tasks exceed the bulk limit of {MAX_BULK_TASKS}")
+    return records
+
+
+def record_payload(record):
+    """One DECIDE record -> the payload dict a JSON request would give."""
+    return {
+        'task_id': int(record['task_id']),
+        'reward': float(record['reward']),
+        'done': bool(record['done']),
+        'next_state': record['next_state'].copy(),
+        'cost': float(record['cost']),
+        'sla_met': SLA_NAMES.get(int(record['sla_met']), "PENDING"),
+        'sla_deadline': float(record['sla_deadline']),
+        'execution_time': float(record['execution_time']),
+    }
+
+
+def encode_decide_batch(task_ids, states, sla_deadlines=None, model=0):
+    """Client-side helper: one DECIDE_BATCH frame for many tasks (outcome fields left empty)."""
+    records = np.zeros(len(task_ids), dtype=DECIDE_DTYPE)
+    records['task_id'] = task_ids
+    records['state'] = states
+    records['sla_met'] = SLA_CODES["PENDING"]
+    if sla_deadlines is not None:
+        records['sla_deadline'] = sla_deadlines
+    return frame(MSG_DECIDE_BATCH, records.tobytes(), model)
+
+
+def encode_actions_frame(task_ids, actions, model_version=0):
+    replies = np.empty(len(task_ids), dtype=ACTION_DTYPE)
+    replies['task_id'] = task_ids
+    replies['action'] = actions
+    return frame(MSG_ACTIONS, ACTIONS_HEADER.pack(model_version) + replies.tobytes())
+
+
+def decode_actions(payload_bytes):
+    """Client-side helper: ACTIONS payload -> (model_version, task_ids, actions with -1 for rejected tasks)."""
+    (model_version,) = ACTIONS_HEADER.unpack_from(payload_bytes)
+    replies = np.frombuffer(payload_bytes, dtype=ACTION_DTYPE, offset=ACTIONS_HEADER.size)
+    return model_version, replies['task_id'], replies['action']
+
+
+def encode_decide(task_id, state, reward=0.0, done=False, next_state=None, cost=0.0,
+                  sla_met="PENDING", sla_deadline=0.0, execution_time=0.0, model=0):
+    """Client-side helper: build a complete DECIDE frame."""
+    record = np.zeros(1, dtype=DECIDE_DTYPE)
+    record['task_id'] = task_id
+    record['state'] = state
+    record['reward'] = reward
+    record['done'] = done
+    record['next_state'] = state if next_state is None else next_state
+    record['cost'] = cost
+    record['sla_met'] = SLA_CODES[sla_met]
+    record['sla_deadline'] = sla_deadline
+    record['execution_time'] = execution_time
+    return frame(MSG_DECIDE, record.tobytes(), model)
+
+
+def encode_action_frame(task_id, action, model_version=0):
+    return frame(MSG_ACTION, ACTION_REPLY.pack(task_id, action, model_version))
+
+
+def encode_error_frame(task_id, message):
+    return frame(MSG_ERROR, TASK_ID.pack(task_id) + message.encode())
+
+
+def decode_reply(msg_type, payload_bytes):
+    """Client-side helper: reply frame -> (task_id, action or None, error or None, model_version)."""
+    if msg_type == MSG_ACTION:
+        if len(payload_bytes) == LEGACY_ACTION_REPLY.size:
+            return (*LEGACY_ACTION_REPLY.unpack(payload_bytes), None, 0)
+        task_id, action, model_version = ACTION_REPLY.unpack(payload_bytes)
+        return task_id, action, None, model_version
+    (task_id,) = TASK_ID.unpack_from(payload_bytes)
+    return task_id, None, payload_bytes[TASK_ID.size:].decode(errors="replace"), 0
+
+
+def read_line(conn, max_bytes=64 * 1024):
+    """Blocking-socket helper: read one newline-terminated request (or up to EOF).
+
+    Replaces a single recv(), which can return half a message or two merged ones.
+    """
+    chunks = []
+    size = 0
+    while size < max_bytes:
+        chunk = conn.recv(4096)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+        if b"\n" in chunk:
+            break
+    return b"".join(chunks).split(b"\n", 1)[0].decode()
@@ -0,0 +1,230 @@
+"""
+Model Hot Reload
+----------------
+Purpose:
+    Swaps a served model for a new file without restarting the server. A
+    watcher thread polls a model file or directory (or is woken by SIGHUP),
+    loads the newest model in the background, validates it on a fixed sample
+    of simulator states and, only if it passes, swaps it into the endpoint on
+    the event loop. Requests keep using the old policy until that single
+    assignment, so clients never see a gap or a half-loaded model.
+
+Versions:
+    Every swap gets the endpoint's next version number. Replies carry it as
+    "model_version" (JSON objects) or in the ACTION frame, and
+    endpoint.history records the version, source file and activation time of
+    everything the endpoint has served.
+
+Rollback:
+    - A candidate that fails to load or to validate is never swapped in; the
+      current version keeps serving and the file is skipped until it changes.
+    - After a swap the new version is on probation for `probation` seconds:
+      if at least `min_failures` of its batched predicts raise and they are
+      more than `max_error_rate` of its batches, the previous version is
+      re-activated under its old number.
+
+Usage:
+    python ppo-server/ppo_training_server.py --reload-watch models/ppo/
+    kill -HUP <pid>        # check now; reloads the newest file even if unchanged
+    python gateway-server/inference_gateway.py --reload-watch ppo=models/ppo/ --reload-watch dqn=models/dqn/
+
+Notes:
+    - A directory is scanned for the newest *.zip (--backend sb3) or *.npz
+      (--backend numpy). Files modified less than `settle` seconds ago are
+      left until the copy has finished; writing elsewhere and mv-ing the file
+      in avoids the wait.
+    - Validation requires one integer action in [0, N_CLOUDS) per sample
+      state; with `min_agreement` > 0 that fraction of decisions must also
+      match the current model (only meaningful for deterministic models).
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from simulation.task_model import CLOUD_NAMES, TaskStream, build_states
+
+log = logging.getLogger(__name__)
+
+N_CLOUDS = len(CLOUD_NAMES)
+RESULTS = ("loaded", "rejected", "rolled_back")
+
+
+def sample_states(n=256, seed=0):
+    """Fixed validation batch: simulator states, identical on every run."""
+    return build_states(TaskStream(seed=seed).next_chunk(n))
+
+
+def validate(policy, states, reference=None, min_agreement=0.0):
+    """Raise ValueError if the policy's decisions are unusable; returns the agreement with `reference`."""
+    actions = np.asarray(policy.predict_batch(states))
+    if actions.shape != (len(states),):
+        raise ValueError(f"expected {len(states)} actions, got shape {actions.shape}")
+    if not np.issubdtype(actions.dtype, np.integer) and not np.all(np.mod(actions, 1) == 0):
+        raise ValueError(f"actions are not integers ({actions.dtype})")
+    if actions.min() < 0 or actions.max() >= N_CLOUDS:
+        raise ValueError(f"actions outside [0, {N_CLOUDS}): {sorted(set(actions.tolist()))}")
+    if reference is None:
+        return None
+    agreement = float(np.mean(actions == np.asarray(reference.predict_batch(states))))
+    if agreement < min_agreement:
+        raise ValueError(f"only {agreement:.1%} of decisions match the current model (< {min_agreement:.0%})")
+    return agreement
+
+
+class Watch:
+    """One endpoint's watched model file or directory."""
+
+    def __init__(self, endpoint, path, loader, suffix):
+        self.endpoint = endpoint
+        self.path = path
+        self.loader = loader            # path -> policy with predict_batch
+        self.suffix = suffix
+        self.previous = None            # (policy, version, source) to roll back to
+        self.probation = None           # (deadline, batches, failures) after a swap
+        self.results = dict.fromkeys(RESULTS, 0)
+        current = self.candidate(settle=0)
+        source = endpoint.history[-1]["source"]
+        # The file the server started with counts as loaded; anything else is picked up on the first poll
+        self.seen = current if current and source and os.path.abspath(source) == current[0] else None
+
+    def candidate(self, settle):
+        """(path, mtime_ns, size) of the newest model file older than `settle` seconds, or None."""
+        if os.path.isdir(self.path):
+            paths = [os.path.join(self.path, name) for name in os.listdir(self.path) if name.endswith(self.suffix)]
+        else:
+            paths = [self.path] if os.path.isfile(self.path) else []
+        stats = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue                # Replaced between listdir and stat
+            if time.time() - st.st_mtime >= settle:
+                stats.append((st.st_mtime_ns, os.path.abspath(path), st.st_size))
+        if not stats:
+            return None
+        mtime, path, size = max(stats)
+        return path, mtime, size
+
+
+class ModelReloader:
+    def __init__(self, watches, states=None, interval=2.0, settle=1.0, probation=30.0,
+                 max_error_rate=0.05, min_failures=3, min_agreement=0.0):
+        self.watches = list(watches)
+        self.states = sample_states() if states is None else states
+        self.interval = interval
+        self.settle = settle
+        self.probation = probation
+        self.max_error_rate = max_error_rate
+        self.min_failures = min_failures
+        self.min_agreement = min_agreement
+        self._loop = None
+        self._forced = False
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="model-reload", daemon=True)
+
+    def trigger(self):
+        """Check every watch now and reload its newest file even if it has not changed (SIGHUP)."""
+        self._forced = True
+        self._wake.set()
+
+    async def serve_forever(self):
+        """Runs next to the listeners in run_servers: owns the watcher thread and the SIGHUP handler."""
+        self._loop = asyncio.get_running_loop()
+        if hasattr(signal, "SIGHUP"):
+            self._loop.add_signal_handler(signal.SIGHUP, self.trigger)
+        self._thread.start()
+        for watch in self.watches:
+            print(f"🔄 {watch.endpoint.key.upper()} hot reload: watching {watch.path} for *{watch.suffix}")
+        try:
+            await asyncio.Event().wait()    # Until the server stops
+        finally:
+            self.close()
+
+    def _on_loop(self, fn, *args):
+        """Run fn on the event loop (where requests read the endpoint) and return its result."""
+        done = Future()
+
+        def run():
+            try:
+                done.set_result(fn(*args))
+            except Exception as e:
+                done.set_exception(e)
+
+        self._loop.call_soon_threadsafe(run)
+        return done.result(timeout=30)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            forced, self._forced = self._forced, False
+            for watch in self.watches:
+                if self._stop.is_set():
+                    return
+                try:
+                    self._check_probation(watch)
+                    self._poll(watch, forced)
+                except Exception as e:
+                    log.error(f"❌ {watch.endpoint.key.upper()} reload check failed: {e}")
+
+    def _poll(self, watch, forced):
+        candidate = watch.candidate(0 if forced else self.settle)
+        if candidate is None or (candidate == watch.seen and not forced):
+            return
+        watch.seen = candidate
+        endpoint, path = watch.endpoint, candidate[0]
+        key = endpoint.key.upper()
+        try:
+            policy = watch.loader(path)
+            reference = endpoint.policy if self.min_agreement > 0 else None
+            agreement = validate(policy, self.states, reference, self.min_agreement)
+        except Exception as e:
+            watch.results["rejected"] += 1
+            log.error(f"❌ {key} model {path} rejected, still serving v{endpoint.version}: {e}")
+            return
+
+        previous = (endpoint.policy, endpoint.version, endpoint.history[-1]["source"])
+        version = self._on_loop(endpoint.set_policy, policy, path)
+        watch.previous = previous
+        watch.probation = (time.monotonic() + self.probation, endpoint.batcher.batches, endpoint.predict_failures)
+        watch.results["loaded"] += 1
+        match = "" if agreement is None else f", {agreement:.1%} agreement"
+        log.warning(f"🔄 {key} v{version} live from {path} (was v{previous[1]}{match})")
+
+    def _check_probation(self, watch):
+        if watch.probation is None:
+            return
+        deadline, batches, failures = watch.probation
+        endpoint = watch.endpoint
+        failed = endpoint.predict_failures - failures
+        total = failed + endpoint.batcher.batches - batches
+        if failed >= self.min_failures and failed / total > self.max_error_rate:
+            policy, version, source = watch.previous
+            bad = endpoint.version
+            self._on_loop(endpoint.set_policy, policy, source, version)
+            watch.results["rolled_back"] += 1
+            watch.previous = watch.probation = None
+            log.error(f"❌ {endpoint.key.upper()} v{bad} failed {failed}/{total} batches, rolled back to v{version}")
+        elif time.monotonic() >= deadline:
+            watch.previous = watch.probation = None     # Passed; release the old model
+
+    def counters(self):
+        """Metrics collector: reload attempts per model and result."""
+        for watch in self.watches:
+            for result, count in watch.results.items():
+                yield "inference_model_reloads_total", (("model", watch.endpoint.key), ("result", result)), count
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join()
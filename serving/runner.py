@@ -0,0 +1,262 @@
+"""
+Server Runner
+-------------
+Purpose:
+    Common command-line flags and the async serving entry point shared by the
+    PPO, A2C and DQN server scripts. A script loads its model, wraps it in a
+    policy backend and calls `serve_async` with the dialect its Java client
+    speaks.
+
+Flow per request:
+    JSON line or binary frame -> parse state -> ModelEndpoint (DecisionCache -> MicroBatcher)
+         -> batched predict_batch -> dialect.encode_action -> reply line
+
+Monitoring:
+    --metrics-port N serves request counters and stage-timing histograms on a
+    separate local port (serving/metrics.py); --log-level warning turns off
+    the per-request log lines. --decision-log DIR records every request and
+    decision in a memory-mappable columnar log (serving/decision_log.py).
+
+Online learning:
+    --online keeps training each served model on its own traffic and swaps
+    in the updated weights every --online-interval seconds
+    (serving/online.py); --online-save writes each published policy to
+    <dir>/<model>_online.npz.
+
+Multi-core:
+    --processes N loads the model once and forks N workers sharing it and
+    the listening port (serving/prefork.py); a supervisor restarts workers
+    that die.
+
+Admission control:
+    --admission gives each request a latency budget from its sla_deadline
+    (--admission-budget-fraction, clamped to --admission-min-ms /
+    --admission-max-ms) and caps the requests waiting per model
+    (--admission-queue); past either limit the reply comes from a cheapest-
+    feasible-cloud heuristic and is counted in inference_fallbacks_total
+    (serving/admission.py).
+
+Cloud load:
+    --cloud-load tracks per-cloud backlog and cost rate from the decisions
+    (metrics, backlog-aware fallbacks); --cloud-load-state also writes the
+    load into state[4] before inference (serving/cloud_load.py).
+
+Hot reload:
+    --reload-watch PATH (or MODEL=PATH on the gateway) watches a model file
+    or directory and swaps in new models without a restart; SIGHUP forces a
+    check. Replies carry the serving "model_version" (serving/reload.py).
+"""
+
+import copy
+import logging
+import os
+
+from serving import protocol
+from serving.admission import AdmissionController
+from serving.async_server import run_servers
+from serving.cache import parse_quantum
+from serving.cloud_load import CLOCKS, CloudLoad
+from serving.decision_log import DecisionLog
+from serving.metrics import MetricsServer
+from serving.online import REWARD_SOURCES, OnlineLearner, trainable_policy
+from serving.prefork import serve_prefork
+from serving.policies import BACKENDS, MODEL_SUFFIXES, as_policy, load_model, model_file
+from serving.reload import ModelReloader, Watch
+from serving.service import InferenceService
+
+
+def add_server_arguments(parser, host, port):
+    parser.add_argument("--host", default=host)
+    parser.add_argument("--port", type=int, default=port)
+    parser.add_argument("--workers", type=int, default=4, help="Predict thread pool size (async mode)")
+    parser.add_argument("--batch-size", type=int, default=64,
+                        help="Max states per batched predict (1 disables batching)")
+    parser.add_argument("--batch-window-us", type=int, default=200,
+                        help="Max microseconds a state waits for its batch to fill")
+    parser.add_argument("--cache-size", type=int, default=0,
+                        help="Max cached decisions per model (0 disables the decision cache)")
+    parser.add_argument("--cache-quantum", type=parse_quantum, default=1e-3,
+                        help="State quantization step for cache keys, one value or one per feature")
+    parser.add_argument("--blocking", action="store_true", help="Use the legacy one-client-at-a-time loop")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Pre-forked worker processes sharing the port (1 = single process)")
+    parser.add_argument("--reuse-port", action="store_true",
+                        help="With --processes: each worker binds its own SO_REUSEPORT socket")
+    parser.add_argument("--torch-threads", type=int, default=0,
+                        help="Torch threads per worker with --processes (0 = cores / processes)")
+    parser.add_argument("--backend", choices=BACKENDS, default="sb3",
+                        help="sb3 = Stable-Baselines3/torch, numpy = exported .npz weights (no torch)")
+    parser.add_argument("--weights", default=None,
+                        help="Exported .npz for --backend numpy (default: model path with .npz suffix)")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="Serve Prometheus-style metrics on this local port (0 disables)")
+    parser.add_argument("--log-level", default="info", choices=("debug", "info", "warning", "error"),
+                        help="info logs every request; warning keeps only errors")
+    parser.add_argument("--decision-log", default=None,
+                        help="Directory for the append-only decision log (omit to disable)")
+    parser.add_argument("--decision-log-segment", type=int, default=1 << 20,
+                        help="Records per decision-log segment file before rotating")
+    parser.add_argument("--reload-watch", action="append", default=[], metavar="[MODEL=]PATH",
+                        help="Model file or directory to hot-reload from (repeat per model on the gateway)")
+    parser.add_argument("--reload-interval", type=float, default=2.0, help="Seconds between reload checks")
+    parser.add_argument("--reload-probation", type=float, default=30.0,
+                        help="Seconds a new model can still be rolled back on predict failures")
+    parser.add_argument("--reload-max-error-rate", type=float, default=0.05,
+                        help="Failed-batch fraction during probation that triggers a rollback")
+    parser.add_argument("--reload-min-agreement", type=float, default=0.0,
+                        help="Reject models agreeing with the current one on fewer sample decisions (0 = off)")
+    parser.add_argument("--admission", action="store_true",
+                        help="Answer from a fast heuristic when the model misses its latency budget or is overloaded")
+    parser.add_argument("--admission-queue", type=int, default=1024,
+                        help="Max requests (bulk: tasks) waiting on each model before falling back")
+    parser.add_argument("--admission-budget-fraction", type=float, default=0.01,
+                        help="Latency budget as a fraction of the request's sla_deadline")
+    parser.add_argument("--admission-min-ms", type=float, default=1.0, help="Lower bound of the latency budget")
+    parser.add_argument("--admission-max-ms", type=float, default=50.0,
+                        help="Upper bound of the latency budget (also used without a deadline)")
+    parser.add_argument("--cloud-load", action="store_true",
+                        help="Track live per-cloud backlog and cost rate from the served decisions")
+    parser.add_argument("--cloud-load-state", action="store_true",
+                        help="With --cloud-load: write the load into state[4] before inference")
+    parser.add_argument("--cloud-load-clock", choices=CLOCKS, default="task",
+                        help="task = client simulation time (state[2]), wall = server clock")
+    parser.add_argument("--cloud-load-window", type=float, default=60.0,
+                        help="Seconds the cost rate averages over")
+    parser.add_argument("--online", action="store_true",
+                        help="Keep training the served model(s) on live traffic")
+    parser.add_argument("--online-reward", choices=REWARD_SOURCES, default="auto",
+                        help="client = only reported outcomes, model = task-model reward, auto = both")
+    parser.add_argument("--online-buffer", type=int, default=50_000, help="Replay buffer capacity")
+    parser.add_argument("--online-batch", type=int, default=256, help="Minibatch size per update")
+    parser.add_argument("--online-updates", type=int, default=20, help="Minibatch updates per round")
+    parser.add_argument("--online-interval", type=float, default=5.0,
+                        help="Seconds between training rounds / policy swaps")
+    parser.add_argument("--online-lr", type=float, default=3e-4, help="Adam learning rate")
+    parser.add_argument("--online-save", default=None,
+                        help="Directory to write each published policy as <model>_online.npz")
+
+
+def monitoring_servers(service, args):
+    """Extra tasks to run next to the inference ports (metrics endpoint, model reloader)."""
+    servers = []
+    if args.metrics_port:
+        servers.append(MetricsServer(service.metrics, args.host, args.metrics_port))
+    if args.reload_watch:
+        servers.append(build_reloader(service, args))
+    return servers
+
+
+def parse_watch(spec, service):
+    """'models/ppo' -> (default endpoint, path); 'dqn=models/dqn' -> (dqn endpoint, path)."""
+    key, sep, path = spec.partition("=")
+    key = key.lower()
+    if not sep or key not in protocol.MODEL_IDS.values():
+        return service.endpoints[service.default_key], spec
+    if key not in service.endpoints:
+        raise SystemExit(f"❌ --reload-watch {spec}: model '{key}' is not loaded")
+    return service.endpoints[key], path
+
+
+def build_reloader(service, args):
+    watches = []
+    for spec in args.reload_watch:
+        endpoint, path = parse_watch(spec, service)
+        deterministic = getattr(endpoint.policy, "deterministic", True)
+
+        def loader(model_path, key=endpoint.key, deterministic=deterministic):
+            return as_policy(load_model(key, model_path, args.backend, model_path), deterministic)
+
+        watches.append(Watch(endpoint, path, loader, MODEL_SUFFIXES[args.backend]))
+    reloader = ModelReloader(watches, interval=args.reload_interval, probation=args.reload_probation,
+                             max_error_rate=args.reload_max_error_rate, min_agreement=args.reload_min_agreement)
+    service.metrics.add_collector(reloader.counters)
+    return reloader
+
+
+def attach_online_learners(service, args):
+    """With --online, one OnlineLearner per loaded model, registered as a service observer."""
+    if not args.online:
+        return []
+    if args.online_save:
+        os.makedirs(args.online_save, exist_ok=True)
+    learners = []
+    for key, endpoint in service.endpoints.items():
+        save_path = os.path.join(args.online_save, f"{key}_online.npz") if args.online_save else None
+        learner = OnlineLearner(endpoint, trainable_policy(endpoint.policy, key),
+                                reward_source=args.online_reward, capacity=args.online_buffer,
+                                batch_size=args.online_batch, updates=args.online_updates,
+                                interval=args.online_interval, lr=args.online_lr, save_path=save_path)
+        service.add_observer(learner)
+        learners.append(learner)
+        print(f"🔁 Online learning for {key.upper()}: reward '{args.online_reward}', "
+              f"update every {args.online_interval:g}s")
+    return learners
+
+
+def check_arguments(args):
+    if args.online and args.reload_watch:
+        raise SystemExit("❌ --online and --reload-watch both replace the served policy; pick one")
+    if args.processes > 1 and args.online:
+        raise SystemExit("❌ --online trains one copy per process; use it with --processes 1")
+
+
+def worker_arguments(args, index):
+    """Per-worker copy of the flags: own metrics port and decision-log subdirectory."""
+    args = copy.copy(args)
+    if args.metrics_port:
+        args.metrics_port += index
+    if args.decision_log:
+        args.decision_log = os.path.join(args.decision_log, f"worker-{index}")
+    return args
+
+
+def run_workers(start, args, addresses):
+    """start(args) in this process, or in --processes pre-forked workers sharing `addresses`."""
+    check_arguments(args)
+    if args.processes <= 1:
+        start(args)
+        return
+    serve_prefork(lambda index: start(worker_arguments(args, index)), addresses, args.processes,
+                  reuse_port=args.reuse_port, torch_threads=args.torch_threads)
+
+
+def build_service(args):
+    logging.basicConfig(level=args.log_level.upper(), format="%(message)s")
+    decision_log = None
+    if args.decision_log:
+        decision_log = DecisionLog(args.decision_log, segment_records=args.decision_log_segment)
+        print(f"📝 Decision log: {args.decision_log}")
+    cloud_load = admission = None
+    if args.cloud_load or args.cloud_load_state:
+        cloud_load = CloudLoad(args.cloud_load_clock, args.cloud_load_window, fill_state=args.cloud_load_state)
+        print(f"☁️ Cloud load tracking ({args.cloud_load_clock} clock"
+              f"{', fills state[4]' if args.cloud_load_state else ''})")
+    if args.admission:
+        admission = AdmissionController(args.admission_queue, args.admission_budget_fraction,
+                                        args.admission_min_ms, args.admission_max_ms, cloud_load)
+        print(f"⚡ Admission control: budget {args.admission_budget_fraction:g} x sla_deadline "
+              f"in [{args.admission_min_ms:g}, {args.admission_max_ms:g}] ms, queue {args.admission_queue}")
+    return InferenceService(workers=args.workers, batch_size=args.batch_size,
+                            batch_window_us=args.batch_window_us,
+                            cache_size=args.cache_size, cache_quantum=args.cache_quantum,
+                            decision_log=decision_log, admission=admission,
+                            cloud_load=cloud_load)
+
+
+def serve_async(policy, dialect, args, name):
+    """Serve a single model with micro-batched inference until interrupted."""
+    source = model_file(getattr(args, "model", ""), args.backend, args.weights)
+
+    def start(args):
+        service = build_service(args)
+        service.add_model(name.lower(), policy, dialect, source=source)
+        attach_online_learners(service, args)
+        print(f"✅ Micro-batching up to {args.batch_size} states / {args.batch_window_us} µs")
+        if args.cache_size > 0:
+            print(f"✅ Decision cache: {args.cache_size} entries, quantum {args.cache_quantum}")
+        try:
+            run_servers(service.listener(args.host, args.port, name), *monitoring_servers(service, args))
+        finally:
+            service.close()
+
+    run_workers(start, args, [(args.host, args.port)])
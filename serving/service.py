@@ -0,0 +1,378 @@
+"""
+Inference Service
+-----------------
+Purpose:
+    Routes decoded requests to one or more loaded models. Every model is a
+    ModelEndpoint with its own micro-batcher (batches never mix models), while
+    the thread pool and the event loop are shared by all of them. The single
+    model servers use one endpoint; the gateway hosts PPO, A2C and DQN.
+
+Routing:
+    - {"model": "a2c", "state": [...]}  -> a2c endpoint,
+      reply {"model": "a2c", "action": 1, "model_version": 1}
+    - {"state": [...]}                  -> default endpoint,
+      reply in that endpoint's legacy dialect ("1", {"cloud": 1}, {"action": 1})
+    - `listener(..., pinned_key=key)` pins a listener to one endpoint, so an old Java
+      client can talk to the gateway on its own port unchanged.
+    - Binary DECIDE frames pick the model with the header's model byte
+      (0 = default / pinned) and are answered with an ACTION or ERROR frame.
+
+Bulk requests:
+    {"tasks": [...]} lines and DECIDE_BATCH frames schedule many tasks in one
+    round trip. The valid states go through one predict_batch call on the
+    thread pool (they already are a batch, so they skip the micro-batcher and
+    the decision cache); tasks that fail validation get their own error in
+    the reply instead of failing the request.
+
+Decision cache:
+    With cache_size > 0 each endpoint keeps its own DecisionCache (see
+    serving/cache.py). Hits return before the batcher; `set_policy` swaps
+    the model and invalidates the cache in one step.
+
+Model versions:
+    Each endpoint numbers the policies it has served (1 = the one it started
+    with) and keeps their history. The policy and its version are swapped as
+    one tuple, and a batch reads that tuple once, so every decision is
+    reported with the version that actually produced it: "model_version" in
+    JSON object replies and in ACTION frames (serving/reload.py swaps them).
+
+Metrics & logging:
+    Request / error counts, decode / validate / decide / predict times, batch
+    sizes and cache counters are recorded in `service.metrics` (see
+    serving/metrics.py). Per-request lines go to the "serving.service" logger
+    at INFO, so --log-level warning silences them under load.
+
+Admission control:
+    With an AdmissionController (serving/admission.py) every decision gets a
+    latency budget from the task's sla_deadline and a bounded queue; when
+    either runs out the reply comes from a fast heuristic instead, with
+    model_version 0 (and "fallback": reason in explicit-model JSON replies).
+
+Cloud load:
+    With a CloudLoad tracker (serving/cloud_load.py) every answered request
+    updates per-cloud backlog and cost rate, and with fill_state the load is
+    written into state[4] before the decision.
+
+Observers:
+    Every decoded request is passed to the registered observers as
+    record(model, payload, state, action), with action -1 on errors: the
+    DecisionLog (serving/decision_log.py) and OnlineLearner (serving/online.py)
+    both hook in here. Observers must only queue the data; they do their own
+    work on background threads.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from serving import protocol
+from serving.async_server import AsyncLineServer
+from serving.batching import MicroBatcher
+from serving.cache import DecisionCache
+from serving.metrics import Metrics
+
+log = logging.getLogger(__name__)
+
+
+class ModelEndpoint:
+    def __init__(self, key, policy, dialect, run_blocking, batch_size=64, batch_window_us=200, cache=None,
+                 metrics=None, source=""):
+        self.key = key
+        self.active = (policy, 1)       # (policy, version), replaced as a whole
+        self.history = [{"version": 1, "source": source, "activated": time.time()}]
+        self.dialect = dialect
+        self.cache = cache
+        self.run_blocking = run_blocking
+        self.predict_failures = 0       # Batched predicts that raised (for reload probation)
+        self.batcher = MicroBatcher(self.predict_batch, run_blocking, max_batch_size=batch_size,
+                                    max_delay_us=batch_window_us, metrics=metrics, model=key, tagged=True)
+        model = (("model", key),)
+        self.labels = {
+            "json": model + (("format", "json"),),
+            "binary": model + (("format", "binary"),),
+            **{stage: model + (("stage", stage),) for stage in ("decode", "validate", "decide")},
+        }
+
+    @property
+    def policy(self):
+        return self.active[0]
+
+    @property
+    def version(self):
+        return self.active[1]
+
+    def predict_batch(self, states):
+        policy, version = self.active
+        try:
+            return policy.predict_batch(states), version
+        except Exception:
+            self.predict_failures += 1
+            raise
+
+    def set_policy(self, policy, source="", version=None):
+        """Swap the model (call on the event loop); cached decisions of the old one are dropped.
+
+        `version` re-activates an earlier version (rollback); by default the
+        policy gets the next number. Returns the version now being served.
+        """
+        if version is None:
+            version = max(entry["version"] for entry in self.history) + 1
+        self.active = (policy, version)
+        self.history.append({"version": version, "source": source, "activated": time.time()})
+        if self.cache is not None:
+            self.cache.invalidate()
+        return version
+
+    async def decide(self, state):
+        """(action, model version) for one state."""
+        if self.cache is None:
+            return await self.batcher.submit(state)
+
+        key = self.cache.key(state)
+        action = self.cache.get(key)
+        if action is not None:
+            return action
+        generation = self.cache.generation
+        action = await self.batcher.submit(state)
+        self.cache.put(key, action, generation)
+        return action
+
+    async def decide_many(self, states):
+        """(actions, model version) for an (N, STATE_DIM) array in one predict call."""
+        started = time.perf_counter()
+        actions, version = await self.run_blocking(self.predict_batch, states)
+        self.batcher.count_batch(len(states), time.perf_counter() - started)   # Reload probation reads it
+        return np.asarray(actions, dtype=np.int64), version
+
+
+class InferenceService:
+    def __init__(self, workers=4, batch_size=64, batch_window_us=200, cache_size=0, cache_quantum=1e-3,
+                 metrics=None, decision_log=None, admission=None,
+                 cloud_load=None):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="predict")
+        self.batch_size = batch_size
+        self.batch_window_us = batch_window_us
+        self.cache_size = cache_size
+        self.cache_quantum = cache_quantum
+        self.endpoints = {}
+        self.default_key = None
+        self.metrics = metrics or Metrics()
+        self.metrics.add_collector(self._cache_counters)
+        self.metrics.add_collector(self._version_gauges)
+        self.admission = admission
+        if admission is not None:
+            self.metrics.add_collector(admission.counters)
+        self.observers = []
+        self.cloud_load = cloud_load
+        if cloud_load is not None:
+            self.add_observer(cloud_load)
+        if decision_log is not None:
+            self.add_observer(decision_log)
+
+    def add_observer(self, observer):
+        """Register an object with record(model, payload, state, action) and close()."""
+        self.observers.append(observer)
+        if hasattr(observer, "counters"):
+            self.metrics.add_collector(observer.counters)
+
+    def _observe(self, model, payload, state, action):
+        for observer in self.observers:
+            observer.record(model, payload, state, action)
+
+    def _cache_counters(self):
+        for key, endpoint in self.endpoints.items():
+            if endpoint.cache is not None:
+                labels = (("model", key),)
+                yield "inference_cache_hits_total", labels, endpoint.cache.hits
+                yield "inference_cache_misses_total", labels, endpoint.cache.misses
+                yield "inference_cache_evictions_total", labels, endpoint.cache.evictions
+
+    def _version_gauges(self):
+        for key, endpoint in self.endpoints.items():
+            yield "inference_model_version", (("model", key),), endpoint.version
+
+    async def run_blocking(self, fn, *args):
+        """Run a blocking call (e.g. model.predict) on the shared thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, *args)
+
+    def add_model(self, key, policy, dialect, default=False, source=""):
+        cache = DecisionCache(self.cache_size, self.cache_quantum) if self.cache_size > 0 else None
+        self.endpoints[key] = ModelEndpoint(key, policy, dialect, self.run_blocking,
+                                            self.batch_size, self.batch_window_us, cache, self.metrics, source)
+        if default or self.default_key is None:
+            self.default_key = key
+        return self.endpoints[key]
+
+    def _route(self, key, pinned_key):
+        """Endpoint for an explicit model key, else the pinned / default one."""
+        if pinned_key or key is None:
+            return self.endpoints[pinned_key or self.default_key]
+        if str(key).lower() not in self.endpoints:
+            raise ValueError(f"Unknown model '{key}', expected one of {sorted(self.endpoints)}")
+        return self.endpoints[str(key).lower()]
+
+    async def _decide(self, endpoint, payload, state, started):
+        """(action, version, fallback reason or None), through admission control if enabled."""
+        if self.cloud_load is not None:
+            self.cloud_load.fill(state)
+        if self.admission is None:
+            action, version = await endpoint.decide(state)
+            return action, version, None
+        return await self.admission.decide(endpoint, payload, state, started)
+
+    async def _decide_bulk(self, endpoint, payloads, states, started):
+        """Bulk version of _decide: (actions array, version, fallback reason or None)."""
+        if self.cloud_load is not None:
+            for state in states:
+                self.cloud_load.fill(state)
+        states = np.stack(states)
+        if self.admission is None:
+            actions, version = await endpoint.decide_many(states)
+            return actions, version, None
+        return await self.admission.decide_many(endpoint, payloads, states, started)
+
+    async def _schedule_bulk(self, endpoint, fmt, payloads, states, started, decoded, validated=None):
+        """Decide every valid task of a bulk request -> (actions with -1 for invalid tasks, version, fallback)."""
+        valid = [i for i, state in enumerate(states) if state is not None]
+        actions = np.full(len(states), -1, dtype=np.int64)
+        version, fallback = endpoint.version, None
+        if valid:
+            decided, version, fallback = await self._decide_bulk(
+                endpoint, [payloads[i] for i in valid], [states[i] for i in valid], started)
+            actions[valid] = decided
+        self._record(endpoint, fmt, started, decoded, validated, time.perf_counter())
+        self.metrics.inc("inference_bulk_tasks_total", endpoint.labels[fmt], len(states))
+        log.info("🧠 %s scheduled %d/%d bulk tasks%s", endpoint.key.upper(), len(valid), len(states),
+                 f" (fallback: {fallback})" if fallback else "")
+        if self.observers:
+            for payload, state, action in zip(payloads, states, actions.tolist()):
+                self._observe(endpoint.key, payload, state, action)
+        return actions, version, fallback
+
+    async def handle_bulk(self, payload, started, decoded, pinned_key=None):
+        """{"tasks": [...]} -> {"model", "model_version", "results": [...]} reply line."""
+        endpoint = self._route(None if pinned_key else payload.get('model'), pinned_key)
+        payloads, states, errors = protocol.parse_tasks(payload['tasks'])
+        actions, version, fallback = await self._schedule_bulk(endpoint, "json", payloads, states, started, decoded,
+                                                               time.perf_counter())
+        results = [{'task_id': task.get('task_id'), 'error': error} if error is not None
+                   else {'task_id': task.get('task_id'), 'action': action}
+                   for task, error, action in zip(payloads, errors, actions.tolist())]
+        reply = {'model': endpoint.key, 'model_version': version, 'results': results}
+        if fallback is not None:
+            reply['fallback'] = fallback
+        return json.dumps(reply).encode()
+
+    async def handle_bulk_frame(self, records, started, endpoint):
+        """DECIDE_BATCH records -> ACTIONS frame (-1 for tasks with non-finite states)."""
+        finite = np.isfinite(records['state']).all(axis=1)
+        payloads = [protocol.record_payload(record) for record in records] if self.observers else [{}] * len(records)
+        states = [state if ok else None for state, ok in zip(records['state'], finite)]
+        actions, version, _ = await self._schedule_bulk(endpoint, "binary", payloads, states, started,
+                                                        time.perf_counter())
+        return protocol.encode_actions_frame(records['task_id'], actions, version)
+
+    def _log_decision(self, endpoint, action, fallback):
+        if fallback is None:
+            log.info("🧠 %s predicted cloud: %s", endpoint.key.upper(), action)
+        else:
+            log.info("⚡ %s fallback cloud: %s (%s)", endpoint.key.upper(), action, fallback)
+
+    def _record(self, endpoint, fmt, started, decoded, validated, decided):
+        observe, labels = self.metrics.observe, endpoint.labels
+        observe("inference_stage_seconds", decoded - started, labels["decode"])
+        if validated is None:
+            validated = decoded             # Binary frames have nothing left to validate
+        else:
+            observe("inference_stage_seconds", validated - decoded, labels["validate"])
+        observe("inference_stage_seconds", decided - validated, labels["decide"])
+        self.metrics.inc("inference_requests_total", labels[fmt])
+
+    def close(self):
+        """Flush / stop the observers and the thread pool (after the listeners stop)."""
+        for observer in self.observers:
+            observer.close()
+        self.executor.shutdown(wait=False)
+
+    async def handle_request(self, line, pinned_key=None):
+        """JSON request line -> reply line."""
+        endpoint = self.endpoints[pinned_key or self.default_key]
+        payload = state = None
+        try:
+            started = time.perf_counter()
+            payload = json.loads(line)
+            decoded = time.perf_counter()
+            if 'tasks' in payload:
+                return await self.handle_bulk(payload, started, decoded, pinned_key)
+            key = None if pinned_key else payload.get('model')
+            endpoint = self._route(key, pinned_key)
+            state = protocol.parse_state(payload['state'])
+            validated = time.perf_counter()
+
+            action, version, fallback = await self._decide(endpoint, payload, state, started)
+            self._record(endpoint, "json", started, decoded, validated, time.perf_counter())
+            self._log_decision(endpoint, action, fallback)
+            if self.observers:
+                self._observe(endpoint.key, payload, state, action)
+
+            if key is not None:
+                reply = {'model': endpoint.key, 'action': action, 'model_version': version}
+                if fallback is not None:
+                    reply['fallback'] = fallback
+                return json.dumps(reply).encode()
+            return endpoint.dialect.encode_action(action, version)
+        except Exception as e:
+            self.metrics.inc("inference_errors_total", endpoint.labels["json"])
+            log.warning(f"❌ Error: {e}\n⚠️ Payload: {line[:200]!r}")
+            if self.observers and isinstance(payload, dict):
+                self._observe(endpoint.key, payload, state, -1)
+            return endpoint.dialect.encode_error(str(e))
+
+    async def handle_frame(self, msg_type, model, payload_bytes, pinned_key=None):
+        """Binary request frame -> reply frame."""
+        task_id = -1
+        endpoint = self.endpoints[pinned_key or self.default_key]
+        payload = state = None
+        try:
+            started = time.perf_counter()
+            if msg_type == protocol.MSG_DECIDE_BATCH:
+                records = protocol.decode_decide_batch(payload_bytes)
+                endpoint = self._route(protocol.MODEL_IDS.get(model, model), pinned_key)
+                return await self.handle_bulk_frame(records, started, endpoint)
+            if msg_type != protocol.MSG_DECIDE:
+                raise ValueError(f"Unsupported message type {msg_type}")
+            payload, state = protocol.decode_decide(payload_bytes)  # fixed layout: shape already valid
+            task_id = payload['task_id']
+            protocol.check_finite(state)
+            decoded = time.perf_counter()
+            endpoint = self._route(protocol.MODEL_IDS.get(model, model), pinned_key)
+
+            action, version, fallback = await self._decide(endpoint, payload, state, started)
+            self._record(endpoint, "binary", started, decoded, None, time.perf_counter())
+            self._log_decision(endpoint, action, fallback)
+            if self.observers:
+                self._observe(endpoint.key, payload, state, action)
+            return protocol.encode_action_frame(task_id, action, version)
+        except Exception as e:
+            self.metrics.inc("inference_errors_total", endpoint.labels["binary"])
+            log.warning(f"❌ Error: {e}")
+            if self.observers and payload is not None:
+                self._observe(endpoint.key, payload, state, -1)
+            return protocol.encode_error_frame(task_id, str(e))
+
+    def listener(self, host, port, name, pinned_key=None):
+        """AsyncLineServer speaking JSON and binary, optionally pinned to one model."""
+
+        async def handle_line(line):
+            return await self.handle_request(line, pinned_key)
+
+        async def handle_frame(msg_type, model, payload_bytes):
+            return await self.handle_frame(msg_type, model, payload_bytes, pinned_key)
+
+        return AsyncLineServer(handle_line, host, port, name=name, frame_handler=handle_frame,
+                               metrics=self.metrics)
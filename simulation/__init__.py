@@ -0,0 +1,7 @@
+"""
+Python re-implementation of the MultiCloudSchedulingSim task model.
+
+Lets schedulers be evaluated in bulk with NumPy instead of a Java iFogSim run.
+See simulation/task_model.py for what is reproduced and simulation/simulate.py
+for the command-line entry point.
+"""
@@ -0,0 +1,214 @@
+"""
+Multi-Scheduler, Multi-Seed Evaluation
+--------------------------------------
+Purpose:
+    Runs every scheduler against the same seeded task streams, for many
+    seeds, in a process pool, and reports each metric as a mean with a 95%
+    confidence interval instead of a single run. Because all schedulers see
+    identical tasks for a given seed, they are also compared pairwise
+    (scheduler - reference, per seed), which is what claims like the
+    dashboard's "Final Verdict" need.
+
+Usage (from the repository root):
+    python -m simulation.evaluate                                   # ppo,a2c,dqn,fcfs,rr x 10 seeds
+    python -m simulation.evaluate --seeds 30 --tasks 200000 --workers 4
+    python -m simulation.evaluate --policies ppo,rr,fixed:0 --reference rr --logs
+    python -m simulation.evaluate --policies least_loaded,fcfs,rr --arrival bursty --rate 5
+
+Outputs (--out-dir, default results/evaluation):
+    runs.csv          one row per (policy, seed): SLA %, mean cost / exec time / reward, cloud shares
+    summary.csv       per policy and metric: mean, std, 95% CI, number of seeds
+    comparison.csv    per policy and metric: paired mean difference vs --reference with its 95% CI
+    logs/<policy>_seed<k>.csv   with --logs: the dashboard log of every run
+    --store DIR       every run's log in the partitioned run store (analytics/run_store.py)
+
+Notes:
+    - Confidence intervals use Student's t over seeds (a run is one sample).
+    - A difference is marked significant when its paired CI excludes 0.
+    - Policies are built inside the worker processes (see simulation/policies.py
+      for the specs); model weights are loaded once per worker.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from simulation.policies import load_policy, model_version, policy_name  # noqa: E402
+from simulation.simulate import run  # noqa: E402
+from simulation.task_model import CLOUD_NAMES  # noqa: E402
+from simulation.workload import add_arrival_arguments, arrival_settings, make_stream  # noqa: E402
+
+DEFAULT_POLICIES = "ppo,a2c,dqn,fcfs,rr"
+METRICS = ("sla_pct", "mean_cost", "mean_exec_time", "mean_reward")
+HIGHER_IS_BETTER = {"sla_pct": True, "mean_cost": False, "mean_exec_time": False, "mean_reward": True}
+STATELESS = ("ppo", "a2c", "dqn", "sb3", "weights", "fixed")  # Safe to reuse across runs
+
+# Two-sided 95% Student's t quantiles for 1..30 degrees of freedom (normal beyond)
+T_975 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+         2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+         2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+
+_policies = {}  # Per worker process: spec -> stateless policy
+
+
+def t_critical(df):
+    return T_975[df - 1] if df <= len(T_975) else 1.96
+
+
+def mean_ci(values):
+    """(mean, std, CI low, CI high) of a sample; the CI is NaN for a single value."""
+    values = np.asarray(values, dtype=np.float64)
+    mean = float(values.mean())
+    if len(values) < 2:
+        return mean, float("nan"), float("nan"), float("nan")
+    std = float(values.std(ddof=1))
+    half = t_critical(len(values) - 1) * std / np.sqrt(len(values))
+    return mean, std, mean - half, mean + half
+
+
+def _policy(spec, seed):
+    if spec.partition(":")[0].lower() not in STATELESS:
+        return load_policy(spec, seed=seed)     # rr / fcfs / random: fresh state per run
+    if spec not in _policies:
+        _policies[spec] = load_policy(spec, seed=seed)
+    return _policies[spec]
+
+
+def run_one(spec, seed, n_tasks, chunk_size=1_000_000, log_dir=None, arrival=None, store=None):
+    """One (policy, seed) run in a worker process -> flat result row."""
+    started = time.perf_counter()
+    out_path = os.path.join(log_dir, f"{policy_name(spec)}_seed{seed}.csv") if log_dir else None
+    stream = make_stream(seed=seed, **arrival) if arrival else None
+    if store:
+        from analytics.run_store import RunStore
+        meta = {"source": "evaluate", "policy": spec, "tasks": n_tasks, "arrival": arrival}
+        with RunStore(store).writer(policy_name(spec), model_version(spec), seed, meta=meta) as writer:
+            totals = run(_policy(spec, seed), n_tasks, seed, chunk_size, out_path, stream=stream, writer=writer)
+    else:
+        totals = run(_policy(spec, seed), n_tasks, seed, chunk_size, out_path, stream=stream)
+    n = max(totals["tasks"], 1)
+    row = {
+        "policy": spec,
+        "seed": seed,
+        "tasks": totals["tasks"],
+        "sla_pct": totals["sla_met"] / n * 100,
+        "mean_cost": totals["cost"] / n,
+        "mean_exec_time": totals["exec_time"] / n,
+        "mean_reward": totals["reward"] / n,
+    }
+    for name, count in zip(CLOUD_NAMES, totals["cloud_counts"]):
+        row[f"{name.lower()}_pct"] = count / n * 100
+    row["seconds"] = time.perf_counter() - started
+    return row
+
+
+def evaluate(policies, seeds, n_tasks, workers=None, chunk_size=1_000_000, log_dir=None, arrival=None,
+             store=None):
+    """Every policy x seed in a process pool -> runs DataFrame (sorted by policy order, seed).
+
+    `arrival` is a make_stream settings dict (simulation/workload.py); None = the Java sensors.
+    `store` is a run store root every run's log is written to.
+    """
+    import pandas as pd
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    jobs = [(spec, seed) for spec in policies for seed in seeds]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_one, spec, seed, n_tasks, chunk_size, log_dir, arrival, store)
+                   for spec, seed in jobs]
+        rows = [future.result() for future in futures]
+    return pd.DataFrame(rows)
+
+
+def summary_table(runs, metrics=METRICS):
+    import pandas as pd
+    rows = []
+    for spec, group in runs.groupby("policy", sort=False):
+        for metric in metrics:
+            mean, std, low, high = mean_ci(group[metric])
+            rows.append({"policy": spec, "metric": metric, "mean": mean, "std": std,
+                         "ci_low": low, "ci_high": high, "n": len(group)})
+    return pd.DataFrame(rows)
+
+
+def comparison_table(runs, reference, metrics=METRICS):
+    """Paired differences (policy - reference) over the shared seeds."""
+    import pandas as pd
+    ref = runs[runs["policy"] == reference].set_index("seed")
+    rows = []
+    for spec, group in runs.groupby("policy", sort=False):
+        if spec == reference:
+            continue
+        group = group.set_index("seed")
+        seeds = group.index.intersection(ref.index)
+        for metric in metrics:
+            diff = group.loc[seeds, metric] - ref.loc[seeds, metric]
+            mean, _, low, high = mean_ci(diff)
+            better = (mean > 0) == HIGHER_IS_BETTER[metric]
+            rows.append({"policy": spec, "reference": reference, "metric": metric, "diff": mean,
+                         "ci_low": low, "ci_high": high, "significant": bool(low > 0 or high < 0),
+                         "better": bool(better and mean != 0)})
+    return pd.DataFrame(rows)
+
+
+def format_summary(summary):
+    lines = []
+    for spec, group in summary.groupby("policy", sort=False):
+        cells = [f"{row.metric} {row.mean:.3f} ±{(row.ci_high - row.ci_low) / 2:.3f}" for row in group.itertuples()]
+        lines.append(f"{spec:>10} | " + " | ".join(cells))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare schedulers over many seeded simulations")
+    parser.add_argument("--policies", default=DEFAULT_POLICIES, help="Comma-separated policy specs")
+    parser.add_argument("--seeds", type=int, default=10, help="Number of seeds per policy")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--tasks", type=int, default=100_000, help="Tasks per run")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    parser.add_argument("--reference", default=None, help="Policy the others are compared to (default: first)")
+    parser.add_argument("--out-dir", default=os.path.join("results", "evaluation"))
+    parser.add_argument("--logs", action="store_true", help="Also write every run's dashboard log")
+    parser.add_argument("--store", help="Run store root to keep every run's log in (e.g. results/runs)")
+    add_arrival_arguments(parser)
+    args = parser.parse_args()
+
+    policies = [spec.strip() for spec in args.policies.split(",") if spec.strip()]
+    reference = args.reference or policies[0]
+    if reference not in policies:
+        parser.error(f"--reference {reference} is not in --policies")
+    for spec in policies:
+        load_policy(spec)       # Fail fast on a bad spec before starting the pool
+    seeds = list(range(args.first_seed, args.first_seed + args.seeds))
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    runs = evaluate(policies, seeds, args.tasks, args.workers, args.chunk_size,
+                    os.path.join(args.out_dir, "logs") if args.logs else None, arrival_settings(args), args.store)
+    summary = summary_table(runs)
+    comparison = comparison_table(runs, reference)
+    runs.to_csv(os.path.join(args.out_dir, "runs.csv"), index=False)
+    summary.to_csv(os.path.join(args.out_dir, "summary.csv"), index=False)
+    comparison.to_csv(os.path.join(args.out_dir, "comparison.csv"), index=False)
+
+    print(f"✅ {len(runs)} runs ({len(policies)} policies x {len(seeds)} seeds x {args.tasks} tasks) "
+          f"in {time.perf_counter() - started:.1f}s")
+    print(f"📊 Mean ± 95% CI half-width over {len(seeds)} seeds:")
+    print(format_summary(summary))
+    print(f"⚖️ Paired vs {reference} (significant differences only):")
+    for row in comparison[comparison["significant"]].itertuples():
+        print(f"{row.policy:>10} | {row.metric} {row.diff:+.3f} [{row.ci_low:+.3f}, {row.ci_high:+.3f}] "
+              f"{'better' if row.better else 'worse'}")
+    print(f"📝 Results written to {args.out_dir}")
+    if args.store:
+        print(f"🗄️ Run logs stored under {args.store}")
+
+
+if __name__ == "__main__":
+    main()
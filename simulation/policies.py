@@ -0,0 +1,167 @@
+"""
+Scheduling Policies for the Python Simulator
+--------------------------------------------
+Purpose:
+    Every policy is a callable `policy(states) -> actions` over an (N, 5)
+    float32 batch, so the simulator can evaluate a whole chunk of tasks with
+    one call. `load_policy(spec)` builds one from a short string:
+
+        ppo | a2c | dqn          exported NumPy weights next to the SB3 zips (fast)
+        sb3:ppo | sb3:a2c | ...  the Stable-Baselines3 model itself (imports torch)
+        weights:path/to/x.npz    any weights file from serving/export_weights.py
+        fixed:N                  always cloud N
+        random                   uniform random cloud
+        rr                       RoundRobinScheduler.getNextCloudIndex
+        fcfs                     FCFScheduler.getLeastLoadedCloudIndex
+        least_loaded             earliest projected finish from live per-cloud backlog
+
+Notes:
+    - RL policies are deterministic (argmax), like the A2C/DQN servers.
+    - rr and fcfs are ports of the Java baselines in java-iFogSim/. Round
+      robin keeps its position across chunks (Java's static rrIndex); FCFS
+      draws one placeholder utilization per cloud and takes the smallest,
+      exactly like the Java version, seeded for reproducible runs.
+    - least_loaded is what FCFS's TODO asks for: it tracks every cloud's
+      backlog with serving/cloud_load.py (the tracker the servers use) and
+      picks the cloud that would finish each task first. It is sequential,
+      so it runs a Python loop per chunk.
+    - Any other callable with the same signature can be passed to
+      simulation.simulate.run directly.
+    - policy_name(spec) / model_version(spec) label runs in the run store
+      (analytics/run_store.py): the version is the model file's stem plus a
+      hash of its contents, "builtin" for the heuristics.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+from simulation.task_model import CLOUD_NAMES
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MODEL_ZIPS = {
+    "ppo": os.path.join(ROOT, "ppo-server", "ppo_v2.zip"),
+    "a2c": os.path.join(ROOT, "A2C-server", "a2c_from_ppo_model_v2.zip"),
+    "dqn": os.path.join(ROOT, "DQN-server", "dqn_v1.zip"),
+}
+
+
+def weights_policy(path):
+    from serving.numpy_policy import NumpyPolicy
+    policy = NumpyPolicy.load(path, deterministic=True)
+    return policy.predict_batch
+
+
+def sb3_policy(algo):
+    from serving.policies import load_model
+    model = load_model(algo, MODEL_ZIPS[algo])
+
+    def predict(states):
+        actions, _ = model.predict(states, deterministic=True)
+        return np.asarray(actions).reshape(-1)
+
+    return predict
+
+
+def fixed_policy(cloud):
+    def predict(states):
+        return np.full(len(states), cloud, dtype=np.int64)
+
+    return predict
+
+
+def random_policy(seed=None):
+    rng = np.random.default_rng(seed)
+
+    def predict(states):
+        return rng.integers(0, len(CLOUD_NAMES), size=len(states))
+
+    return predict
+
+
+def round_robin_policy(start=0):
+    position = start                # Next cloud, like the Java static rrIndex
+
+    def predict(states):
+        nonlocal position
+        actions = (position + np.arange(len(states))) % len(CLOUD_NAMES)
+        position = int((position + len(states)) % len(CLOUD_NAMES))
+        return actions
+
+    return predict
+
+
+def fcfs_policy(seed=None):
+    rng = np.random.default_rng(seed)
+
+    def predict(states):
+        fake_util = rng.random((len(states), len(CLOUD_NAMES)))  # TODO in Java: real utilization
+        return np.argmin(fake_util, axis=1)
+
+    return predict
+
+
+def least_loaded_policy():
+    from serving.cloud_load import CloudLoad
+    load = CloudLoad(clock="task")
+
+    def predict(states):
+        actions = np.empty(len(states), dtype=np.int64)
+        for i, state in enumerate(states):
+            load.advance(state)
+            actions[i] = load.least_loaded(float(state[0]) * 10000.0)
+            load.record(None, None, state, int(actions[i]))
+        return actions
+
+    return predict
+
+
+def policy_name(spec):
+    """File-name friendly label: 'sb3:ppo' -> 'sb3-ppo', 'weights:x/y.npz' -> 'y'."""
+    kind, _, arg = spec.partition(":")
+    if kind == "weights":
+        return os.path.splitext(os.path.basename(arg))[0]
+    return f"{kind}-{arg}" if arg else kind
+
+
+def model_version(spec):
+    """Model file stem + short content hash ('ppo_v2-1a2b3c4d'); 'builtin' for the heuristics."""
+    kind, _, arg = spec.partition(":")
+    kind = kind.lower()
+    if kind in MODEL_ZIPS and not arg:
+        path = os.path.splitext(MODEL_ZIPS[kind])[0] + ".npz"
+    elif kind == "sb3" and arg.lower() in MODEL_ZIPS:
+        path = MODEL_ZIPS[arg.lower()]
+    elif kind == "weights" and arg:
+        path = arg
+    else:
+        return "builtin"
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return f"{os.path.splitext(os.path.basename(path))[0]}-{digest.hexdigest()[:8]}"
+
+
+def load_policy(spec, seed=None):
+    """Build a batch policy from a spec string (see module docstring)."""
+    kind, _, arg = spec.partition(":")
+    kind = kind.lower()
+    if kind in MODEL_ZIPS and not arg:
+        return weights_policy(os.path.splitext(MODEL_ZIPS[kind])[0] + ".npz")
+    if kind == "sb3" and arg.lower() in MODEL_ZIPS:
+        return sb3_policy(arg.lower())
+    if kind == "weights" and arg:
+        return weights_policy(arg)
+    if kind == "fixed" and arg.isdigit() and int(arg) < len(CLOUD_NAMES):
+        return fixed_policy(int(arg))
+    if kind == "random":
+        return random_policy(seed)
+    if kind in ("rr", "round_robin"):
+        return round_robin_policy()
+    if kind == "fcfs":
+        return fcfs_policy(seed)
+    if kind in ("least_loaded", "ll"):
+        return least_loaded_policy()
+    raise ValueError(f"❌ Unknown policy spec '{spec}'")
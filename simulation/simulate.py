@@ -0,0 +1,128 @@
+"""
+Bulk Scheduler Simulation
+-------------------------
+Purpose:
+    Runs a scheduling policy over a seeded stream of simulator tasks with the
+    vectorized task model and writes the same log the Java harness writes
+    (TaskID,SelectedCloud,StartTime,EndTime,ExecutionTime,CPUCost,SLADuration,SLAMet),
+    so the Streamlit dashboard can read it unchanged.
+
+Usage (from the repository root):
+    python -m simulation.simulate --policy ppo --tasks 4000 --out results/ppo_log.csv
+    python -m simulation.simulate --policy dqn --tasks 5000000 --seed 7 --out /tmp/dqn_5m.csv
+    python -m simulation.simulate --policy fixed:0 --tasks 1000000       # summary only
+    python -m simulation.simulate --policy least_loaded --arrival bursty --rate 5 --out /tmp/ll_bursty.csv
+    python -m simulation.simulate --policy ppo --tasks 100000 --seed 3 --store results/runs
+
+Notes:
+    - Tasks are generated and evaluated in chunks of --chunk-size, so memory
+      stays flat no matter how many tasks are simulated.
+    - The same --seed always gives the same task stream, whatever the policy.
+    - --arrival picks the arrival process (simulation/workload.py); the
+      default is the Java harness's periodic sensors.
+    - --store keeps the run in the partitioned run store (analytics/run_store.py)
+      under model / model version / seed / date, next to earlier runs,
+      instead of (or as well as) overwriting a flat --out CSV.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from simulation.policies import load_policy, model_version, policy_name  # noqa: E402
+from simulation.task_model import CLOUD_NAMES, TaskStream, build_states, evaluate, to_log_frame  # noqa: E402
+from simulation.workload import add_arrival_arguments, arrival_settings, make_stream  # noqa: E402
+
+
+def run(policy, n_tasks, seed=0, chunk_size=1_000_000, out_path=None, integer_exec_time=True, stream=None,
+        writer=None):
+    """Simulate `n_tasks` tasks; optionally stream the log to `out_path`. Returns totals.
+
+    `stream` replaces the default TaskStream(seed) (see simulation/workload.py);
+    `writer` (a run store RunWriter) receives every log chunk as well.
+    """
+    stream = TaskStream(seed) if stream is None else stream
+    totals = {"tasks": 0, "sla_met": 0, "cost": 0.0, "exec_time": 0.0, "reward": 0.0,
+              "cloud_counts": np.zeros(len(CLOUD_NAMES), dtype=np.int64)}
+    remaining = n_tasks
+    first = True
+    while remaining > 0:
+        count = min(chunk_size, remaining)
+        tasks = stream.next_chunk(count)
+        actions = np.asarray(policy(build_states(tasks)), dtype=np.int64).reshape(-1)
+        outcome = evaluate(tasks, actions, integer_exec_time)
+
+        totals["tasks"] += count
+        totals["sla_met"] += int(outcome["sla_met"].sum())
+        totals["cost"] += float(outcome["cost"].sum())
+        totals["exec_time"] += float(outcome["exec_time"].sum())
+        totals["reward"] += float(outcome["reward"].sum())
+        totals["cloud_counts"] += np.bincount(actions, minlength=len(CLOUD_NAMES))
+
+        if out_path or writer is not None:
+            frame = to_log_frame(tasks, actions, outcome)
+            if out_path:
+                frame.to_csv(out_path, mode="w" if first else "a", header=first, index=False)
+            if writer is not None:
+                writer.append(frame)
+        first = False
+        remaining -= count
+    return totals
+
+
+def summarize(totals):
+    n = max(totals["tasks"], 1)
+    usage = ", ".join(f"{name} {count / n * 100:.1f}%"
+                      for name, count in zip(CLOUD_NAMES, totals["cloud_counts"]))
+    return (f"SLA {totals['sla_met'] / n * 100:.2f}% | avg cost {totals['cost'] / n:.2f} | "
+            f"avg exec {totals['exec_time'] / n:.3f} | avg reward {totals['reward'] / n:.3f} | {usage}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized multi-cloud scheduling simulation")
+    parser.add_argument("--policy", default="ppo",
+                        help="ppo, a2c, dqn, sb3:<algo>, weights:<npz>, fixed:N, random, rr, fcfs, least_loaded")
+    parser.add_argument("--tasks", type=int, default=4000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    parser.add_argument("--out", help="CSV log to write (omit for summary only)")
+    parser.add_argument("--exact-exec-time", action="store_true",
+                        help="Use true division for execTime instead of Java's integer division")
+    parser.add_argument("--store", help="Run store root to keep this run in (e.g. results/runs)")
+    add_arrival_arguments(parser)
+    args = parser.parse_args()
+
+    policy = load_policy(args.policy, seed=args.seed)
+    writer = None
+    if args.store:
+        from analytics.run_store import RunStore
+        writer = RunStore(args.store).writer(
+            policy_name(args.policy), model_version(args.policy), args.seed,
+            meta={"source": "simulate", "policy": args.policy, "tasks": args.tasks,
+                  "exact_exec_time": args.exact_exec_time, "arrival": arrival_settings(args)})
+    started = time.perf_counter()
+    try:
+        totals = run(policy, args.tasks, args.seed, args.chunk_size, args.out,
+                     integer_exec_time=not args.exact_exec_time,
+                     stream=make_stream(seed=args.seed, **arrival_settings(args)), writer=writer)
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    elapsed = time.perf_counter() - started
+
+    print(f"✅ {args.policy}: {totals['tasks']} tasks in {elapsed:.2f}s "
+          f"({totals['tasks'] / max(elapsed, 1e-9):,.0f} tasks/s)")
+    print(f"📊 {summarize(totals)}")
+    if args.out:
+        print(f"📝 Log written to {args.out}")
+    if writer is not None:
+        print(f"🗄️ Run stored in {writer.close()['path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Multi-Cloud Task Model (vectorized)
+-----------------------------------
+Purpose:
+    Reproduces the per-task logic of `MultiCloudSchedulingSim.processTupleArrival`
+    (java-iFogSim/) over whole arrays of tasks at once:
+
+        cpuDemand   = (long) U(7000, 10000)           memDemand = (long) U(128, 1024)
+        slaDeadline = cpuDemand / 8000.0
+        state       = [cpu/10000, mem/1024, start/1000, sla/10, 0.0]
+        execTime    = cpuDemand / cloud MIPS          (long / int in Java -> integer)
+        cost        = cpuDemand * ratePerMips / 10000
+        slaMet      = execTime <= slaDeadline
+        reward      = 1.0 - 1.5 * (not slaMet) - cost / 10
+
+Clouds (createCloudProvider):
+    0 AWS    10000 MIPS   rate 100 / MIPS
+    1 Azure   7000 MIPS   rate 150 / MIPS
+    2 GCP     5000 MIPS   rate 200 / MIPS
+    The "rate" is the FogDevice ratePerMips argument (passed as `latency`
+    in the Java code), which is what getRatePerMips() returns.
+
+Arrivals:
+    10 sensors emit periodically with an interval drawn from U(3, 7), like
+    createSensorAndActuator with DeterministicDistribution. Each sensor starts
+    at a random phase after `start_time` (the Java logs start around t=54).
+
+Notes:
+    - Java computes execTime as long / int, so it is truncated to whole seconds
+      (0 on AWS, 1 on Azure/GCP). `integer_exec_time=False` uses true division.
+    - Everything is generated in chunks, so millions of tasks fit in memory.
+"""
+
+import numpy as np
+
+CLOUD_NAMES = ("AWS", "Azure", "GCP")
+CLOUD_MIPS = np.array([10000, 7000, 5000], dtype=np.int64)
+CLOUD_RATE_PER_MIPS = np.array([100.0, 150.0, 200.0])
+
+CPU_DEMAND_RANGE = (7000, 10000)
+MEM_DEMAND_RANGE = (128, 1024)
+SLA_MIPS = 8000.0           # slaDeadline = cpuDemand / 8000
+N_SENSORS = 10
+SENSOR_INTERVAL_RANGE = (3.0, 7.0)
+START_TIME = 54.0
+
+LOG_COLUMNS = ["TaskID", "SelectedCloud", "StartTime", "EndTime",
+               "ExecutionTime", "CPUCost", "SLADuration", "SLAMet"]
+
+
+class TaskStream:
+    """Seeded, chunked generator of simulator tasks (arrival-ordered)."""
+
+    def __init__(self, seed=None, n_sensors=N_SENSORS, start_time=START_TIME):
+        # Separate streams so the tasks do not depend on the chunk size
+        sensor_seed, cpu_seed, mem_seed = np.random.SeedSequence(seed).spawn(3)
+        sensor_rng = np.random.default_rng(sensor_seed)
+        self.cpu_rng = np.random.default_rng(cpu_seed)
+        self.mem_rng = np.random.default_rng(mem_seed)
+        self.periods = sensor_rng.uniform(*SENSOR_INTERVAL_RANGE, size=n_sensors)
+        self.next_emit = start_time + sensor_rng.uniform(0.0, self.periods)
+        self.next_task_id = 1
+
+    def _arrivals(self, count):
+        """Next `count` arrival times of the merged periodic sensor streams."""
+        rate = (1.0 / self.periods).sum()
+        horizon = self.next_emit.max() + count / rate
+        while True:
+            per_sensor = np.maximum(np.ceil((horizon - self.next_emit) / self.periods), 0).astype(np.int64)
+            if per_sensor.sum() >= count:
+                break
+            horizon += count / rate
+        times = np.concatenate([emit + period * np.arange(k)
+                                for emit, period, k in zip(self.next_emit, self.periods, per_sensor)])
+        sensor = np.repeat(np.arange(len(self.periods)), per_sensor)
+        order = np.argsort(times, kind="stable")[:count]
+        # Advance each sensor past the emissions that were used
+        self.next_emit = self.next_emit + np.bincount(sensor[order], minlength=len(self.periods)) * self.periods
+        return times[order]
+
+    def next_chunk(self, count):
+        """Return `count` tasks as a dict of arrays."""
+        task_id = np.arange(self.next_task_id, self.next_task_id + count, dtype=np.int64)
+        self.next_task_id += count
+        cpu = np.floor(self.cpu_rng.uniform(*CPU_DEMAND_RANGE, size=count)).astype(np.int64)
+        mem = np.floor(self.mem_rng.uniform(*MEM_DEMAND_RANGE, size=count)).astype(np.int64)
+        return {
+            "task_id": task_id,
+            "cpu_demand": cpu,
+            "mem_demand": mem,
+            "start_time": self._arrivals(count),
+            "sla_deadline": cpu / SLA_MIPS,
+        }
+
+
+def build_states(tasks):
+    """(N, 5) float32 state vectors, exactly as processTupleArrival builds them."""
+    states = np.zeros((len(tasks["cpu_demand"]), 5), dtype=np.float32)
+    states[:, 0] = tasks["cpu_demand"] / 10000.0
+    states[:, 1] = tasks["mem_demand"] / 1024.0
+    states[:, 2] = tasks["start_time"] / 1000.0
+    states[:, 3] = tasks["sla_deadline"] / 10.0
+    return states
+
+
+def tasks_from_states(states):
+    """Inverse of build_states: task fields recovered from (N, 5) state vectors."""
+    states = np.asarray(states, dtype=np.float64).reshape(-1, 5)
+    cpu = np.rint(states[:, 0] * 10000.0).astype(np.int64)
+    return {
+        "task_id": np.zeros(len(states), dtype=np.int64),
+        "cpu_demand": cpu,
+        "mem_demand": np.rint(states[:, 1] * 1024.0).astype(np.int64),
+        "start_time": states[:, 2] * 1000.0,
+        "sla_deadline": cpu / SLA_MIPS,
+    }
+
+
+def evaluate(tasks, actions, integer_exec_time=True):
+    """Execution time, cost, SLA and shaped reward for the chosen clouds."""
+    actions = np.asarray(actions, dtype=np.int64)
+    cpu = tasks["cpu_demand"]
+    mips = CLOUD_MIPS[actions]
+    exec_time = (cpu // mips).astype(np.float64) if integer_exec_time else cpu / mips
+    cost = cpu * CLOUD_RATE_PER_MIPS[actions] / 10000.0
+    sla_met = exec_time <= tasks["sla_deadline"]
+    reward = 1.0 - 1.5 * (~sla_met) - cost / 10.0
+    return {
+        "exec_time": exec_time,
+        "end_time": tasks["start_time"] + exec_time,
+        "cost": cost,
+        "sla_met": sla_met,
+        "reward": reward,
+    }
+
+
+def to_log_frame(tasks, actions, outcome):
+    """DataFrame in the TaskID,SelectedCloud,...,SLAMet schema the dashboard reads."""
+    import pandas as pd
+    return pd.DataFrame({
+        "TaskID": tasks["task_id"],
+        "SelectedCloud": np.asarray(actions, dtype=np.int64),
+        "StartTime": tasks["start_time"],
+        "EndTime": outcome["end_time"],
+        "ExecutionTime": outcome["exec_time"],
+        "CPUCost": outcome["cost"],
+        "SLADuration": tasks["sla_deadline"],
+        "SLAMet": np.where(outcome["sla_met"], "YES", "NO"),
+    }, columns=LOG_COLUMNS)
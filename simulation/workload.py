@@ -0,0 +1,387 @@
+"""
+Streaming Synthetic Workloads
+-----------------------------
+Purpose:
+    Seeded generator of simulator tasks (cpu_demand, mem_demand, start_time,
+    sla_deadline, exactly as task_model.TaskStream) under configurable arrival
+    processes, for stress tests far beyond the ~4k-row logs in results/. Tasks
+    are produced chunk by chunk, so memory stays flat for any task count, and
+    are written to chunked files, to a training-column directory or straight
+    into a server socket.
+
+Arrival processes (--arrival):
+    periodic   the Java harness: 10 sensors with U(3, 7) s periods (TaskStream)
+    poisson    exponential gaps at --rate tasks/s
+    diurnal    Poisson with rate * (1 + amplitude * sin(2 pi t / period)), by thinning
+    bursty     heavy-tailed Pareto (Lomax) gaps with shape --alpha, mean 1 / --rate;
+               alpha <= 2 has infinite variance: long quiet spells and dense bursts
+    For the same seed every process draws the same cpu / memory demands; only
+    the arrival times differ.
+
+Outputs:
+    --format npz      <out>/part-000000.npz ... one file per chunk (task columns)
+    --format csv      <out>/part-000000.csv ... same columns as text
+    --format cols     <out> as a training-column directory (state, next_state,
+                      action, reward, done, sla_met, cpu_cost .npy + meta.json,
+                      the "Google Colab/columnar_dataset.py" layout), labelled
+                      by --policy and scored with the task model
+    --connect H:P     stream the tasks to a running server instead (--wire
+                      json / binary, --bulk N tasks per request) and report
+                      tasks/s
+    Every file output also gets a manifest.json with the generator settings.
+
+Usage (from the repository root):
+    python -m simulation.workload --arrival bursty --rate 500 --tasks 100000000 --out data/bursty
+    python -m simulation.workload --arrival diurnal --tasks 5000000 --format cols --policy random --out data/diurnal.cols
+    python -m simulation.workload --arrival poisson --tasks 10000000 --connect localhost:5055 --wire binary --bulk 1000
+
+    from simulation.workload import make_stream, read_workload
+    stream = make_stream("bursty", seed=0, rate=500, alpha=1.5)   # .next_chunk(n) like TaskStream
+    for tasks in read_workload("data/bursty"): ...
+
+Notes:
+    - python -m simulation.simulate / simulation.evaluate take the same
+      --arrival flags, so dashboard logs and evaluations can use any process;
+      benchmarks/load_test.py replays a workload directory with --states.
+    - Training columns use simulator-state units (cpu / 10000, ...), the
+      units the served models receive, not the StateVec units of the CSVs in
+      "Google Colab/Datasets/".
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from simulation.task_model import START_TIME, TaskStream, build_states, evaluate  # noqa: E402
+
+ARRIVALS = ("periodic", "poisson", "diurnal", "bursty")
+FORMATS = ("npz", "csv", "cols")
+THINNING_BLOCK = 65536      # Diurnal candidates drawn at a time
+TASK_COLUMNS = ("task_id", "cpu_demand", "mem_demand", "start_time", "sla_deadline")
+TRAINING_COLUMNS = {
+    "state": ("<f4", (5,)), "next_state": ("<f4", (5,)), "action": ("<i8", ()), "reward": ("<f4", ()),
+    "done": ("|b1", ()), "sla_met": ("|b1", ()), "cpu_cost": ("<f4", ()),
+}
+
+
+# ---------------- Arrival processes ----------------
+
+class PoissonStream(TaskStream):
+    """Tasks arriving as a Poisson process of `rate` per second."""
+
+    def __init__(self, seed=None, rate=2.0, start_time=START_TIME):
+        super().__init__(seed, start_time=start_time)
+        # A fourth child of the same seed: cpu / mem draws stay those of TaskStream(seed)
+        self.arrival_rng = np.random.default_rng(np.random.SeedSequence(seed).spawn(4)[3])
+        self.rate = rate
+        self.clock = start_time
+
+    def _gaps(self, count):
+        return self.arrival_rng.exponential(1.0 / self.rate, count)
+
+    def _arrivals(self, count):
+        times = self.clock + np.cumsum(self._gaps(count))
+        self.clock = times[-1]
+        return times
+
+
+class BurstyStream(PoissonStream):
+    """Renewal process with Pareto (Lomax) gaps: mean 1 / rate, heavy tail for alpha <= 2."""
+
+    def __init__(self, seed=None, rate=2.0, alpha=1.5, start_time=START_TIME):
+        if alpha <= 1:
+            raise ValueError(f"alpha must be > 1 for a finite mean rate, got {alpha}")
+        super().__init__(seed, rate, start_time)
+        self.alpha = alpha
+
+    def _gaps(self, count):
+        return self.arrival_rng.pareto(self.alpha, count) * (self.alpha - 1) / self.rate
+
+
+class DiurnalStream(PoissonStream):
+    """Poisson process whose rate follows a daily sine: rate * (1 + amplitude * sin(2 pi t / period))."""
+
+    def __init__(self, seed=None, rate=2.0, amplitude=0.8, period=86400.0, start_time=START_TIME):
+        if not 0 <= amplitude <= 1:
+            raise ValueError(f"amplitude must be in [0, 1], got {amplitude}")
+        super().__init__(seed, rate, start_time)
+        self.amplitude = amplitude
+        self.period = period
+        self.origin = start_time
+        self.carry = np.empty(0)        # Arrivals generated but not handed out yet
+
+    def rate_at(self, times):
+        return self.rate * (1 + self.amplitude * np.sin(2 * np.pi * (times - self.origin) / self.period))
+
+    def _arrivals(self, count):
+        peak = self.rate * (1 + self.amplitude)
+        accepted = [self.carry]
+        have = len(self.carry)
+        while have < count:
+            # Fixed-size blocks of candidates at the peak rate, each kept with probability
+            # rate(t) / peak (thinning); fixed blocks keep the arrivals independent of the chunk size
+            candidates = self.clock + np.cumsum(self.arrival_rng.exponential(1.0 / peak, THINNING_BLOCK))
+            kept = candidates[self.arrival_rng.random(THINNING_BLOCK) * peak < self.rate_at(candidates)]
+            self.clock = candidates[-1]
+            accepted.append(kept)
+            have += len(kept)
+        times = np.concatenate(accepted)
+        self.carry = times[count:]
+        return times[:count]
+
+
+def make_stream(arrival="periodic", seed=None, rate=2.0, amplitude=0.8, period=86400.0, alpha=1.5,
+                start_time=START_TIME):
+    """Task stream with `next_chunk(count)` for one of ARRIVALS."""
+    if arrival == "periodic":
+        return TaskStream(seed, start_time=start_time)
+    if arrival == "poisson":
+        return PoissonStream(seed, rate, start_time)
+    if arrival == "diurnal":
+        return DiurnalStream(seed, rate, amplitude, period, start_time)
+    if arrival == "bursty":
+        return BurstyStream(seed, rate, alpha, start_time)
+    raise ValueError(f"❌ Unknown arrival process '{arrival}', expected one of {ARRIVALS}")
+
+
+def add_arrival_arguments(parser):
+    """--arrival / --rate / --amplitude / --period / --alpha, shared with simulate.py and evaluate.py."""
+    parser.add_argument("--arrival", choices=ARRIVALS, default="periodic", help="Task arrival process")
+    parser.add_argument("--rate", type=float, default=2.0, help="Mean arrivals per second (not periodic)")
+    parser.add_argument("--amplitude", type=float, default=0.8, help="diurnal: relative swing of the rate")
+    parser.add_argument("--period", type=float, default=86400.0, help="diurnal: cycle length in seconds")
+    parser.add_argument("--alpha", type=float, default=1.5, help="bursty: Pareto tail shape (> 1)")
+
+
+def arrival_settings(args):
+    return {"arrival": args.arrival, "rate": args.rate, "amplitude": args.amplitude,
+            "period": args.period, "alpha": args.alpha}
+
+
+def chunks(stream, n_tasks, chunk_size):
+    """Yield task chunks until `n_tasks` have been produced."""
+    remaining = n_tasks
+    while remaining > 0:
+        count = min(chunk_size, remaining)
+        yield stream.next_chunk(count)
+        remaining -= count
+
+
+# ---------------- File outputs ----------------
+
+def write_parts(stream, n_tasks, out_dir, fmt="npz", chunk_size=1_000_000):
+    """One npz / csv file per chunk; returns the number of parts."""
+    os.makedirs(out_dir, exist_ok=True)
+    parts = 0
+    for parts, tasks in enumerate(chunks(stream, n_tasks, chunk_size), start=1):
+        path = os.path.join(out_dir, f"part-{parts - 1:06d}.{fmt}")
+        if fmt == "npz":
+            np.savez(path, **tasks)
+        else:
+            import pandas as pd
+            pd.DataFrame(tasks, columns=TASK_COLUMNS).to_csv(path, index=False)
+    return parts
+
+
+def next_states(tasks, outcome):
+    """Java's nextState after the task ran: reduced demands, end time, cost / 10."""
+    states = np.empty((len(tasks["cpu_demand"]), 5), dtype=np.float32)
+    states[:, 0] = tasks["cpu_demand"] * 0.9 / 10000.0
+    states[:, 1] = tasks["mem_demand"] * 0.9 / 1024.0
+    states[:, 2] = outcome["end_time"] / 1000.0
+    states[:, 3] = tasks["sla_deadline"] / 10.0
+    states[:, 4] = outcome["cost"] / 10.0
+    return states
+
+
+def write_training_columns(stream, n_tasks, out_dir, policy, chunk_size=1_000_000, source=None):
+    """Training columns for `n_tasks` tasks, filled chunk by chunk into preallocated .npy files."""
+    os.makedirs(out_dir, exist_ok=True)
+    columns = {name: np.lib.format.open_memmap(os.path.join(out_dir, f"{name}.npy"), mode="w+",
+                                               dtype=dtype, shape=(n_tasks, *shape))
+               for name, (dtype, shape) in TRAINING_COLUMNS.items()}
+    first = 0
+    for tasks in chunks(stream, n_tasks, chunk_size):
+        states = build_states(tasks)
+        actions = np.asarray(policy(states), dtype=np.int64).reshape(-1)
+        outcome = evaluate(tasks, actions)
+        rows = slice(first, first + len(actions))
+        columns["state"][rows] = states
+        columns["next_state"][rows] = next_states(tasks, outcome)
+        columns["action"][rows] = actions
+        columns["reward"][rows] = outcome["reward"]
+        columns["done"][rows] = False
+        columns["sla_met"][rows] = outcome["sla_met"]
+        columns["cpu_cost"][rows] = outcome["cost"]
+        first += len(actions)
+    for column in columns.values():
+        column.flush()
+    meta = {"rows": n_tasks, "columns": sorted(columns), "source": source}
+    with open(os.path.join(out_dir, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+
+
+def read_workload(path):
+    """Yield task chunks (dicts of arrays) from a directory written by write_parts, or one part file."""
+    paths = [path] if os.path.isfile(path) else sorted(glob.glob(os.path.join(path, "part-*.*")))
+    for part in paths:
+        if part.endswith(".npz"):
+            with np.load(part) as data:
+                yield {name: data[name] for name in TASK_COLUMNS}
+        elif part.endswith(".csv"):
+            import pandas as pd
+            df = pd.read_csv(part)
+            yield {name: df[name].to_numpy() for name in TASK_COLUMNS}
+
+
+def is_workload(path):
+    return os.path.isfile(os.path.join(path, "manifest.json")) or os.path.basename(path).startswith("part-")
+
+
+# ---------------- Socket output ----------------
+
+def encode_chunk(tasks, wire, bulk, model=None):
+    """Request bytes for one chunk: one task per request, or `bulk` tasks per request."""
+    from serving import protocol
+    states = build_states(tasks)
+    task_ids, deadlines = tasks["task_id"], tasks["sla_deadline"]
+    code = {name: code for code, name in protocol.MODEL_IDS.items()}.get(model, 0)
+    requests = []
+    for first in range(0, len(states), bulk):
+        rows = slice(first, first + bulk)
+        if wire == "binary":
+            if bulk > 1:
+                requests.append(protocol.encode_decide_batch(task_ids[rows], states[rows], deadlines[rows], code))
+            else:
+                requests.append(protocol.encode_decide(int(task_ids[first]), states[first],
+                                                       sla_deadline=float(deadlines[first]), model=code))
+            continue
+        tasks_json = [{"task_id": int(i), "state": [round(float(v), 6) for v in s], "sla_deadline": float(d)}
+                      for i, s, d in zip(task_ids[rows], states[rows], deadlines[rows])]
+        payload = {"tasks": tasks_json} if bulk > 1 else tasks_json[0]
+        if model:
+            payload["model"] = model
+        requests.append((json.dumps(payload) + "\n").encode())
+    return requests
+
+
+async def _send_all(host, port, requests, wire, window, counts):
+    """Pipeline requests on one connection with at most `window` unanswered."""
+    from serving import protocol
+    reader, writer = await asyncio.open_connection(host, port)
+    slots = asyncio.Semaphore(window)
+    pending = 0
+
+    async def read_replies():
+        nonlocal pending
+        while True:
+            if wire == "binary":
+                msg_type, _, length = protocol.read_header(await reader.readexactly(protocol.HEADER.size))
+                body = await reader.readexactly(length)
+                failed = msg_type == protocol.MSG_ERROR or (
+                    msg_type == protocol.MSG_ACTIONS and (protocol.decode_actions(body)[2] < 0).any())
+            else:
+                failed = b'"error"' in await reader.readline()
+            counts["errors"] += failed
+            counts["replies"] += 1
+            pending -= 1
+            slots.release()
+
+    replies = asyncio.create_task(read_replies())
+    try:
+        async for request in requests:
+            await slots.acquire()
+            pending += 1
+            writer.write(request)
+            await writer.drain()
+        while pending and not replies.done():   # Wait for the last replies (or a closed connection)
+            await asyncio.sleep(0.001)
+    finally:
+        replies.cancel()
+        writer.close()
+
+
+async def stream_to_socket(stream, n_tasks, host, port, wire="json", bulk=1, window=64, connections=4,
+                           chunk_size=100_000, model=None):
+    """Send `n_tasks` generated tasks to a server; returns {"requests", "replies", "errors", "seconds"}."""
+    counts = {"requests": 0, "replies": 0, "errors": 0}
+    queue = asyncio.Queue(maxsize=connections * window * 2)   # Bounded: generation waits for the sockets
+
+    async def produce():
+        for tasks in chunks(stream, n_tasks, chunk_size):
+            for request in encode_chunk(tasks, wire, bulk, model):
+                await queue.put(request)
+                counts["requests"] += 1
+        for _ in range(connections):
+            await queue.put(None)
+
+    async def drain_queue():
+        while True:
+            request = await queue.get()
+            if request is None:
+                return
+            yield request
+
+    started = time.perf_counter()
+    await asyncio.gather(produce(), *(_send_all(host, port, drain_queue(), wire, window, counts)
+                                      for _ in range(connections)))
+    counts["seconds"] = time.perf_counter() - started
+    return counts
+
+
+# ---------------- CLI ----------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Seeded, streaming synthetic task workloads")
+    add_arrival_arguments(parser)
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=1_000_000, help="Tasks generated (and per file) at a time")
+    parser.add_argument("--out", help="Output directory (file formats)")
+    parser.add_argument("--format", choices=FORMATS, default="npz")
+    parser.add_argument("--policy", default="random", help="--format cols: policy spec labelling the actions")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="Stream the tasks to a server instead of files")
+    parser.add_argument("--wire", choices=("json", "binary"), default="json")
+    parser.add_argument("--bulk", type=int, default=1, help="Tasks per request when streaming")
+    parser.add_argument("--model", default=None, help="Gateway model for streamed requests")
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--window", type=int, default=64, help="Unanswered requests per connection")
+    args = parser.parse_args()
+    if not args.connect and not args.out:
+        parser.error("give --out for files or --connect to stream to a server")
+
+    stream = make_stream(seed=args.seed, **arrival_settings(args))
+    started = time.perf_counter()
+    if args.connect:
+        host, _, port = args.connect.rpartition(":")
+        counts = asyncio.run(stream_to_socket(stream, args.tasks, host or "localhost", int(port), args.wire,
+                                              max(1, args.bulk), args.window, args.connections,
+                                              min(args.chunk_size, 100_000), args.model))
+        print(f"✅ {args.tasks} tasks in {counts['requests']} requests to {args.connect} in {counts['seconds']:.1f}s "
+              f"({args.tasks / counts['seconds']:,.0f} tasks/s), {counts['errors']} error replies")
+        return
+
+    if args.format == "cols":
+        from simulation.policies import load_policy
+        write_training_columns(stream, args.tasks, args.out, load_policy(args.policy, seed=args.seed),
+                               args.chunk_size, source=f"simulation.workload {args.arrival} seed {args.seed}")
+    else:
+        write_parts(stream, args.tasks, args.out, args.format, args.chunk_size)
+    manifest = {**arrival_settings(args), "seed": args.seed, "tasks": args.tasks, "format": args.format,
+                "chunk_size": args.chunk_size, "policy": args.policy if args.format == "cols" else None}
+    with open(os.path.join(args.out, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    elapsed = time.perf_counter() - started
+    print(f"✅ {args.tasks} {args.arrival} tasks in {elapsed:.1f}s ({args.tasks / max(elapsed, 1e-9):,.0f} tasks/s)")
+    print(f"📝 Written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Regression tests: NaN / infinity must not poison the live cloud load."""
+
+import asyncio
+import json
+import math
+
+import numpy as np
+import pytest
+
+from serving import protocol
+from serving.cloud_load import CloudLoad
+from serving.service import InferenceService
+
+
+class FirstCloud:
+    def predict_batch(self, states):
+        return np.zeros(len(states), dtype=np.int64)
+
+
+def assert_finite(cloud_load):
+    assert all(math.isfinite(value) for value in cloud_load.backlog())
+    assert all(math.isfinite(value) for _, _, value in cloud_load.counters())
+
+
+def test_parse_state_rejects_non_finite():
+    with pytest.raises(ValueError):
+        protocol.parse_state([float("nan"), 0.1, 0.2, 0.3, 0.0])
+    with pytest.raises(ValueError):
+        protocol.parse_state("[0.5, 0.1, Infinity, 0.3, 0.0]")
+
+
+def test_record_ignores_non_finite_state_and_outcome():
+    cloud_load = CloudLoad()
+    cloud_load.record("ppo", {"task_id": 1}, np.array([0.5, 0.1, 0.2, 0.3, 0.0]), 0)
+    cloud_load.record("ppo", {"task_id": 2}, np.array([np.nan, 0.1, 0.2, 0.3, 0.0]), 1)
+    cloud_load.record("ppo", {"task_id": 3}, np.array([0.5, 0.1, np.inf, 0.3, 0.0]), 2)
+    cloud_load.record("ppo", {"task_id": 1, "execution_time": "NaN", "cost": 1.0, "sla_met": "YES"},
+                      np.array([0.5, 0.1, 0.3, 0.3, 0.0]), 0)
+    cloud_load.record("ppo", {"task_id": 4, "execution_time": 2.0, "cost": float("inf"), "sla_met": "NO"},
+                      np.array([0.5, 0.1, 0.3, 0.3, 0.0]), 0)
+    assert math.isfinite(cloud_load.now)
+    assert_finite(cloud_load)
+    assert cloud_load.placed[1] == 0 and cloud_load.placed[2] == 0
+
+
+def test_nan_request_keeps_metrics_finite():
+    cloud_load = CloudLoad()
+    service = InferenceService(workers=1, cloud_load=cloud_load)
+    service.add_model("ppo", FirstCloud(), protocol.PPO)
+
+    async def send():
+        good = json.dumps({"task_id": 1, "state": [0.5, 0.1, 0.2, 0.3, 0.0]})
+        bad = '{"task_id": 2, "state": [NaN, 0.1, Infinity, 0.3, 0.0]}'
+        await service.handle_request(good)
+        error = await service.handle_request(bad)
+        frame = protocol.encode_decide(3, np.array([np.nan, 0.1, 0.2, 0.3, 0.0], dtype=np.float32))
+        msg_type, model, _ = protocol.read_header(frame[:protocol.HEADER.size])
+        reply = await service.handle_frame(msg_type, model, frame[protocol.HEADER.size:])
+        return error, reply
+
+    try:
+        error, reply = asyncio.run(send())
+    finally:
+        service.close()
+    assert b"NaN or infinity" in error
+    assert protocol.read_header(reply[:protocol.HEADER.size])[0] == protocol.MSG_ERROR
+    assert cloud_load.placed[0] == 1
+    assert_finite(cloud_load)
+    assert "nan" not in service.metrics.render().lower()